@@ -0,0 +1,76 @@
+'''
+Compares a new LNS bin with and without the demand cap (see LnsMBM.max_counts), e.g.
+
+    python -m benchmarks.demand_cap --problems "1_3_6/4_100_400.json" --limit 1 --max-demand 1 --time 120
+
+Both models are solved from scratch without previous bins, the capped model should reach the optimum of the uncapped model.
+Exit code 1 if the cap cuts off the optimum: a proven optimum of the capped model is worse than a solution of the uncapped model.
+'''
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks.run import suites
+from src.utils.configuration import Configuration
+
+
+'''
+Solve one new bin of a problem, returns the objective (None if not SAT), the status and the number of solver variables
+'''
+def solve(problem, lns_model, production_model, single_bin_model, demand_cap, max_time_in_seconds):
+    lns = lns_model.init_from_problem(problem, production_model, single_bin_model)
+    sat, model = lns.solve_one_bin(config=Configuration(quiet=True), bin_solutions=[], max_time_in_seconds=max_time_in_seconds, demand_cap=demand_cap)
+    objective = model.objective.value() if sat else None
+    return objective, model.stats.status, model.stats.nr_solver_variables
+
+
+'''
+Compare the capped with the uncapped model, returns whether the cap kept the optimum (None if unknown within the time limit)
+'''
+def compare(uncapped, capped):
+    (objective, status, _), (objective_c, status_c, _) = uncapped, capped
+    if objective is None or objective_c is None:
+        return None if objective_c is None else True
+    if status_c == "OPTIMAL" and objective_c > objective:
+        return False
+    if status == "OPTIMAL" and status_c == "OPTIMAL":
+        return objective_c == objective
+    return True if objective_c <= objective else None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.demand_cap", description="Validate the demand cap of the LNS model")
+    parser.add_argument("--suite", default="multi_bin", choices=[name for (name, suite) in suites.items() if suite.multi_bin])
+    parser.add_argument("--single-bin-model", default="Anchor", help="single bin model of the new bin")
+    parser.add_argument("--problems", default="1_3_6/4_100_400.json", help="problem files (glob in the problem directory)")
+    parser.add_argument("--limit", type=int, default=1, help="number of problems per file")
+    parser.add_argument("--max-demand", type=int, help="clip the demand of every item and deadline, to make the cap active")
+    parser.add_argument("--time", type=int, default=60, help="solver time limit in seconds of every model")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    suite = suites[args.suite]
+    (lns_model, production_model) = next(models for (name, models) in suite.models().items() if "Lns" in name)
+    single_bin_model = suite.single_bin_models()[args.single_bin_model]
+
+    nr_mismatches = 0
+    for problem in suite.load_problems(args.problems, args.limit):
+        if args.max_demand is not None:
+            problem.deadline_counts = np.minimum(problem.deadline_counts, args.max_demand)
+
+        uncapped = solve(problem, lns_model, production_model, single_bin_model, False, args.time)
+        capped = solve(problem, lns_model, production_model, single_bin_model, True, args.time)
+        kept = compare(uncapped, capped)
+        nr_mismatches += kept is False
+        print({True: "OK", False: "MISMATCH", None: "UNKNOWN"}[kept], problem.name, "uncapped", uncapped, "capped", capped, flush=True)
+
+    return 1 if nr_mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
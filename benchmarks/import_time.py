@@ -0,0 +1,81 @@
+'''
+Import-time budget of the public entry points: every module is imported in a fresh interpreter (python -X importtime),
+the fastest of the repeats is compared with its budget, e.g.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --scale 2     # slower machine
+
+Plotting and other optional dependencies may only be imported when visualising, an entry point which imports them fails.
+Most of the budget is CPMpy with OR-Tools (about 0.5s), which every model needs.
+Exit code 1 if an entry point exceeds its budget or imports an optional dependency.
+'''
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point -> budget in seconds
+BUDGETS = {
+    "src.models.single_bin.anchor.model": 1.0,
+    "src.models.single_bin.guillotine.model": 1.0,
+    "src.models.single_bin.baseline.model": 1.0,
+    "src.models.single_bin.selector": 1.0,
+    "src.models.multi_bin.lns.model": 1.0,
+    "src.models.multi_bin.iterative.model": 1.0,
+    "src.models.multi_bin.baseline.model": 1.0,
+    "src.extensions.due_dates.models.production_model": 1.0,
+    "src.utils.solution_export": 1.0,
+    "src.utils.result_cache": 1.0,
+    "benchmarks.run": 1.5,
+}
+
+# Imported only when visualising
+OPTIONAL = ["matplotlib", "IPython", "tkinter", "PIL"]
+
+
+'''
+Import time of a module in a fresh interpreter (in seconds), with the optional dependencies it imported
+'''
+def import_time(module) -> tuple[float, list[str]]:
+    code = "import " + module + "; import sys; print(' '.join(sorted(set(name.split('.')[0] for name in sys.modules) & set(" + repr(OPTIONAL) + "))))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    # Cumulative time of the module itself (in microseconds)
+    cumulative = None
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+
+    return cumulative / 1e6, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the entry points")
+    parser.add_argument("--modules", nargs="+", default=list(BUDGETS.keys()))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="factor on all budgets")
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules:
+        measurements = [import_time(module) for _ in range(args.repeats)]
+        time = min(t for (t, _) in measurements)
+        optional = measurements[0][1]
+        budget = BUDGETS.get(module, 1.0)*args.scale
+
+        ok = time <= budget and len(optional) == 0
+        failures += not ok
+        print("OK  " if ok else "FAIL", module, "%.3fs" % time, "(budget %.1fs)" % budget, ("imports " + ", ".join(optional)) if len(optional) > 0 else "")
+
+    sys.exit(1 if failures > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
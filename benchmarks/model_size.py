@@ -0,0 +1,125 @@
+'''
+Compares the analytical model sizes (see estimate_size of the models) with the exact sizes, e.g.
+
+    python -m benchmarks.model_size single_bin --problems "10_100_1*.json" --limit 2
+    python -m benchmarks.model_size multi_bin --single-bin-model Anchor --free-bins 1 2
+
+The exact size creates all constraints and flattens them, which is what the estimate avoids.
+Exit code 1 if an estimate differs from the exact size.
+'''
+
+from __future__ import annotations
+
+import argparse
+import sys
+from timeit import default_timer as timer
+
+from cpmpy.transformations.flatten_model import flatten_constraint
+
+from benchmarks.run import suites
+from src.data_structures.bin import Bin
+from src.models.abstract_model import AbstractModel, ModelSize
+
+
+'''
+Exact size of a single bin model
+'''
+def single_bin_size(model, problem) -> ModelSize:
+    initialised_model = model.init_from_problem(problem)
+    constraints = initialised_model.get_constraints()
+    return ModelSize(
+        nr_variables = len(initialised_model.get_variables()),
+        nr_constraints = len(constraints),
+        nr_flat_constraints = sum(len(flatten_constraint(c)) for c in constraints),
+    )
+
+'''
+Exact size of a production model with only free bins
+'''
+def production_size(production_model, single_bin_model, problem, nr_free_packings) -> ModelSize:
+    free_single_bins = [
+        single_bin_model.single_bin_packing(
+            _items=problem.get_item_packing(single_bin_model.ItemPacking),
+            _items_rotated=problem.get_item_packing_rotated(single_bin_model.ItemPacking),
+            bin=Bin(config=problem.get_bin_config()),
+        ) for _ in range(nr_free_packings)]
+
+    initialised_model = production_model(
+        machine_config=problem.get_machine_config(),
+        production_schedule=problem.get_production_schedule(),
+        fixed_single_bins=[],
+        free_single_bins=free_single_bins,
+        items=problem.get_items(),
+        single_bin_model=single_bin_model,
+    )
+    constraints = initialised_model.get_constraints()
+    return ModelSize(
+        nr_variables = sum(len(m.get_variables()) for m in initialised_model.free_single_bin_models) + sum(a.size for a in initialised_model.bin_production.get_variable_arrays()),
+        nr_constraints = len(constraints),
+        nr_flat_constraints = sum(len(flatten_constraint(c)) for c in constraints),
+    )
+
+
+'''
+Compare the estimate with the exact size, returns whether they are equal
+'''
+def compare(name: str, estimate, exact) -> bool:
+    AbstractModel.constraints_stats.clear()
+
+    start = timer()
+    try:
+        estimated_size = estimate()
+    except NotImplementedError as e:
+        print("SKIP", name, e)
+        return True
+    estimate_time = timer() - start
+
+    start = timer()
+    exact_size = exact()
+    exact_time = timer() - start
+
+    equal = estimated_size == exact_size
+    print("OK" if equal else "MISMATCH", name, "estimate", estimated_size, round(estimate_time, 3), "s, exact", exact_size, round(exact_time, 3), "s")
+    return equal
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.model_size", description="Validate the analytical model sizes")
+    parser.add_argument("suite", choices=["single_bin", "multi_bin"])
+    parser.add_argument("--models", nargs="+", help="model names (default: all models of the suite)")
+    parser.add_argument("--single-bin-model", default="Guillotine", help="single bin model of a multi bin suite")
+    parser.add_argument("--free-bins", nargs="+", type=int, default=[1], help="number of free bins of the production model (multi bin)")
+    parser.add_argument("--problems", help="problem files (glob in the problem directory)")
+    parser.add_argument("--limit", type=int, help="number of problems per file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    suite = suites[args.suite]
+    models = suite.models()
+    names = args.models if args.models is not None else list(models.keys())
+
+    nr_mismatches = 0
+    for problem in suite.load_problems(args.problems, args.limit):
+        for name in names:
+            if not suite.multi_bin:
+                model = models[name]
+                equal = compare(name + " " + problem.name, lambda: model.estimate_size(problem), lambda: single_bin_size(model, problem))
+                nr_mismatches += not equal
+                continue
+
+            production_model = models[name][1]
+            single_bin_model = suite.single_bin_models()[args.single_bin_model]
+            for nr_free_packings in args.free_bins:
+                equal = compare(
+                    "-".join([name, args.single_bin_model, str(nr_free_packings)]) + " " + problem.name,
+                    lambda: production_model.estimate_size(problem, single_bin_model, 0, nr_free_packings),
+                    lambda: production_size(production_model, single_bin_model, problem, nr_free_packings),
+                )
+                nr_mismatches += not equal
+
+    return 1 if nr_mismatches > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
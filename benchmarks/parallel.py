@@ -0,0 +1,207 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from timeit import default_timer as timer
+import multiprocessing as mp
+import threading
+import json
+import os
+
+from src.data_structures.problem.problem import Problem
+from src.data_structures.problem.item_merging import original_stats
+from src.models.abstract_model import AbstractMultiBinModel, AbstractSingleBinModel
+from src.extensions.due_dates.models.production_model import ProductionModel
+from src.utils.configuration import Configuration
+from src.utils.deadline import Deadline
+from src.utils.tracer import Tracer, tracing, span
+
+from src.utils.atomic_write import write_json
+
+
+@dataclass(kw_only=True)
+class BenchmarkJob:
+
+    '''
+    One (problem, model, repeat) run of a benchmark sweep.
+    Multi bin jobs also have a production and single bin model, and the solver arguments.
+    '''
+
+    problem: Problem
+    model: AbstractSingleBinModel | AbstractMultiBinModel
+    repeat: int = 0
+    max_time_seconds: int = 20                          # solver time (single bin)
+    production_model: ProductionModel = None            # multi bin only
+    single_bin_model: AbstractSingleBinModel = None     # multi bin only
+    args: dict = None                                   # multi bin only
+
+    @property
+    def multi_bin(self):
+        return self.production_model is not None
+
+    def file_name(self, result_directory):
+        return os.path.join(result_directory, self.model.get_name(), self.problem.name + "_" + str(self.repeat) + ".json")
+
+    # Whether the runner wrote the result of this job, the sequential runners write only the statistics to the same file name
+    def finished(self, result_directory):
+        file_name = self.file_name(result_directory)
+        if not os.path.exists(file_name):
+            return False
+        with open(file_name) as f:
+            return "problem" in json.load(f)
+
+    '''
+    Solve the problem, returns whether it is SAT and the statistics
+    '''
+    def run(self, config: Configuration):
+        if self.multi_bin:
+            with span("init_model"):
+                initialised_model = self.model.init_from_problem(self.problem, self.production_model, self.single_bin_model)
+            sat = initialised_model.solve(config=config, args=self.args)
+            # LNS and iterative models also return their models
+            if isinstance(sat, tuple): (sat, _) = sat
+        else:
+            with span("init_model"):
+                initialised_model = self.model.init_from_problem(self.problem)
+            sat = initialised_model.solve(config=config, max_time_in_seconds=self.max_time_seconds)
+
+        if not sat:
+            return sat, None
+
+        with span("stats"):
+            if self.multi_bin:
+                return sat, initialised_model.get_stats()
+
+            initialised_model.fix()
+            initialised_model.get_stats()
+            return sat, initialised_model.stats.to_dict()
+
+    def trace_file_name(self, trace_directory):
+        return os.path.join(trace_directory, self.model.get_name(), self.problem.name + "_" + str(self.repeat) + ".trace.json")
+
+
+'''
+Jobs of a single bin sweep, all models on all problems
+'''
+def single_bin_jobs(models: list[AbstractSingleBinModel], problems: list[Problem], max_time_seconds=20, nr_repeats=1) -> list[BenchmarkJob]:
+    return [
+        BenchmarkJob(problem=problem, model=model, repeat=i_repeat, max_time_seconds=max_time_seconds)
+        for problem in problems for model in models for i_repeat in range(nr_repeats)
+    ]
+
+'''
+Jobs of a multi bin sweep, the models are zipped as in run_multi_bin_benchmark
+'''
+def multi_bin_jobs(
+            multi_bin_models: list[AbstractMultiBinModel],
+            production_models: list[ProductionModel],
+            single_bin_models: list[AbstractSingleBinModel],
+            problems: list[Problem],
+            args: dict,
+            nr_repeats=1,
+        ) -> list[BenchmarkJob]:
+    return [
+        BenchmarkJob(problem=problem, model=model, repeat=i_repeat, production_model=production_model, single_bin_model=single_bin_model, args=args)
+        for problem in problems
+        for (model, production_model, single_bin_model) in zip(multi_bin_models, production_models, single_bin_models)
+        for i_repeat in range(nr_repeats)
+    ]
+
+'''
+Cancel the deadline once the process used its CPU-time budget (over all solver threads)
+'''
+def cpu_watchdog(budget: Deadline, cpu_time_seconds, done: threading.Event, interval=0.5):
+    import resource
+    while not done.wait(interval):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        if usage.ru_utime + usage.ru_stime >= cpu_time_seconds:
+            budget.cancel()
+            return
+
+'''
+Run one job in a worker process, within its CPU-time and wall-clock budget.
+Both budgets end the deadline of the job, which then stops cooperatively (see Deadline).
+With a trace directory, the spans of the job are exported as Chrome trace (see src/utils/tracer.py).
+'''
+def run_job(job: BenchmarkJob, config: Configuration, result_directory, cpu_time_seconds=None, wall_time_seconds=None, trace_directory=None):
+    tracer = None if trace_directory is None else Tracer()
+    with Deadline(wall_time_seconds) as budget, (nullcontext() if tracer is None else tracing(tracer)):
+
+        done = threading.Event()
+        if cpu_time_seconds is not None and config.linux:
+            threading.Thread(target=cpu_watchdog, args=(budget, cpu_time_seconds, done), daemon=True).start()
+
+        start = timer()
+        try:
+            (sat, stats) = job.run(config)
+        finally:
+            done.set()
+            if tracer is not None:
+                tracer.export(job.trace_file_name(trace_directory))
+        end = timer()
+
+    result = {
+        "problem": job.problem.name,
+        "model": job.model.get_name(),
+        "repeat": job.repeat,
+        "sat": bool(sat),
+        "timeout": budget.expired,
+        "total_time": end-start,
+        "stats": original_stats(job.problem, stats),
+    }
+    # The item groups are the merged items
+    if hasattr(job.problem, "item_merging"):
+        result["item_groups"] = job.problem.item_merging.groups
+    write_json(job.file_name(result_directory), result, indent=4)
+
+    return result
+
+'''
+Run benchmark jobs on a pool of worker processes, each job in a fresh process.
+Every job writes its result JSON (atomically) to result_directory/<model>/<problem>_<repeat>.json,
+jobs with a result of the runner are skipped (not with a file of the sequential runners), so an interrupted sweep can be resumed.
+Unless set in the configuration, the cores are shared over the workers.
+'''
+def run_parallel_benchmark(
+            jobs: list[BenchmarkJob],
+            workers: int = None,
+            config: Configuration = None,
+            cpu_time_seconds: int = None,
+            wall_time_seconds: int = None,
+            result_directory: str = None,
+            skip_existing: bool = True,
+            trace_directory: str = None,
+        ) -> list[dict]:
+
+    if workers is None:
+        workers = os.cpu_count()
+    if config is None:
+        config = Configuration()
+    if config.workers is None:
+        config = replace(config, workers=max(1, os.cpu_count() // workers))
+    if result_directory is None:
+        result_directory = os.path.join(os.getcwd(), "results")
+
+    if skip_existing:
+        jobs = [job for job in jobs if not job.finished(result_directory)]
+
+    results = []
+
+    # A fresh process per job, as the CPU time and the solver state are per process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"), max_tasks_per_child=1) as executor:
+        futures = {
+            executor.submit(run_job, job, config, result_directory, cpu_time_seconds, wall_time_seconds, trace_directory): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print("FAILED", job.problem.name, job.model.get_name(), job.repeat, repr(e))
+                continue
+
+            print("DONE", result["problem"], result["model"], result["repeat"], "SAT", result["sat"], "TIME", result["total_time"])
+            results.append(result)
+
+    return results
@@ -0,0 +1,222 @@
+'''
+Performance regression suite: runs a fixed subset of the bundled problems per model,
+and compares the construction times, model sizes and objectives with a stored baseline, e.g.
+
+    python -m benchmarks.regression --update     # store the baseline (on the reference code version)
+    python -m benchmarks.regression              # report regressions against the baseline (exit code 1 if any)
+
+Solver time, workers and seed are fixed per case, so objectives are compared at equal time.
+Timings are machine dependent, a baseline should be created on the machine which runs the suite.
+'''
+
+from __future__ import annotations
+from dataclasses import dataclass
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.run import suites
+from benchmarks.parallel import BenchmarkJob
+from src.utils.atomic_write import write_json
+from src.models.abstract_model import AbstractModel
+from src.utils.configuration import Configuration
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "regression.json")
+
+
+@dataclass(kw_only=True)
+class RegressionCase:
+
+    '''
+    One problem of a suite, solved by one model
+    '''
+
+    suite: str
+    problems: str                   # problem file in the problem directory of the suite
+    index: int = 0                  # index of the problem in the file
+    model: str
+    single_bin_model: str = None    # multi bin only
+    native: bool = False
+    time: int = 10                  # solver time (per iteration for multi bin)
+
+    def job(self) -> BenchmarkJob:
+        suite = suites[self.suite]
+        problem = suite.load_problems(self.problems)[self.index]
+        model = suite.models()[self.model]
+
+        if suite.multi_bin:
+            return BenchmarkJob(
+                problem=problem,
+                model=model[0],
+                production_model=model[1],
+                single_bin_model=suite.single_bin_models()[self.single_bin_model],
+                args={"nr_iterations": 1, "packing_timeout": self.time, "production_timeout": self.time},
+            )
+        return BenchmarkJob(problem=problem, model=model, max_time_seconds=self.time)
+
+    @property
+    def name(self):
+        model = self.model if self.single_bin_model is None else self.model + "-" + self.single_bin_model
+        return "/".join([self.suite, model] + (["native"] if self.native else []) + [self.problems.removesuffix(".json"), str(self.index)])
+
+
+cases = [
+    RegressionCase(suite="single_bin", problems=problems, index=index, model=model, native=native)
+    for (problems, index) in [("10_100_100.json", 0), ("10_100_100.json", 1), ("10_100_200.json", 0)]
+    for model in ["Anchor", "Guillotine", "GuillotineAbsolute"]
+    for native in [False, True]
+] + [
+    RegressionCase(suite="multi_bin", problems="1_3_6/4_100_400.json", index=0, model="MultiLnsModel", single_bin_model=model, native=native)
+    for model in ["Anchor", "Guillotine"]
+    for native in [False, True]
+]
+
+
+'''
+Metrics of a solved case, from its statistics (the first iteration for multi bin)
+'''
+def metrics(sat, stats) -> dict:
+    if not sat:
+        return {"sat": False}
+    if "constraints" not in stats:
+        stats = next(iter(stats.values()))
+
+    constraints = stats["constraints"] or {}
+    return {
+        "sat": True,
+        "objective": stats["objective"],
+        "construction_time": sum(c["creation_time"] for c in constraints.values()),
+        "transfer_time": stats["transfer_time"],
+        "nr_variables": stats["nr_variables"],
+        "nr_solver_variables": stats["nr_solver_variables"],
+        "nr_solver_constraints": stats["nr_solver_constraints"],
+        "creation_time": {name: c["creation_time"] for (name, c) in constraints.items()},
+        "nr_constraint": {name: c["nr_constraint"] for (name, c) in constraints.items()},
+    }
+
+def run_case(case: RegressionCase, config: Configuration) -> dict:
+    print("CASE", case.name)
+
+    # Constraint statistics are shared by all models (so a production model includes its bin models)
+    AbstractModel.constraints_stats.clear()
+
+    (sat, stats) = case.job().run(Configuration(
+        native=case.native,
+        visualise=False,
+        workers=config.workers,
+        seed=config.seed,
+    ))
+    return metrics(sat, stats)
+
+
+@dataclass(kw_only=True)
+class Tolerance:
+
+    '''
+    Relative tolerances of the comparison with the baseline
+    '''
+
+    time: float = 0.25          # construction and transfer time
+    min_time: float = 0.05      # time differences below this (in seconds) are noise
+    size: float = 0.0           # number of (solver) variables and constraints
+    objective: float = 0.01
+
+    def slower(self, current, baseline):
+        return current - baseline > max(self.time*baseline, self.min_time)
+
+    def larger(self, current, baseline):
+        return current > baseline*(1 + self.size)
+
+    def worse(self, current, baseline):
+        return current > baseline + self.objective*abs(baseline)
+
+'''
+Regressions of a case compared to its baseline, as readable messages
+'''
+def compare(current: dict, baseline: dict, tolerance: Tolerance) -> list[str]:
+    if not baseline["sat"]:
+        return []
+    if not current["sat"]:
+        return ["no solution (baseline objective " + str(baseline["objective"]) + ")"]
+
+    regressions = []
+    def report(metric, now, before):
+        regressions.append(metric + ": " + str(before) + " -> " + str(now))
+
+    if tolerance.worse(current["objective"], baseline["objective"]):
+        report("objective", current["objective"], baseline["objective"])
+
+    for metric in ["construction_time", "transfer_time"]:
+        if None not in (current[metric], baseline[metric]) and tolerance.slower(current[metric], baseline[metric]):
+            report(metric, round(current[metric], 3), round(baseline[metric], 3))
+
+    for metric in ["nr_variables", "nr_solver_variables", "nr_solver_constraints"]:
+        if None not in (current[metric], baseline[metric]) and tolerance.larger(current[metric], baseline[metric]):
+            report(metric, current[metric], baseline[metric])
+
+    # Per constraint group (e.g. no_overlap, bin_starts)
+    for (name, time) in baseline["creation_time"].items():
+        if name in current["creation_time"] and tolerance.slower(current["creation_time"][name], time):
+            report(name + " creation_time", round(current["creation_time"][name], 3), round(time, 3))
+    for (name, size) in baseline["nr_constraint"].items():
+        if name in current["nr_constraint"] and tolerance.larger(current["nr_constraint"][name], size):
+            report(name + " nr_constraint", current["nr_constraint"][name], size)
+
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.regression", description="Performance regression suite")
+    parser.add_argument("--update", action="store_true", help="store the results as baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument("--cases", nargs="+", help="only the cases whose name contains one of these")
+    parser.add_argument("--workers", type=int, default=8, help="CP-SAT workers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-tolerance", type=float, default=Tolerance.time)
+    parser.add_argument("--size-tolerance", type=float, default=Tolerance.size)
+    parser.add_argument("--objective-tolerance", type=float, default=Tolerance.objective)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = Configuration(workers=args.workers, seed=args.seed)
+    tolerance = Tolerance(time=args.time_tolerance, size=args.size_tolerance, objective=args.objective_tolerance)
+
+    selected = [case for case in cases if args.cases is None or any(part in case.name for part in args.cases)]
+    results = {case.name: run_case(case, config) for case in selected}
+
+    if args.update:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        write_json(args.baseline, baselines, indent=4)
+        print("BASELINE", args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("NO BASELINE", args.baseline, "(create it with --update)")
+        return 1
+    with open(args.baseline) as f:
+        baselines = json.load(f)
+
+    nr_regressions = 0
+    for (name, current) in results.items():
+        if name not in baselines:
+            print("NO BASELINE", name)
+            continue
+        regressions = compare(current, baselines[name], tolerance)
+        nr_regressions += len(regressions)
+        print("REGRESSION" if regressions else "OK", name)
+        for regression in regressions:
+            print("    " + regression)
+
+    return 1 if nr_regressions > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
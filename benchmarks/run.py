@@ -0,0 +1,189 @@
+'''
+Headless benchmark driver, e.g.
+
+    python -m benchmarks.run single_bin --models Anchor Guillotine --problems "10_100_1*.json" --time 60
+    python -m benchmarks.run multi_bin --models MultiLnsModel --single-bin-model Guillotine --iterations 5
+
+Problems are loaded from benchmarks/<suite>/problems, every job writes its result to
+<results>/<suite>/<model>/<problem>_<repeat>.json and the timings of the run are collected in <results>/<suite>/timings.json.
+'''
+
+from __future__ import annotations
+from dataclasses import dataclass
+
+from contextlib import nullcontext
+
+import argparse
+import glob
+import json
+import os
+
+from benchmarks.problem_json import ProblemJsonS, ProblemJsonM, ProblemJsonCS, ProblemJsonCM
+from benchmarks.parallel import single_bin_jobs, multi_bin_jobs, run_parallel_benchmark
+from src.utils.atomic_write import write_json
+from src.data_structures.problem.item_merging import merge_items
+from src.utils.configuration import Configuration
+from src.utils.tracer import Tracer, tracing, span
+
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(kw_only=True)
+class Suite:
+
+    '''
+    Benchmark suite: where its problems are, how they are loaded and which models can solve them
+    '''
+
+    directory: str              # problem directory, relative to benchmarks
+    problem_json: type          # problem loader (see problem_json.py)
+    problems: str               # default problem files (glob)
+    multi_bin: bool = False
+
+    # Models by name, imported on use
+    def models(self) -> dict:
+        if self.problem_json is ProblemJsonS:
+            from src.models.single_bin.baseline.model import BaselineSBM
+            from src.models.single_bin.anchor.model import AnchorSBM
+            from src.models.single_bin.guillotine.model import GuillotineSBM
+            from src.models.single_bin.guillotine_absolute_pos.model import GuillotineAbsolutePosSBM
+            from src.models.single_bin.heuristic.model import HeuristicSBM
+            models = [BaselineSBM, AnchorSBM, GuillotineSBM, GuillotineAbsolutePosSBM, HeuristicSBM]
+        elif self.problem_json is ProblemJsonCS:
+            from src.models.single_bin_creel.anchor.model import AnchorSBMCreel
+            from src.models.single_bin_creel.guillotine.model import GuillotineSBMCreel
+            from src.models.single_bin_creel.guillotine_absolute_pos.model import GuillotineAbsolutePosSBMCreel
+            models = [AnchorSBMCreel, GuillotineSBMCreel, GuillotineAbsolutePosSBMCreel]
+        elif self.problem_json is ProblemJsonM:
+            from src.models.multi_bin.lns.model import LnsMBM, ProductionModelLNS
+            from src.models.multi_bin.baseline.model import BaselineMBM
+            from src.models.multi_bin.iterative.model import IterativeMBM
+            from src.extensions.due_dates.models.production_model import ProductionModel
+            return {
+                LnsMBM.get_name(): (LnsMBM, ProductionModelLNS),
+                BaselineMBM.get_name(): (BaselineMBM, ProductionModel),
+                IterativeMBM.get_name(): (IterativeMBM, ProductionModel),
+            }
+        else:
+            from src.models.multi_bin_creel.lns.model import LnsMBMCreel
+            from src.extensions.creel.models.production_model_creel import ProductionModelCreel
+            return {
+                LnsMBMCreel.get_name(): (LnsMBMCreel, ProductionModelCreel),
+            }
+        return {model.get_name(): model for model in models}
+
+    # Single bin models of a multi bin suite
+    def single_bin_models(self) -> dict:
+        if self.problem_json is ProblemJsonM:
+            return Suite(directory=self.directory, problem_json=ProblemJsonS, problems=self.problems).models()
+        from src.models.multi_bin_creel.anchor.model import AnchorSBMCreel
+        from src.models.multi_bin_creel.guillotine.model import GuillotineSBMCreel
+        return {model.get_name(): model for model in [AnchorSBMCreel, GuillotineSBMCreel]}
+
+    def load_problems(self, pattern=None, limit=None) -> list:
+        problems = []
+        directory = os.path.join(BENCHMARK_DIRECTORY, self.directory)
+        for file_name in sorted(glob.glob(os.path.join(directory, self.problems if pattern is None else pattern))):
+            with open(file_name) as f, span("load_problems", file=os.path.basename(file_name)):
+                problems += self.problem_json.init_from_file(json.load(f))[:limit]
+        return problems
+
+
+suites = {
+    "single_bin": Suite(directory="single_bin/problems", problem_json=ProblemJsonS, problems="*.json"),
+    "single_bin_variable_length": Suite(directory="single_bin_variable_length/problems", problem_json=ProblemJsonS, problems="*.json"),
+    "single_bin_creel": Suite(directory="single_bin_creel/problems", problem_json=ProblemJsonCS, problems="*.json"),
+    "multi_bin": Suite(directory="multi_bin/problems", problem_json=ProblemJsonM, problems="1_3_6/*.json", multi_bin=True),
+    "multi_bin_creel": Suite(directory="multi_bin_creel/problems", problem_json=ProblemJsonCM, problems="1_3_6/*.json", multi_bin=True),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run a benchmark suite headless")
+    parser.add_argument("suite", choices=suites.keys())
+    parser.add_argument("--models", nargs="+", help="model names (default: all models of the suite)")
+    parser.add_argument("--single-bin-model", default="Guillotine", help="single bin model of a multi bin suite")
+    parser.add_argument("--problems", help="problem files (glob in the problem directory)")
+    parser.add_argument("--limit", type=int, help="number of problems per file")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--time", type=int, default=60, help="solver time (single bin) or packing time per iteration (multi bin), in seconds")
+    parser.add_argument("--production-time", type=int, default=60, help="production solver time (multi bin), in seconds")
+    parser.add_argument("--iterations", type=int, default=5, help="number of new bins (multi bin)")
+    parser.add_argument("--merge-items", action="store_true", help="pack geometrically identical items as one item (the results count the original items and keep the item groups)")
+    parser.add_argument("--pattern-pool", help="directory of the pattern pool shared over runs (multi bin)")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel jobs")
+    parser.add_argument("--cpu-time", type=int, help="CPU-time budget per job, in seconds")
+    parser.add_argument("--wall-time", type=int, help="wall-clock budget per job, in seconds")
+    parser.add_argument("--solver-workers", type=int, help="CP-SAT workers per job")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--native", action="store_true", help="post the constraints directly in CP-SAT")
+    parser.add_argument("--model-cache", help="directory of built CP-SAT models reused over runs and repeats")
+    parser.add_argument("--quiet", action="store_true", help="no progress printing or stats formatting while solving")
+    parser.add_argument("--max-memory", type=int, help="memory budget per job in MB, model construction stops cleanly when exceeded")
+    parser.add_argument("--trace-memory", action="store_true", help="allocated bytes per construction phase (tracemalloc, slower)")
+    parser.add_argument("--trace", help="directory of the Chrome traces (chrome://tracing, ui.perfetto.dev) of the jobs and of loading the problems")
+    parser.add_argument("--results", default=os.path.join(os.getcwd(), "results"), help="result directory")
+    parser.add_argument("--rerun", action="store_true", help="also run jobs which already have a result")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    suite = suites[args.suite]
+
+    models = suite.models()
+    names = list(models.keys()) if args.models is None else args.models
+
+    # Loading runs here, not in the jobs: with --trace it gets its own trace
+    tracer = None if args.trace is None else Tracer()
+    with nullcontext() if tracer is None else tracing(tracer):
+        problems = suite.load_problems(args.problems, args.limit)
+        if args.merge_items:
+            problems = [merge_items(problem) for problem in problems]
+    if tracer is not None:
+        tracer.export(os.path.join(args.trace, "load_problems.trace.json"))
+
+    if suite.multi_bin:
+        single_bin_model = suite.single_bin_models()[args.single_bin_model]
+        solver_args = {
+            "nr_iterations": args.iterations,
+            "packing_timeout": args.time,
+            "production_timeout": args.production_time,
+            "timeout": args.time*args.iterations,
+            "pattern_pool": args.pattern_pool,
+        }
+        jobs = multi_bin_jobs(
+            [models[name][0] for name in names],
+            [models[name][1] for name in names],
+            [single_bin_model for _ in names],
+            problems,
+            solver_args,
+            nr_repeats=args.repeats,
+        )
+    else:
+        jobs = single_bin_jobs([models[name] for name in names], problems, max_time_seconds=args.time, nr_repeats=args.repeats)
+
+    config = Configuration(native=args.native, visualise=False, workers=args.solver_workers, seed=args.seed, model_cache=args.model_cache, quiet=args.quiet, max_memory=args.max_memory, trace_memory=args.trace_memory)
+    result_directory = os.path.join(args.results, args.suite)
+
+    results = run_parallel_benchmark(
+        jobs,
+        workers=args.workers,
+        config=config,
+        cpu_time_seconds=args.cpu_time,
+        wall_time_seconds=args.wall_time,
+        result_directory=result_directory,
+        skip_existing=not args.rerun,
+        trace_directory=args.trace,
+    )
+
+    timings = [{key: result[key] for key in ["problem", "model", "repeat", "sat", "timeout", "total_time"]} for result in results]
+    file_name = os.path.join(result_directory, "timings.json")
+    write_json(file_name, timings, indent=4)
+    print("TIMINGS", file_name)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,33 @@
 from timeit import default_timer as timer
-import pickle
 import os
 import json
 import gc
-import matplotlib.pyplot as plt
 
 from src.data_structures.problem.multi_bin_problem import MultiBinProblem
 from src.data_structures.problem.single_bin_problem import SingleBinProblem
+from src.data_structures.problem.item_merging import original_stats
 from src.models.abstract_model import AbstractMultiBinModel, AbstractSingleBinModel
+from src.models.single_bin.portfolio import solve_portfolio
 from src.extensions.due_dates.models.production_model import ProductionModel
 from src.utils.configuration import Configuration
+from src.utils.atomic_write import write_json
+from src.utils.solution_export import packing_arrays, production_arrays, save_arrays
 
 import cpmpy
 
 
-class BenchmarkSave():
-    def __init__(
-            self,
-            problem: str,
-            sat: bool,
-            model
-    ):
-        self.problem = problem
-        self.sat = sat
-        self.model = model
-
 def run_single_bin_benchmark(
             models: list[AbstractSingleBinModel], 
             problems: list[SingleBinProblem], 
             max_time_seconds=20,
             reverse: bool = False,
-            pickle_export: bool = False,
+            solution_export: bool = False,    # values of the solution as .npz (see src/utils/solution_export.py)
             figure_export: bool = False,
+            config: Configuration = None,
         ):
 
-    config = Configuration()
+    if config is None:
+        config = Configuration()
 
     if reverse:
         problems.reverse()
@@ -57,31 +50,63 @@ def run_single_bin_benchmark(
             if not os.path.exists(file_directory):
                 os.makedirs(file_directory)
 
-            if pickle_export:
-                bench_save = BenchmarkSave(str(problem.json_dict), sat, initialised_model)
-                file_name = os.path.join(file_directory, problem.name + ".pickle")
-
-                with open(file_name, 'wb') as handle:
-                    pickle.dump(bench_save, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            if solution_export and sat:
+                save_arrays(os.path.join(file_directory, problem.name + ".npz"), packing_arrays(initialised_model.single_bin_packing))
 
             if sat:
                 stats = initialised_model.get_stats()
                 stats.total_time = end-start
+                stats = original_stats(problem, stats)
                 print("STATS", stats)
 
                 file_name = os.path.join(file_directory, problem.name + ".json")
-                with open(file_name, 'w') as handle:
-                    handle.write(json.dumps(stats, indent=4))
+                write_json(file_name, stats, indent=4)
 
-                initialised_model.visualise()
-                if figure_export:
-                    plt.savefig(os.path.join(file_directory, problem.name + '.png'))
-                    plt.show()
+                if config.visualise or figure_export:
+                    import matplotlib.pyplot as plt
+                    initialised_model.visualise()
+                    if figure_export:
+                        plt.savefig(os.path.join(file_directory, problem.name + '.png'))
+                        plt.show()
       
 
-def run_single_bin_benchmark_repeated(models: list[AbstractSingleBinModel], problems: list[SingleBinProblem], start_index=0, max_time_seconds=20, nr_repeats=1):
+def run_single_bin_portfolio_benchmark(
+            models: list[AbstractSingleBinModel], 
+            problems: list[SingleBinProblem], 
+            max_time_seconds=20,
+            config: Configuration = None,
+        ):
 
-    config = Configuration()
+    if config is None:
+        config = Configuration()
+
+    for problem in problems:
+        print("PROBLEM", problem.name)
+        print(problem.json_dict)
+
+        start = timer()
+        best, results = solve_portfolio(models, problem, config=config, max_time_in_seconds=max_time_seconds)
+        end = timer()
+
+        print("WINNER", None if best is None else best.model)
+        print("TIME", end-start)
+
+        file_directory = os.path.join(os.getcwd(), "results", "Portfolio")
+        if not os.path.exists(file_directory):
+            os.makedirs(file_directory)
+
+        if best is not None:
+            stats = dict(best.stats, total_time=end-start, model=best.model)
+            print("STATS", stats)
+
+            file_name = os.path.join(file_directory, problem.name + ".json")
+            write_json(file_name, stats, indent=4)
+
+
+def run_single_bin_benchmark_repeated(models: list[AbstractSingleBinModel], problems: list[SingleBinProblem], start_index=0, max_time_seconds=20, nr_repeats=1, config: Configuration = None):
+
+    if config is None:
+        config = Configuration()
 
     for problem in problems:
 
@@ -96,9 +121,7 @@ def run_single_bin_benchmark_repeated(models: list[AbstractSingleBinModel], prob
                 sat = initialised_model.solve(config=config, max_time_in_seconds=max_time_seconds)#60*4)
                 end = timer()
 
-                bench_save = BenchmarkSave(str(problem.json_dict), sat, initialised_model)
                 file_directory = os.path.join(os.getcwd(), "results", model.get_name())
-                file_name = os.path.join(file_directory, problem.name + "_" + str(i_repeat) + ".pickle")
 
                 if not os.path.exists(file_directory):
                     os.makedirs(file_directory)
@@ -111,18 +134,20 @@ def run_single_bin_benchmark_repeated(models: list[AbstractSingleBinModel], prob
                     initialised_model.fix()
                     stats = initialised_model.get_stats()
                     stats.total_time = end-start
+                    stats = original_stats(problem, stats)
 
                     print("STATS", stats)
 
                     file_name = os.path.join(file_directory, problem.name + "_" + str(i_repeat) + ".json")
-                    with open(file_name, 'w') as handle:
-                        handle.write(json.dumps(stats.to_dict(), indent=4))
+                    write_json(file_name, stats, indent=4)
 
-                    initialised_model.visualise()
-                    plt.savefig(os.path.join(file_directory, problem.name + "_" + str(i_repeat) + '.png'))
-                    plt.show()
+                    if config.visualise:
+                        import matplotlib.pyplot as plt
+                        initialised_model.visualise()
+                        plt.savefig(os.path.join(file_directory, problem.name + "_" + str(i_repeat) + '.png'))
+                        plt.show()
 
-def single_bin_benchmark_model_info(models: list[AbstractSingleBinModel], problems: list[SingleBinProblem], start_index=0, max_time_seconds=20, nr_repeats=1):
+def single_bin_benchmark_model_info(models: list[AbstractSingleBinModel], problems: list[SingleBinProblem], start_index=0, max_time_seconds=20, nr_repeats=1, estimate=False):
 
     model_complexity = []
 
@@ -131,6 +156,14 @@ def single_bin_benchmark_model_info(models: list[AbstractSingleBinModel], proble
         print(problem.json_dict)
 
         for model in models:
+
+            # Analytical size, without creating the model
+            if estimate:
+                size = model.estimate_size(problem)
+                print(str(size.nr_constraints) + "->" + str(size.nr_flat_constraints))
+                model_complexity.append({"constraints": size.nr_flat_constraints, "variables": size.nr_variables})
+                continue
+
             for i_repeat in range(nr_repeats):
 
                 nr_constraints = {}
@@ -169,11 +202,13 @@ def run_multi_bin_benchmark(
             problems: list[MultiBinProblem], 
             args: dict,
             reverse: bool = False,
-            pickle_export: bool = False,
+            solution_export: bool = False,    # values of the solution as .npz (see src/utils/solution_export.py)
             figure_export: bool = False,
+            config: Configuration = None,
         ):
     
-    config = Configuration()
+    if config is None:
+        config = Configuration()
 
     if reverse:
         problems.reverse()
@@ -200,25 +235,22 @@ def run_multi_bin_benchmark(
             if not os.path.exists(file_directory):
                 os.makedirs(file_directory)
 
-            if pickle_export:
-                bench_save = BenchmarkSave(str(problem.json_dict), sat, initialised_model)
-                file_name = os.path.join(file_directory, problem.name + ".pickle")
-
-                with open(file_name, 'wb') as handle:
-                    pickle.dump(bench_save, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            if solution_export and sat:
+                save_arrays(os.path.join(file_directory, problem.name + ".npz"), production_arrays(initialised_model.get_production_model()))
 
             if sat:
-                stats = initialised_model.get_stats()
+                stats = original_stats(problem, initialised_model.get_stats())
                 stats["total_time"] = end-start
 
                 print("STATS", stats)
 
                 file_name = os.path.join(file_directory, problem.name + ".json")
-                with open(file_name, 'w') as handle:
-                    handle.write(json.dumps(stats, indent=4))
+                write_json(file_name, stats, indent=4)
 
 
-                initialised_model.visualise()
-                if figure_export:
-                    plt.savefig(os.path.join(file_directory, problem.name + '.png'))
-                    plt.show()
\ No newline at end of file
+                if config.visualise or figure_export:
+                    import matplotlib.pyplot as plt
+                    initialised_model.visualise()
+                    if figure_export:
+                        plt.savefig(os.path.join(file_directory, problem.name + '.png'))
+                        plt.show()
\ No newline at end of file
@@ -6,6 +6,7 @@ from src.data_structures.item import Item
 from src.data_structures.bin_config import BinConfig
 from src.utils.fixable_object import FixableObject
 import src.utils.fixable_type as ft
+from src.utils.tracer import span
 
 
 
@@ -31,11 +32,12 @@ class AbstractItemPacking(FixableObject):
     def __post_init__(self):
 
         # Initialise decision variables
-        self.fixable_pos_xs_arr = ft.FixableIntArray(fixable_parent=self, free_value=self._pos_xs_var())   
-        self.fixable_pos_ys_arr = ft.FixableIntArray(fixable_parent=self, free_value=self._pos_ys_var())
-        self.fixable_count = ft.FixableInt(fixable_parent=self, free_value=self._count_var())
-        self.fixable_selected = ft.FixableBool(fixable_parent=self)
-        self.fixable_active = ft.FixableBoolArray(fixable_parent=self, free_value=self._active_var())
+        with span("item_packing_variables", item=self.item.ID, rotation=self.rotation):
+            self.fixable_pos_xs_arr = ft.FixableIntArray(fixable_parent=self, free_value=self._pos_xs_var())   
+            self.fixable_pos_ys_arr = ft.FixableIntArray(fixable_parent=self, free_value=self._pos_ys_var())
+            self.fixable_count = ft.FixableInt(fixable_parent=self, free_value=self._count_var())
+            self.fixable_selected = ft.FixableBool(fixable_parent=self)
+            self.fixable_active = ft.FixableBoolArray(fixable_parent=self, free_value=self._active_var())
 
     def get_variables(self):
         return list(self.pos_xs) + list(self.pos_ys) + [self.count] + [self.selected] + list(self.active)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import copy
+
+import numpy as np
+import numpy.typing as npt
+
+from .problem import Problem
+
+
+class ItemMerging():
+
+    '''
+    Groups of geometrically identical items of a problem: the same sides (in either orientation) and, with colours, the same colour.
+    The items of a group are interchangeable, so they are packed as one item with their summed demand,
+    and the counts of the merged items are split over the original items afterwards.
+    '''
+
+    def __init__(self, problem: Problem):
+        self.nr_items = problem.nr_items
+        self.deadline_counts = np.asarray(problem.deadline_counts) if hasattr(problem, "deadline_counts") else None  # original demands
+        self.groups: list[list[int]] = []   # original items (indices) of every merged item, the first is its representative
+
+        merged = {}
+        for i in range(problem.nr_items):
+            (width, height) = (int(problem.widths[i]), int(problem.heights[i]))
+            color = int(problem.colors[i]) if hasattr(problem, "colors") else None
+            key = (min(width, height), max(width, height), color)
+            if key not in merged:
+                merged[key] = len(self.groups)
+                self.groups.append([])
+            self.groups[merged[key]].append(i)
+
+    @property
+    def nr_merged_items(self) -> int:
+        return len(self.groups)
+
+    @property
+    def representatives(self) -> list[int]:
+        return [group[0] for group in self.groups]
+
+    # Merged item of every original item
+    @property
+    def merged_indices(self) -> npt.NDArray[np.int_]:
+        indices = np.zeros(self.nr_items, dtype=np.int64)
+        for (i_merged, group) in enumerate(self.groups):
+            indices[group] = i_merged
+        return indices
+
+    '''
+    Counts of the original items [original item x ...] summed per merged item [merged item x ...], e.g. the demands
+    '''
+    def merge_counts(self, counts: npt.NDArray) -> npt.NDArray:
+        counts = np.asarray(counts)
+        return np.array([np.sum(counts[group], axis=0) for group in self.groups])
+
+    '''
+    Counts of the merged items [merged item x ...] split over the original items [original item x ...], e.g. the production per deadline.
+    The count of a merged item goes to its original items in order, each up to its demand (same shape as the split counts),
+    the rest to the first. Without demands, all goes to the first.
+    '''
+    def split_counts(self, counts: npt.NDArray, demands: npt.NDArray = None) -> npt.NDArray:
+        counts = np.asarray(counts)
+        split = np.zeros((self.nr_items,) + counts.shape[1:], dtype=counts.dtype)
+        if demands is None:
+            demands = split
+        demands = np.asarray(demands)
+
+        for (count, group) in zip(counts, self.groups):
+            remaining = count
+            for i in group:
+                split[i] = np.minimum(remaining, demands[i])
+                remaining = remaining - split[i]
+            split[group[0]] += remaining
+
+        return split
+
+    '''
+    Statistics of a solve of the merged problem with the counts per original item (see split_counts): the counts of a single bin,
+    or the production per deadline of a multi bin planning, split by the original demands with its under- and overproduction recomputed.
+    The item counts of the bin packings (bins) stay per merged item, the packings are shared by the items of a group.
+    '''
+    def split_stats(self, stats: dict) -> dict:
+        if hasattr(stats, "to_dict"):
+            stats = stats.to_dict()
+
+        # Statistics per iteration (LNS, iterative)
+        if "fulfilled" not in stats:
+            return {i_iteration: self.split_stats(iteration_stats) for (i_iteration, iteration_stats) in stats.items()}
+
+        stats = dict(stats)
+        if self.deadline_counts is None:
+            for name in ["counts", "fulfilled"]:
+                if stats.get(name) is not None:
+                    stats[name] = self.split_counts(stats[name]).tolist()
+            return stats
+
+        required = self.deadline_counts
+        fulfilled = self.split_counts(stats["fulfilled"], required)
+        stats["required"] = required.tolist()
+        stats["fulfilled"] = fulfilled.tolist()
+        stats["underproduction"] = np.maximum(np.cumsum(required, axis=1) - np.cumsum(fulfilled, axis=1), 0).tolist()
+        stats["overproduction"] = np.maximum(np.cumsum(fulfilled, axis=1) - np.cumsum(required, axis=1), 0).tolist()
+        return stats
+
+
+'''
+Problem with its geometrically identical items merged (see ItemMerging), every model of it has one item packing per group.
+The item IDs of the merged problem are the group indices, problem.item_merging maps them back to the original items.
+'''
+def merge_items(problem: Problem) -> Problem:
+    item_merging = ItemMerging(problem)
+    representatives = item_merging.representatives
+
+    merged = copy.copy(problem)
+    merged.widths = np.asarray(problem.widths)[representatives]
+    merged.heights = np.asarray(problem.heights)[representatives]
+    if hasattr(problem, "colors"):
+        merged.colors = np.asarray(problem.colors)[representatives]
+    if hasattr(problem, "deadline_counts"):
+        merged.deadline_counts = item_merging.merge_counts(problem.deadline_counts)
+    merged.item_merging = item_merging
+
+    # Source of the merged problem (benchmark problems)
+    if hasattr(problem, "json_dict"):
+        merged.json_dict = dict(problem.json_dict)
+        for name in ["widths", "heights", "colors", "deadline_counts"]:
+            if name in merged.json_dict:
+                merged.json_dict[name] = np.asarray(getattr(merged, name)).tolist()
+
+    return merged
+
+'''
+Statistics of a solve of a problem as a dict, per original item if the problem has merged items (see ItemMerging.split_stats).
+Applied wherever statistics leave the solver (runners, caches, isolated and portfolio solves), the packings stay per merged item.
+'''
+def original_stats(problem: Problem, stats) -> dict:
+    if stats is None:
+        return None
+    if hasattr(problem, "item_merging"):
+        return problem.item_merging.split_stats(stats)
+    return stats.to_dict() if hasattr(stats, "to_dict") else stats
@@ -54,6 +54,7 @@ class Problem(metaclass=ABCMeta):
                 ) for i in self.get_items()
         ]
     
+    # A square item is the same rotated, it has no rotated item packing
     def get_item_packing_rotated(self, ItemPacking):
         return [
             ItemPacking(
@@ -61,7 +62,7 @@ class Problem(metaclass=ABCMeta):
                     max_count = math.floor((self.machine_width*self.machine_max_length)/i.area),
                     bin_config = self.get_bin_config(),
                     rotation = True
-                ) for i in self.get_items()
+                ) for i in self.get_items() if i.width != i.height
         ]
     
     @abstractmethod
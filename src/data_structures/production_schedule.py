@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from dataclass_wizard import JSONWizard
 
+import numpy as np
 import numpy.typing as npt
 
 from src.data_structures.deadline_counts import DeadlineCounts
@@ -30,6 +31,10 @@ class ProductionSchedule(JSONWizard):
     def get_requirements_untill(self, deadline):
         return self.requirements.get_counts_untill(deadline)
 
+    # Total demand per item ID, over all deadlines
+    def get_total_requirements(self) -> dict[int, int]:
+        return {item.ID: int(total) for (item, total) in zip(self.items, np.sum(self.get_requirements(), axis=1))}
+
     def get_fullfilments(self):
         return self.fullfilments.counts
 
@@ -35,25 +35,25 @@ def within_color_section_guillotine(bin_model: GuillotineSBM, section: CreelSect
     pattern_height = 0
     for p in range(bin_model.P): # go over patterns
         strip_width = 0
-        for a in range(bin_model.A): # go over strips
+        for a in bin_model.index.strips(p): # go over strips
 
             
-            for i in range(bin_model.I): # go over items
+            for i in bin_model.index.strip_items(p,a): # go over items
                 for color in bin_model.items[i].item.color.basic_colors:
                     if a == 0:
                         cc.append(
-                            cpm_any(bin_model.sigma[p,a,:,i]).implies(
+                            cpm_any(bin_model.strip_item_sigma(p,a,i)).implies(
                                 section.color_sections[section.colors.index(color)].is_here_2_fixed(strip_width, strip_width+bin_model.items[i].width)
                             )
                         )
                     else:
                         cc.append(
-                            cpm_any(bin_model.sigma[p,a,:,i]).implies(
+                            cpm_any(bin_model.strip_item_sigma(p,a,i)).implies(
                                 section.color_sections[section.colors.index(color)].is_here_2(strip_width, strip_width+bin_model.items[i].width)
                             )
                         )
 
-            strip_width += sum(bin_model.gamma[p,a,:]*bin_model.widths) 
+            strip_width += bin_model.strip_width(p,a)
 
         pattern_height += bin_model.pattern_length[p]
 
@@ -1,6 +1,11 @@
 
+import math
+
 from cpmpy.expressions.globalconstraints import Cumulative
 
+from src.data_structures.textile_item import TextileItem
+from src.models.abstract_model import ModelSize
+
 from ..data_structures.creel_section import CreelSection
 from ..data_structures.creel_config import CreelConfig
 from .creel_color_section_model import CreelColorSectionModel
@@ -9,6 +14,14 @@ from .creel_color_section_model import CreelColorSectionModel
 def flatten(l):
     return [item for sublist in l for item in sublist]
 
+# Minimal width of each basic colour section, based on all textile items with that colour
+def color_min_widths(items: list[TextileItem]) -> list[int]:
+    min_widths = {}
+    for item in items:
+        for basic_color in item.color.basic_colors:
+            min_widths[basic_color] = min(min_widths.get(basic_color, math.inf), item.width, item.height)
+    return list(min_widths.values())
+
 class CreelSectionModel:
 
     def __init__(self,
@@ -18,6 +31,22 @@ class CreelSectionModel:
         self.creel_section = creel_section
         self.creel_config = creel_config
 
+    '''
+    Size of a creel section from the minimal width of each colour section, without creating any variable.
+    Only the top-level constraints are counted, the flattening of the cumulative constraint is not estimated.
+    '''
+    @staticmethod
+    def estimate_size(min_widths: list[int], creel_config: CreelConfig) -> ModelSize:
+        # Cumulative over all colour sections
+        size = ModelSize(nr_constraints=1, nr_flat_constraints=None)
+
+        for min_width in min_widths:
+            max_repeats = math.floor((creel_config.total_width + 1) / (min_width + 1))
+            # count, starts and widths of the intervals, total width and order of the intervals
+            size += ModelSize(nr_variables=1 + 2*max_repeats, nr_constraints=1 + max(max_repeats-1, 0), nr_flat_constraints=None)
+
+        return size
+
     def get_constraints(self):
         c = []
 
@@ -7,12 +7,16 @@ from cpmpy.expressions.python_builtins import any as cpm_any
 from cpmpy.expressions.python_builtins import sum as cpm_sum
 
 from ...data_structures.creel_packing import CreelPacking
+from ...data_structures.creel_config import CreelConfig
 from ...models.creel_packing_model import CreelPackingModel
+from ...models.creel_section_model import CreelSectionModel, color_min_widths
 
 from src.data_structures.textile_item import TextileItem
 from src.data_structures.abstract_item_packing import AbstractItemPacking
 from src.extensions.due_dates.data_structures.bin_production import BinProduction
 from src.data_structures.machine_config import MachineConfig
+from src.data_structures.problem.colored_multi_bin_problem import ColoredMultiBinProblem
+from src.models.abstract_model import ModelSize
 from src.models.single_bin_creel.abstract_single_bin_creel_model import AbstractSBMCreel
 
 
@@ -50,6 +54,24 @@ class CreelModel:
 
         self.colors = colors
 
+    '''
+    Size of the creel model for a number of fixed and free bins (variables and top-level constraints only).
+    '''
+    @staticmethod
+    def estimate_size(problem: ColoredMultiBinProblem, nr_fixed_packings=0, nr_free_packings=1) -> ModelSize:
+        nr_sections = problem.max_creel_number
+        nr_bins = (nr_fixed_packings + nr_free_packings)*len(problem.get_deadlines())
+        creel_config = CreelConfig(total_width=problem.machine_width, max_colors=problem.max_creel_colors)
+
+        # Count, starts and ends of the creel sections, ends after starts and consecutive sections
+        size = ModelSize(nr_variables=1 + 2*nr_sections, nr_constraints=nr_sections + max(nr_sections-1, 0), nr_flat_constraints=None)
+        size += CreelSectionModel.estimate_size(color_min_widths(problem.get_items()), creel_config)*nr_sections
+
+        # Each bin is compatible with each section and lies within one, at least one section is used
+        size += ModelSize(nr_constraints=nr_bins*(nr_sections + 1) + 1, nr_flat_constraints=None)
+
+        return size
+
     def get_constraints(self):
         c = []
 
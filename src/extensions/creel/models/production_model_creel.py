@@ -3,8 +3,11 @@ from src.models.multi_bin.lns.model import ProductionModelLNS
 from src.data_structures.machine_config import MachineConfig
 from src.data_structures.production_schedule import ProductionSchedule
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
-from src.models.abstract_model import AbstractSingleBinModel
+from src.models.abstract_model import AbstractSingleBinModel, ModelSize
+from src.data_structures.problem.colored_multi_bin_problem import ColoredMultiBinProblem
 from src.data_structures.abstract_item_packing import AbstractItemPacking
+from src.extensions.due_dates.data_structures.bin_production import BinProduction
+from src.utils.native_solver import NativeSolver
 
 from .multi_bin.model import CreelModel
 
@@ -19,8 +22,11 @@ class ProductionModelCreel(ProductionModelLNS):
                     free_single_bins: list[AbstractSingleBinPacking],
                     items: list[AbstractItemPacking],
                     single_bin_model: AbstractSingleBinModel,
+                    bin_production: BinProduction = None,
+                    free_single_bin_models: list[AbstractSingleBinModel] = None,
+                    free_single_bins_solver: NativeSolver = None,
                 ):
-        super().__init__(machine_config, production_schedule, fixed_single_bins, free_single_bins, items, single_bin_model)
+        super().__init__(machine_config, production_schedule, fixed_single_bins, free_single_bins, items, single_bin_model, bin_production, free_single_bin_models, free_single_bins_solver)
 
         self.creel_model = CreelModel(
             max_creel_number = self.machine_config.max_creel_number,
@@ -33,6 +39,15 @@ class ProductionModelCreel(ProductionModelLNS):
             machine_config = self.machine_config
         )
 
+    # Size of the production model and its creel model (the latter without flattening)
+    @classmethod
+    def estimate_size(cls, problem: ColoredMultiBinProblem, single_bin_model: AbstractSingleBinModel, nr_fixed_packings=0, nr_free_packings=1) -> ModelSize:
+        return super().estimate_size(problem, single_bin_model, nr_fixed_packings, nr_free_packings) + CreelModel.estimate_size(problem, nr_fixed_packings, nr_free_packings)
+
     def get_constraints(self):
         self.constraints.extend(self.creel_model.get_constraints())
-        return super().get_constraints()
\ No newline at end of file
+        return super().get_constraints()
+
+    def native_constraints(self, s:NativeSolver):
+        self.constraints.extend(self.creel_model.get_constraints())
+        super().native_constraints(s)
@@ -4,11 +4,13 @@ import numpy as np
 
 from src.data_structures.textile_item import TextileItem
 from src.data_structures.machine_config import MachineConfig
+from src.data_structures.problem.colored_single_bin_problem import ColoredSingleBinProblem
+from src.models.abstract_model import ModelSize
 from src.models.single_bin_creel.abstract_single_bin_creel_model import AbstractSBMCreel
 
 from ...data_structures.creel_section import CreelSection
 from ...data_structures.creel_config import CreelConfig
-from ..creel_section_model import CreelSectionModel
+from ..creel_section_model import CreelSectionModel, color_min_widths
 
 
 class CreelModel:
@@ -36,6 +38,16 @@ class CreelModel:
 
         self.colors = colors    
 
+    '''
+    Size of the creel model of a single bin (variables and top-level constraints only).
+    '''
+    @staticmethod
+    def estimate_size(problem: ColoredSingleBinProblem) -> ModelSize:
+        creel_config = CreelConfig(total_width=problem.machine_width, max_colors=problem.max_creel_colors)
+
+        # The single creel section and the bin within it
+        return CreelSectionModel.estimate_size(color_min_widths(problem.get_items()), creel_config) + ModelSize(nr_constraints=1, nr_flat_constraints=None)
+
     def get_constraints(self):
         c = []
 
@@ -1,7 +1,10 @@
 
 from dataclasses import dataclass
 
+import math
+
 from cpmpy.expressions.variables import intvar, boolvar, NDVarArray, cpm_array, _IntVarImpl, _genname
+from cpmpy.expressions.utils import is_boolexpr, get_bounds
 
 import numpy as np
 import numpy.typing as npt
@@ -9,6 +12,7 @@ import numpy.typing as npt
 
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
 from src.data_structures.production_schedule import ProductionSchedule
+from src.utils.solution_hint import SolutionHint
 
 @dataclass(kw_only=True)
 class BinProduction:
@@ -97,6 +101,66 @@ class BinProduction:
     def get_variables(self):
         return self.bin_repeats + self.bin_active + self.bin_order + self.bin_delays_before  + self.bin_delays_after
 
+    # Decision variables [bin_solution x deadline] per type
+    def get_variable_arrays(self):
+        return [self.bin_repeats, self.bin_active, self.bin_order, self.bin_delays_before, self.bin_delays_after, self.bin_starts, self.bin_ends]
+
+    '''
+    Hint the decision variables with the values of the last solve, before the first fixable packing was added as fixed packing.
+    The added packing takes over the values of the fixable packing, which are themselves not hinted.
+    '''
+    def hint_added_packing(self, solution_hint: SolutionHint, values: list[npt.NDArray]):
+        i_packing = self.nr_fixed_packings - 1
+        for (array, value) in zip(self.get_variable_arrays(), values):
+            solution_hint.add(array[:i_packing+1], value[:i_packing+1])
+
+    '''
+    Add a fixed bin packing, the decision variables of the other packings are kept
+    '''
+    def add_fixed_packing(self, bin_packing: AbstractSingleBinPacking):
+        i_packing = self.nr_fixed_packings
+
+        self.fixed_bin_packings = self.fixed_bin_packings + [bin_packing]
+        self.bin_packings = self.fixed_bin_packings + self.fixable_bin_packings
+
+        self._item_counts = cpm_array([bin_packing.counts for bin_packing in self.bin_packings])
+
+        # New row of decision variables for the added packing
+        def insert_row(array, row):
+            return cpm_array(np.concatenate([array[:i_packing], row, array[i_packing:]]))
+
+        self.bin_repeats = insert_row(self.bin_repeats, cpm_array([[intvar(0, deadline_between) for deadline_between in self.deadline_betweens]]))
+        self.bin_active = insert_row(self.bin_active, boolvar(shape=(1, self.nr_deadlines)))
+
+        self.bin_delays_before = insert_row(self.bin_delays_before, intvar(0, self.deadlines[-1]-1, shape=(1, self.nr_deadlines)))
+        self.bin_delays_after = insert_row(self.bin_delays_after, intvar(0, self.deadlines[-1]-1, shape=(1, self.nr_deadlines)))
+
+        self.bin_starts = insert_row(self.bin_starts, intvar(0, self.deadlines[-1], shape=(1, self.nr_deadlines)))
+        self.bin_ends = insert_row(self.bin_ends, intvar(0, self.deadlines[-1], shape=(1, self.nr_deadlines)))
+
+        # The order domain depends on the number of packings
+        self.bin_order = self._bin_order_var()
+
+    '''
+    Copy with only fixed packings (e.g. the fixable packings replaced by their fixed copies), whose decision variables
+    hold the values of the last solve, which are kept when the decision variables of this bin production are solved again
+    '''
+    def fixed_copy(self, fixed_bin_packings: list[AbstractSingleBinPacking]):
+        return BinProduction(
+            deadline_betweens=self.deadline_betweens,
+            production_schedule=self.production_schedule,
+            fixed_bin_packings=fixed_bin_packings,
+            fixable_bin_packings=[],
+            _max_new_bin_repeat=self._max_new_bin_repeat,
+            bin_repeats=valued_copy(self.bin_repeats),
+            bin_active=valued_copy(self.bin_active),
+            bin_order=valued_copy(self.bin_order),
+            bin_delays_before=valued_copy(self.bin_delays_before),
+            bin_delays_after=valued_copy(self.bin_delays_after),
+            bin_starts=valued_copy(self.bin_starts),
+            bin_ends=valued_copy(self.bin_ends),
+        )
+
     # def fix(self): # TODO
     #     self.fixed = True
 
@@ -154,4 +218,22 @@ def intvarlu(lb:npt.NDArray[np.int_], ub:npt.NDArray[np.int_], shape=1, name=Non
     # create base data
     data = np.array([_IntVarImpl(lb[idxs],ub[idxs], name=_genname(name, idxs)) for idxs in np.ndindex(shape)]) # repeat new instances
     # insert into custom ndarray
-    return NDVarArray(shape, dtype=object, buffer=data)
\ No newline at end of file
+    return NDVarArray(shape, dtype=object, buffer=data)
+
+
+'''
+New decision variables (or one for an expression) holding the values of the last solve of the given ones
+'''
+def valued_copy(x):
+    if isinstance(x, np.ndarray):
+        return cpm_array(np.reshape([valued_copy(e) for e in x.flat], x.shape))
+
+    value = x.value()
+    if is_boolexpr(x):
+        var = boolvar()
+    elif value is None:
+        var = intvar(*get_bounds(x))
+    else:
+        var = intvar(math.floor(value), math.ceil(value))     # an objective can have a fractional value
+    var._value = value
+    return var
@@ -8,24 +8,31 @@ import numpy.typing as npt
 from timeit import default_timer as timer
 from typing import List, Optional
 
-from cpmpy import *
+from cpmpy import Model, AllDifferent
 from cpmpy.solvers import CPM_ortools 
 from cpmpy.expressions.python_builtins import all as cpm_all
 from cpmpy.expressions.python_builtins import sum as cpm_sum
 from cpmpy.expressions.python_builtins import any as cpm_any
+from cpmpy.expressions.python_builtins import max as cpm_max
 
 from src.extensions.due_dates.data_structures.bin_production import BinProduction
 
 from src.data_structures.machine_config import MachineConfig
 from src.data_structures.production_schedule import ProductionSchedule
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.problem.multi_bin_problem import MultiBinProblem
 
 
-from src.models.abstract_model import AbstractSingleBinModel, constraint, Alarm, TimeoutException, AbstractStats
+from src.models.abstract_model import AbstractSingleBinModel, constraint, native_constraint, transfer, AbstractStats, ModelSize
+from src.utils.deadline import TimeoutException, MemoryLimitException, deadline, check_deadline, checked, time_limit
+from src.utils.memory import measure_memory, tracing_memory, peak_rss
+from src.utils.tracer import span
 
 from src.data_structures.abstract_item_packing import AbstractItemPacking
 from src.extensions.due_dates import objectives
 from src.utils.configuration import Configuration
+from src.utils.native_solver import NativeSolver
+from src.utils.solution_hint import SolutionHint, FirstSolutionTimer
 
 #from iterative.creel.CreelModel import CreelModel
 
@@ -42,6 +49,9 @@ class ProductionModel():
                     free_single_bins: list[AbstractSingleBinPacking],
                     items: list[AbstractItemPacking],
                     single_bin_model: AbstractSingleBinModel,
+                    bin_production: BinProduction = None,
+                    free_single_bin_models: list[AbstractSingleBinModel] = None,
+                    free_single_bins_solver: NativeSolver = None,
                 ):
         
         # Set attributes
@@ -51,19 +61,22 @@ class ProductionModel():
         self.free_single_bins = free_single_bins
         self.items = items
         self.single_bin_model = single_bin_model
+        self.free_single_bins_solver = free_single_bins_solver  # solver which keeps the constraints of the new bins over multiple models
         
         # All bin packings
         self.single_bin_packings = self.fixed_single_bins + self.free_single_bins
 
-        # Bin production
-        self.bin_production = BinProduction(
+        # Bin production (can be kept from a previous model)
+        self.bin_production = bin_production
+        if self.bin_production is None: self.bin_production = BinProduction(
             production_schedule=self.production_schedule, 
             fixed_bin_packings=self.fixed_single_bins,
             fixable_bin_packings=self.free_single_bins
         )
 
-        # Bin packing model
-        self.free_single_bin_models = [
+        # Bin packing model (can be kept from a previous model)
+        self.free_single_bin_models = free_single_bin_models
+        if self.free_single_bin_models is None: self.free_single_bin_models = [
             self.single_bin_model(
                 machine_config=self.machine_config, 
                 single_bin_packing=free_single_bin,
@@ -81,9 +94,49 @@ class ProductionModel():
         M = self.machine_config.max_length*self.machine_config.width//100 # Fix for integer overflow or-tools
         self.weights = [1*M, 1*M, 4*M, 0, 1]
 
+        # Warm start of the solver
+        self.solution_hint = SolutionHint()
+
         # To collect data about the algorithm
         self.stats = stats()
 
+    '''
+    Size of the model for a number of fixed and free bins, from the number of deadlines and items, without creating any variable.
+    The free bins are packed by the single bin model (see its estimate_size), the fixed bins are assumed to be fixed.
+    '''
+    @classmethod
+    def estimate_size(cls, problem: MultiBinProblem, single_bin_model: AbstractSingleBinModel, nr_fixed_packings=0, nr_free_packings=1) -> ModelSize:
+        size = single_bin_model.estimate_size(problem)*nr_free_packings
+
+        # Repeats, active, order, delays before and after, starts and ends of each bin in each deadline
+        nr_deadlines = len(problem.get_deadlines())
+        size.nr_variables += 7*(nr_fixed_packings + nr_free_packings)*nr_deadlines
+
+        nr_square_items = sum(int(w) == int(h) for (w, h) in zip(problem.widths, problem.heights))
+        for group in cls.estimate_constraints(problem.nr_items, nr_deadlines, nr_fixed_packings, nr_free_packings, nr_square_items).values():
+            size += group
+        return size
+
+    # Size of each constraint group of the production schedule
+    @classmethod
+    def estimate_constraints(cls, nr_items, nr_deadlines, nr_fixed_packings, nr_free_packings, nr_square_items=0) -> dict[str, ModelSize]:
+        nr_packings = nr_fixed_packings + nr_free_packings
+        n = nr_packings*nr_deadlines # bins in all deadlines
+        nr_free_pairs = nr_free_packings*(nr_free_packings-1)//2
+        nr_free_successors = nr_free_packings-1 if nr_free_packings > 0 else 0
+
+        return {
+            "bin_active": ModelSize(nr_constraints=2, nr_flat_constraints=2*n),
+            "bin_order": ModelSize(nr_constraints=nr_deadlines + (nr_packings-1)*n, nr_flat_constraints=nr_deadlines + 2*(nr_packings-1)*n),
+            # the predecessor of a bin is a sum over all bins of the deadline
+            "bin_starts": ModelSize(nr_constraints=2*n, nr_flat_constraints=(3*nr_packings+4)*n),
+            "bin_ends": ModelSize(nr_constraints=nr_packings, nr_flat_constraints=n),
+            "deadline_capacity": ModelSize(nr_constraints=n, nr_flat_constraints=2*n),
+            # equality of the item counts of two bins, the count of a square item is a single variable (no rotated item packing)
+            "unique_new_bin": ModelSize(nr_constraints=nr_free_pairs, nr_flat_constraints=(2*nr_items-nr_square_items+4)*nr_free_pairs),
+            "symmetry_breaking": ModelSize(nr_constraints=nr_free_successors, nr_flat_constraints=6*nr_free_successors),
+        }
+
     @constraint
     def bin_active(self):
         c = []
@@ -110,7 +163,7 @@ class ProductionModel():
             c.append(AllDifferent(bin_order_per_deadline))
 
         # Active bins should come before inactive ones
-        for ((bp_a_1, bp_a_2),(bp_o_1, bp_o_2)) in zip(itertools.permutations(self.bin_production.bin_active, 2), itertools.permutations(self.bin_production.bin_order, 2)):
+        for ((bp_a_1, bp_a_2),(bp_o_1, bp_o_2)) in checked(zip(itertools.permutations(self.bin_production.bin_active, 2), itertools.permutations(self.bin_production.bin_order, 2)), every=100):
             c.extend((bp_a_1 & ~bp_a_2).implies(bp_o_1 < bp_o_2)) # TODO combinations
 
         return c
@@ -124,7 +177,7 @@ class ProductionModel():
         deadlines_shifted = np.insert(self.bin_production.deadlines,0,-1)
 
         for i_deadline in range(len(self.bin_production.deadlines)):
-            for i_bin in range(self.bin_production.nr_packings):
+            for i_bin in checked(range(self.bin_production.nr_packings)):
 
                 c.append(
                     (self.bin_production.bin_order[i_bin,i_deadline] == 0).implies(
@@ -189,9 +242,10 @@ class ProductionModel():
     def get_constraints(self):
         c = []
 
-        # Get constraints from the new bin packing model
-        for sbm in self.free_single_bin_models:
-            c.extend(sbm.get_constraints())
+        # Get constraints from the new bin packing model (unless kept in a solver)
+        if self.free_single_bins_solver is None:
+            for sbm in self.free_single_bin_models:
+                c.extend(sbm.get_cached_constraints())
 
         c_functions = [
             self.bin_active,
@@ -211,6 +265,109 @@ class ProductionModel():
     
         return c
 
+    # ---------------------------------------------------------------------------- #
+    #                              Native constraints                              #
+    # ---------------------------------------------------------------------------- #
+
+    @native_constraint
+    def native_bin_active(self, s:NativeSolver):
+        repeats = s.vars(self.bin_production.bin_repeats)
+        active = s.vars(self.bin_production.bin_active)
+
+        for (repeats_row, active_row) in zip(repeats, active):
+            for (r, a) in zip(repeats_row, active_row):
+                # If a bin is not active, it should not be repeated
+                s.model.Add(r == 0).OnlyEnforceIf(a.Not())
+                # If a bin is active, it should be repeated at least once
+                s.model.Add(r != 0).OnlyEnforceIf(a)
+
+    @native_constraint
+    def native_bin_order(self, s:NativeSolver):
+        active = s.vars(self.bin_production.bin_active)
+        order = s.vars(self.bin_production.bin_order)
+
+        # The order values must be unique per deadline
+        for order_per_deadline in zip(*order):
+            s.model.AddAllDifferent(order_per_deadline)
+
+        # Active bins should come before inactive ones
+        for ((a_1, a_2),(o_1, o_2)) in checked(zip(itertools.permutations(active, 2), itertools.permutations(order, 2)), every=100):
+            for (a_1_d, a_2_d, o_1_d, o_2_d) in zip(a_1, a_2, o_1, o_2):
+                s.model.Add(o_1_d < o_2_d).OnlyEnforceIf([a_1_d, a_2_d.Not()])
+
+    @native_constraint
+    def native_bin_starts(self, s:NativeSolver):
+        order = s.vars(self.bin_production.bin_order)
+        starts = s.vars(self.bin_production.bin_starts)
+        ends = s.vars(self.bin_production.bin_ends)
+        delays_before = s.vars(self.bin_production.bin_delays_before)
+        delays_after = s.vars(self.bin_production.bin_delays_after)
+
+        deadlines_shifted = np.insert(self.bin_production.deadlines,0,-1)
+
+        for i_deadline in range(len(self.bin_production.deadlines)):
+            for i_bin in checked(range(self.bin_production.nr_packings)):
+
+                # The first bin starts right after the previous deadline
+                first = s.reify(order[i_bin][i_deadline] == 0)
+                s.model.Add(
+                    starts[i_bin][i_deadline] == int(deadlines_shifted[i_deadline]) + delays_before[i_bin][i_deadline] + 1
+                ).OnlyEnforceIf(first)
+
+                # The other bins start right after their predecessor
+                for i_bin_other in range(self.bin_production.nr_packings):
+                    if i_bin_other == i_bin: continue
+                    previous = s.reify(order[i_bin_other][i_deadline] == order[i_bin][i_deadline] - 1)
+                    s.model.Add(
+                        starts[i_bin][i_deadline] == ends[i_bin_other][i_deadline] + delays_after[i_bin_other][i_deadline] + delays_before[i_bin][i_deadline] + 1
+                    ).OnlyEnforceIf(previous)
+
+    @native_constraint
+    def native_bin_ends(self, s:NativeSolver):
+        starts = s.vars(self.bin_production.bin_starts)
+        ends = s.vars(self.bin_production.bin_ends)
+        repeats = s.vars(self.bin_production.bin_repeats)
+
+        for (starts_row, ends_row, repeats_row) in zip(starts, ends, repeats):
+            for (start, end, repeat) in zip(starts_row, ends_row, repeats_row):
+                s.model.Add(end == start + repeat - 1)
+
+    @native_constraint
+    def native_deadline_capacity(self, s:NativeSolver):
+        ends = s.vars(self.bin_production.bin_ends)
+        delays_after = s.vars(self.bin_production.bin_delays_after)
+        active = s.vars(self.bin_production.bin_active)
+
+        # There can only be as many bins in each deadline as there is time
+        for i_deadline in range(len(self.bin_production.deadline_betweens)):
+            for i_bin in range(self.bin_production.nr_packings):
+                s.model.Add(
+                    ends[i_bin][i_deadline] + delays_after[i_bin][i_deadline] <= int(self.bin_production.deadlines[i_deadline])
+                ).OnlyEnforceIf(active[i_bin][i_deadline])
+
+    def native_constraints(self, s:NativeSolver):
+
+        # Post constraints of the new bin packing model (unless kept in a solver)
+        if self.free_single_bins_solver is None:
+            for sbm in self.free_single_bin_models:
+                sbm.native_constraints(s)
+
+        c_functions = [
+            self.native_bin_active,
+            self.native_bin_order,
+            self.native_bin_starts,
+            self.native_bin_ends,
+            self.native_deadline_capacity,
+        ]
+
+        for c_f in c_functions:
+            c_f(s)
+
+        # Constraints without native counterpart
+        s.add(self.unique_new_bin())
+        s.add(self.symmetry_breaking())
+        s.add(self.constraints)
+
     def get_objective(self, weights):
 
 
@@ -261,62 +418,131 @@ class ProductionModel():
     def solve(self, config:Configuration, max_time_in_seconds=1, preference=None, overproduction_objective=False, constraint_creation_timeout=60*3, constraint_transfer_timeout=60*2):
         
 
-        alarm = Alarm(config=config)
-        
         self.sat = False
+        self.config = config
+        self.stats.memory = {}
 
         try:
-            start_t_total = timer()
-            print("Collecting constraints ...")
+            # Budget of this solve, within the deadline (and memory budget) of the caller (if any)
+            with deadline(max_memory=config.max_memory_bytes) as budget, tracing_memory(config.trace_memory), span(type(self).__name__):
+                start_t_total = timer()
+                config.log("Collecting constraints ...")
+
+                with span("build"):
+                    if config.native:
+                        s = self.native_solver(constraint_creation_timeout, preference, overproduction_objective)
+                    else:
+                        s = self.cpmpy_solver(constraint_creation_timeout, constraint_transfer_timeout, preference, overproduction_objective)
+
+                self.solution_hint.apply(s)
+                first_solution = FirstSolutionTimer()
+                self.stats.nr_solver_variables = len(s.ort_model.Proto().variables)
+                self.stats.nr_solver_constraints = len(s.ort_model.Proto().constraints)
+
+                config.log("Solving...")
+                budget.check()
+                start_s = timer()
+                with budget.on_cancel(s.ort_solver.StopSearch), span("solve", max_time_in_seconds=max_time_in_seconds), measure_memory() as memory:
+                    res = s.solve(solution_callback=first_solution, max_time_in_seconds=time_limit(max_time_in_seconds), **config.solver_parameters())
+                end_s = timer()
+                self.stats.solve_time = end_s - start_s
+                self.stats.first_solution_time = first_solution.first_solution_time
+                self.stats.status = s.status().exitstatus.name
+                self.stats.memory["solve"] = memory.to_dict()
+
+                end_t_total = timer()
+                self.stats.total_time = end_t_total - start_t_total
+ 
+        except TimeoutException as e: 
+            config.log(e)
+            if isinstance(e, MemoryLimitException):
+                self.stats.status = "MEMORY_LIMIT"
+            return False
+        finally:
+            self.stats.peak_rss = peak_rss()
+        
+        # Fix the solution to bound variables
+        if res:
+            with span("fix"):
+                [fsb.fix() for fsb in self.free_single_bins]
+
+        return res
 
-            alarm.start(constraint_creation_timeout) 
+    # Build the CPMpy model and transfer it to OR-Tools
+    def cpmpy_solver(self, constraint_creation_timeout, constraint_transfer_timeout, preference, overproduction_objective):
+
+        with deadline(constraint_creation_timeout), span("constraints"), measure_memory() as memory:
             self.c = self.get_constraints()
             self.stats.nr_constraints = len(self.c)
-            print("nr_constraints", len(self.c))
-            alarm.cancel()
+            self.config.log("nr_constraints", len(self.c))
+            check_deadline()
+        self.stats.memory["constraints"] = memory.to_dict()
 
+        with span("objective"):
             weights = self.determine_weights(preference, overproduction_objective)
             self.o = self.get_objective(weights)
             self.objective += self.o
 
-            self.model += self.constraints
-            self.model.minimize(self.objective)
-
-            print("Transferring...")
-
-            start_t = timer()
-            alarm.start(constraint_transfer_timeout) 
-            s = CPM_ortools(self.model)
-            alarm.cancel()
-            end_t = timer()
-            self.stats.transfer_time = end_t - start_t
-
-            print("Solving...")
-            start_s = timer()
-            res = s.solve( max_time_in_seconds=max_time_in_seconds)
-            end_s = timer()
-            self.stats.solve_time = end_s - start_s
-
-            end_t_total = timer()
-            self.stats.total_time = end_t_total - start_t_total
- 
-        except TimeoutException as e: 
-            print(e)
-            return False
-        
-        # Fix the solution to bound variables
-        if res:
-            [fsb.fix() for fsb in self.free_single_bins]
+        self.model += self.constraints
+        self.model.minimize(self.objective)
+
+        self.config.log("Transferring...")
+
+        start_t = timer()
+        with deadline(constraint_transfer_timeout), span("transfer"), measure_memory() as memory:
+            if self.free_single_bins_solver is None:
+                s = CPM_ortools()
+                transfer(s, self.model.constraints)
+            else:
+                s = self.get_free_single_bins_solver(native=False).solver
+                transfer(s, self.constraints)
+            s.minimize(self.objective)
+        end_t = timer()
+        self.stats.transfer_time = end_t - start_t
+        self.stats.memory["transfer"] = memory.to_dict()
+
+        return s
+
+    # Post the model directly in OR-Tools, only the objective passes through CPMpy
+    def native_solver(self, constraint_creation_timeout, preference, overproduction_objective):
+
+        with deadline(constraint_creation_timeout), span("constraints", native=True), measure_memory() as memory:
+            s = NativeSolver() if self.free_single_bins_solver is None else self.get_free_single_bins_solver(native=True)
+            self.native_constraints(s)
+            self.stats.nr_constraints = s.nr_constraints
+            self.config.log("nr_constraints", s.nr_constraints)
+            check_deadline()
+        self.stats.memory["constraints"] = memory.to_dict()
+
+        start_t = timer()
+        with span("objective"):
+            weights = self.determine_weights(preference, overproduction_objective)
+            self.o = self.get_objective(weights)
+            self.objective += self.o
+            s.minimize(self.objective)
+        end_t = timer()
+        self.stats.transfer_time = end_t - start_t
 
-        return res
+        return s
         
     
+    # Copy of the kept solver with the constraints of the new bins, which are only posted on first use
+    def get_free_single_bins_solver(self, native):
+        s = self.free_single_bins_solver
+        if s.nr_constraints == 0:
+            for sbm in self.free_single_bin_models:
+                if native:
+                    sbm.native_constraints(s)
+                else:
+                    s.add(sbm.get_cached_constraints())
+        return s.copy()
+    
     def get_stats(self):
         # TODO nieuwe statistieken voor multi bin packing algoritmen
         self.stats.objective = int(self.objective.value())
         self.stats.nr_variables = len(self.get_variables())
         self.stats.constraints = self.constraints_stats
-        self.stats.constraint_time = sum([a["creation_time"] for a in self.constraints_stats.values()])
+        self.stats.constraint_time = cpm_sum([a["creation_time"] for a in self.constraints_stats.values()])
         
         self.stats.nr_solutions = len(self.single_bin_packings)
         self.stats.deadlines = self.production_schedule.deadlines.astype(int).tolist()
@@ -330,15 +556,15 @@ class ProductionModel():
         a = np.array([fsb.counts for fsb in self.single_bin_packings])
         self.stats.bins = a.astype(int).tolist()
         self.stats.densities = [float(sol.density) for sol in self.single_bin_packings]
-        self.stats.total_density = float(sum([sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_packings)]) / sum(self.bin_production.bin_repeats.value()))
+        self.stats.total_density = float(cpm_sum([cpm_sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_packings)]) / cpm_sum(self.bin_production.bin_repeats.value()))
         self.stats.bin_lengths = [int(sbp.bin.length) for sbp in self.single_bin_packings]
         self.stats.required = self.production_schedule.requirements.counts.astype(int).tolist()
         self.stats.fulfilled = self.bin_production.item_counts.value().astype(int).tolist()
-        underproduction_filter = np.vectorize(lambda x: max((x,0)))
+        underproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         a =  np.cumsum(self.production_schedule.get_requirements(), axis=1) - np.cumsum(self.bin_production.item_counts, axis=1)
         a = underproduction_filter(a)
         self.stats.underproduction = np.array(a.value()).astype(int).tolist()
-        overproduction_filter = np.vectorize(lambda x: max((x,0)))
+        overproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         b = np.cumsum(self.bin_production.item_counts, axis=1) - np.cumsum(self.production_schedule.get_requirements(), axis=1)
         b = overproduction_filter(b)
         self.stats.overproduction = np.array(b.value()).astype(int).tolist()
@@ -370,7 +596,7 @@ class ProductionModel():
         print(a)
         print("Densities:", [sol.density for sol in self.single_bin_solutions])
         print(self.bin_production.bin_repeats.value())
-        print("Total density:", sum([sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_solutions)]) / sum(self.bin_production.bin_repeats.value()))
+        print("Total density:", cpm_sum([cpm_sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_solutions)]) / cpm_sum(self.bin_production.bin_repeats.value()))
         print("Deadlines:")
         print(self.production_schedule.deadlines)
         print("Deadline betweens")
@@ -380,12 +606,12 @@ class ProductionModel():
         print("Fulfilled:")
         print(self.bin_production.item_counts.value())
         print("Underproduction:")
-        underproduction_filter = np.vectorize(lambda x: max((x,0)))
+        underproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         a =  np.cumsum(self.production_schedule.get_requirements(), axis=1) - np.cumsum(self.bin_production.item_counts, axis=1)
         a = underproduction_filter(a)
         print(a.value())
         print("Overproduction:")
-        overproduction_filter = np.vectorize(lambda x: max((x,0)))
+        overproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         b = np.cumsum(self.bin_production.item_counts, axis=1) - np.cumsum(self.production_schedule.get_requirements(), axis=1)
         b = overproduction_filter(b)
         print(b.value())
@@ -5,11 +5,12 @@ import numpy as np
 import numpy.typing as npt
 import time
 
-from cpmpy import *
+from cpmpy import Model, AllDifferent
 from cpmpy.solvers import CPM_ortools 
 from cpmpy.expressions.python_builtins import all as cpm_all
 from cpmpy.expressions.python_builtins import sum as cpm_sum
 from cpmpy.expressions.python_builtins import any as cpm_any
+from cpmpy.expressions.python_builtins import max as cpm_max
 
 from src.extensions.due_dates.data_structures.bin_production import BinProduction
 
@@ -19,6 +20,7 @@ from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPac
 
 
 from src.models.abstract_model import AbstractSingleBinModel, constraint
+from src.utils.deadline import checked
 
 from src.data_structures.abstract_item_packing import AbstractItemPacking
 from src.extensions.due_dates import objectives
@@ -100,7 +102,7 @@ class ProductionModelVariableLength():
             c.append(AllDifferent(bin_order_per_deadline))
 
         # Active bins should come before inactive ones
-        for ((bp_a_1, bp_a_2),(bp_o_1, bp_o_2)) in zip(itertools.permutations(self.bin_production.bin_active, 2), itertools.permutations(self.bin_production.bin_order, 2)):
+        for ((bp_a_1, bp_a_2),(bp_o_1, bp_o_2)) in checked(zip(itertools.permutations(self.bin_production.bin_active, 2), itertools.permutations(self.bin_production.bin_order, 2)), every=100):
             c.extend((bp_a_1 & ~bp_a_2).implies(bp_o_1 < bp_o_2)) # TODO combinations
 
         return c
@@ -111,7 +113,7 @@ class ProductionModelVariableLength():
 
         # There can only be as many bins in each deadline as there is time
         for i_deadline in range(len(self.bin_production.deadline_betweens)):
-            c.append(sum(self.bin_production.bin_repeats[:,i_deadline]) <= self.bin_production.deadline_betweens[i_deadline])
+            c.append(cpm_sum(self.bin_production.bin_repeats[:,i_deadline]) <= self.bin_production.deadline_betweens[i_deadline])
 
         return c
 
@@ -250,15 +252,15 @@ class ProductionModelVariableLength():
         a = np.array([fsb.counts for fsb in self.free_single_bins])
         self.stats["bins"] = a.astype(int).tolist()
         self.stats["densities"] = [float(sol.density) for sol in self.single_bin_packings]
-        self.stats["total_density"] = float(sum([sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_packings)]) / sum(self.bin_production.bin_repeats.value()))
+        self.stats["total_density"] = float(cpm_sum([cpm_sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_packings)]) / cpm_sum(self.bin_production.bin_repeats.value()))
         self.stats["bin_lengths"] = [int(sbp.bin.length) for sbp in self.single_bin_packings]
         self.stats["required"] = self.production_schedule.requirements.counts.astype(int).tolist()
         self.stats["fulfilled"] = self.bin_production.item_counts.value().astype(int).tolist()
-        underproduction_filter = np.vectorize(lambda x: max((x,0)))
+        underproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         a =  np.cumsum(self.production_schedule.get_requirements(), axis=1) - np.cumsum(self.bin_production.item_counts, axis=1)
         a = underproduction_filter(a)
         self.stats["underproduction"] = np.array(a.value()).astype(int).tolist()
-        overproduction_filter = np.vectorize(lambda x: max((x,0)))
+        overproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         b = np.cumsum(self.bin_production.item_counts, axis=1) - np.cumsum(self.production_schedule.get_requirements(), axis=1)
         b = overproduction_filter(b)
         self.stats["overproduction"] = np.array(b.value()).astype(int).tolist()
@@ -310,7 +312,7 @@ class ProductionModelVariableLength():
         a = self.bin_production._item_counts
         print(a)
         print("Densities:", [sol.density for sol in self.single_bin_solutions])
-        print("Total density:", sum([sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_solutions)]) / sum(self.bin_production.bin_repeats.value()))
+        print("Total density:", cpm_sum([cpm_sum(repeats)*sol.density for (repeats,sol) in zip(self.bin_production.bin_repeats.value(), self.single_bin_solutions)]) / cpm_sum(self.bin_production.bin_repeats.value()))
         print("Deadlines:")
         print(self.production_schedule.deadlines)
         print("Deadline betweens")
@@ -320,12 +322,12 @@ class ProductionModelVariableLength():
         print("Fulfilled:")
         print(self.bin_production.item_counts.value())
         print("Underproduction:")
-        underproduction_filter = np.vectorize(lambda x: max((x,0)))
+        underproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         a =  np.cumsum(self.production_schedule.get_requirements(), axis=1) - np.cumsum(self.bin_production.item_counts, axis=1)
         a = underproduction_filter(a)
         print(a.value())
         print("Overproduction:")
-        overproduction_filter = np.vectorize(lambda x: max((x,0)))
+        overproduction_filter = np.vectorize(lambda x: cpm_max((x,0)))
         b = np.cumsum(self.bin_production.item_counts, axis=1) - np.cumsum(self.production_schedule.get_requirements(), axis=1)
         b = overproduction_filter(b)
         print(b.value())
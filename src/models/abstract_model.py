@@ -1,6 +1,6 @@
 from __future__ import annotations
 from abc import ABCMeta, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from dataclasses_json import dataclass_json
 
 from timeit import default_timer as timer
@@ -9,58 +9,63 @@ import numpy as np
 
 from cpmpy.solvers import CPM_ortools 
 from cpmpy import Model
+from cpmpy.transformations.get_variables import get_variables
 
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
 from src.data_structures.machine_config import MachineConfig
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
 from src.utils.configuration import Configuration
+from src.utils.native_solver import NativeSolver
+from src.utils.model_cache import ModelCache, model_key
+from src.utils.solution_hint import SolutionHint, FirstSolutionTimer
+from src.utils.deadline import TimeoutException, MemoryLimitException, deadline, check_deadline, time_limit
+from src.utils.memory import measure_memory, tracing_memory, peak_rss
+from src.utils.tracer import span
 
 
 # Constraint decorator (for collecting statistics)
 def constraint(func):
     def count_constraints(self):
 
+        check_deadline()
         start = timer()
-        c = func(self)
+        with span(func.__name__), measure_memory() as memory:
+            c = func(self)
         end = timer()
         self.constraints_stats[func.__name__] = { 
             "nr_constraint": len(c),
-            "creation_time": end-start
+            "creation_time": end-start,
+            **memory.to_dict(),
         }
         return c
     
     return count_constraints
 
-# Timeout system (for memory protection)
+# Native constraint decorator (for collecting statistics)
+def native_constraint(func):
+    def count_constraints(self, s:NativeSolver):
 
-def handler(signum, frame):
-    print("Forever is over!")
-    raise TimeoutException("end of time")
-
-class TimeoutException(Exception):
-    def __init__(self, msg=''):
-        self.msg = msg
+        check_deadline()
+        start = timer()
+        nr_constraints = s.nr_constraints
+        with span(func.__name__), measure_memory() as memory:
+            func(self, s)
+        end = timer()
+        self.constraints_stats[func.__name__] = { 
+            "nr_constraint": s.nr_constraints - nr_constraints,
+            "creation_time": end-start,
+            **memory.to_dict(),
+        }
+    
+    return count_constraints
 
-class Alarm():
-
-    def __init__(self, config:Configuration):
-        self.config = config
-        if config.linux:
-            import signal
-            self.signal = signal
-            self.signal.signal(signal.SIGALRM, handler)
-
-    def start(self, timeout):
-        if self.config.linux:
-            self.signal.alarm(timeout)
-        else:
-            print("Warning, timeout protection only supported on Linux!")
-
-    def cancel(self):
-        if self.config.linux:
-            self.signal.alarm(0)
-        else:
-            pass
+'''
+Transfer CPMpy constraints to a solver in chunks, checking the deadline in between
+'''
+def transfer(s, constraints, chunk_size=1000):
+    for i in range(0, len(constraints), chunk_size):
+        check_deadline()
+        s += constraints[i:i+chunk_size]
 
 class AbstractModel(metaclass=ABCMeta):
 
@@ -89,46 +94,151 @@ class AbstractModel(metaclass=ABCMeta):
     @abstractmethod
     def get_objective(self): pass 
 
+    '''
+    Estimate of the model size from the problem dimensions, without creating (and flattening) the constraints
+    '''
+    @classmethod
+    def estimate_size(cls, problem) -> ModelSize:
+        raise NotImplementedError(cls.__name__ + " has no size estimate")
+
+    '''
+    Post the constraints directly in a native CP-SAT model (by default the CPMpy constraints)
+    '''
+    def native_constraints(self, s:NativeSolver):
+        s.add(self.get_constraints())
+
     def solve(self, config:Configuration, max_time_in_seconds=1, constraint_creation_timeout=60*3, constraint_transfer_timeout=60*2):
 
-        alarm = Alarm(config=config)
-        
         self.sat = False
+        self.config = config
+        self.stats.memory = {}
 
         try:
-            print("Collecting constraints ...")
+            # Budget of this solve, within the deadline (and memory budget) of the caller (if any)
+            with deadline(max_memory=config.max_memory_bytes) as budget, tracing_memory(config.trace_memory), span(type(self).__name__):
+                with span("build"):
+                    # Built model of an earlier run (if cached)
+                    model_cache = None if config.model_cache is None else ModelCache(config.model_cache)
+                    key = None if model_cache is None else self.model_cache_key(config)
+                    s = None
+                    if key is not None and key in model_cache:
+                        s = self.cached_solver(model_cache, key)
+
+                    if s is None:
+                        if config.native:
+                            s = self.native_solver(constraint_creation_timeout)
+                        else:
+                            s = self.cpmpy_solver(constraint_creation_timeout, constraint_transfer_timeout)
+                        if key is not None:
+                            with span("model_cache"):
+                                model_cache.put(key, s, self.solver_variables(), info={"nr_constraints": self.stats.nr_constraints, "constraints": dict(self.constraints_stats)})
+
+                self.solution_hint.apply(s)
+                first_solution = FirstSolutionTimer()
+                self.stats.nr_solver_variables = len(s.ort_model.Proto().variables)
+                self.stats.nr_solver_constraints = len(s.ort_model.Proto().constraints)
+
+                config.log("Solving...")
+
+                budget.check()
+                start_s = timer()
+                with budget.on_cancel(s.ort_solver.StopSearch), span("solve", max_time_in_seconds=max_time_in_seconds), measure_memory() as memory:
+                    res = s.solve(solution_callback=first_solution, max_time_in_seconds=time_limit(max_time_in_seconds), **config.solver_parameters())
+                end_s = timer()
+                self.stats.solve_time = end_s - start_s
+                self.stats.first_solution_time = first_solution.first_solution_time
+                self.stats.status = s.status().exitstatus.name
+                self.stats.memory["solve"] = memory.to_dict()
+
+        except TimeoutException as e: 
+            if isinstance(e, MemoryLimitException):
+                config.log("Memory budget exceeded")
+                self.stats.status = "MEMORY_LIMIT"
+            return False
+        finally:
+            self.stats.peak_rss = peak_rss()
+
+        return res
+    
+    # Build the CPMpy model and transfer it to OR-Tools
+    def cpmpy_solver(self, constraint_creation_timeout, constraint_transfer_timeout):
+
+        self.config.log("Collecting constraints ...")
 
-            alarm.start(constraint_creation_timeout) 
+        with deadline(constraint_creation_timeout), span("constraints"), measure_memory() as memory:
             self.c = self.get_constraints()
             self.stats.nr_constraints = len(self.c)
-            alarm.cancel()
+            check_deadline()
+        self.stats.memory["constraints"] = memory.to_dict()
 
+        with span("objective"):
             self.o = self.get_objective()
             self.objective += self.o
 
-            self.model += self.constraints
-            self.model.minimize(self.objective)
+        self.model += self.constraints
+        self.model.minimize(self.objective)
 
-            print("Transferring...")
+        self.config.log("Transferring...")
 
-            start_t = timer()
-            alarm.start(constraint_transfer_timeout) 
-            s = CPM_ortools(self.model)
-            alarm.cancel()
-            end_t = timer()
-            self.stats.transfer_time = end_t - start_t
+        start_t = timer()
+        with deadline(constraint_transfer_timeout), span("transfer"), measure_memory() as memory:
+            s = CPM_ortools()
+            transfer(s, self.model.constraints)
+            s.minimize(self.objective)
+        end_t = timer()
+        self.stats.memory["transfer"] = memory.to_dict()
+        self.stats.transfer_time = end_t - start_t
 
-            print("Solving...")
+        return s
 
-            start_s = timer()
-            res = s.solve( max_time_in_seconds=max_time_in_seconds)
-            end_s = timer()
-            self.stats.solve_time = end_s - start_s
+    # Post the model directly in OR-Tools, only the objective passes through CPMpy
+    def native_solver(self, constraint_creation_timeout):
 
-        except TimeoutException as e: 
-            return False
+        self.config.log("Posting constraints ...")
 
-        return res
+        start_c = timer()
+        with deadline(constraint_creation_timeout), span("constraints", native=True), measure_memory() as memory:
+            s = NativeSolver()
+            self.native_constraints(s)
+            self.stats.nr_constraints = s.nr_constraints
+            check_deadline()
+        end_c = timer()
+        self.stats.memory["constraints"] = memory.to_dict()
+        self.stats.constraint_time = end_c - start_c
+
+        start_t = timer()
+        with span("objective"):
+            self.o = self.get_objective()
+            self.objective += self.o
+            s.minimize(self.objective)
+        end_t = timer()
+        self.stats.transfer_time = end_t - start_t
+
+        return s
+
+    '''
+    Key of the built model in a model cache, None if the model can not be cached (by default)
+    '''
+    def model_cache_key(self, config:Configuration) -> str:
+        return None
+
+    # Decision variables of the model and its objective, in a deterministic order (to map a cached model onto)
+    def solver_variables(self) -> list:
+        return get_variables([self.get_variables(), self.o])
+
+    # Load the built model from the cache, only the objective expression is created (for its value)
+    def cached_solver(self, model_cache:ModelCache, key):
+        with span("objective"):
+            self.o = self.get_objective()
+        with span("model_cache"):
+            (s, info) = model_cache.load(key, self.solver_variables())
+        if s is None:
+            return None
+
+        self.config.log("MODEL CACHE HIT", type(self).get_name())
+        self.stats.nr_constraints = info["nr_constraints"]
+        self.constraints_stats.update(info["constraints"])
+        return s
 
     def get_repeats(self): pass
 
@@ -147,6 +257,8 @@ class AbstractSingleBinModel(AbstractModel):
     Abstract model for SLOPP
     '''
 
+    restricted_packings = False             # whether only a subset of the packings is considered (e.g. guillotine packings)
+
     # Constructor
     def __init__(self, 
                     machine_config: MachineConfig, 
@@ -159,12 +271,24 @@ class AbstractSingleBinModel(AbstractModel):
 
         # CPMpy model data
         self.constraints = []
+        self.cached_constraints = None
         self.objective = 0
         self.model = Model()
 
+        # Warm start of the solver
+        self.solution_hint = SolutionHint()
+
         # To collect data about the algorithm
         self.stats = SingleBinStats()
 
+    '''
+    Constraints of the model, only created once when the model is reused over multiple solves
+    '''
+    def get_cached_constraints(self):
+        if self.cached_constraints is None:
+            self.cached_constraints = self.get_constraints()
+        return self.cached_constraints
+
     @constraint
     def item_count(self):
         # Link the item count variable with the number of active item instances
@@ -184,12 +308,59 @@ class AbstractSingleBinModel(AbstractModel):
             self.single_bin_packing.bin.length <= self.single_bin_packing.bin.config.max_length 
             ]
 
+    # Native counterparts of the shared constraints
+
+    @native_constraint
+    def native_item_count(self, s:NativeSolver):
+        for item in self.single_bin_packing.items:
+            s.model.Add(s.var(item.count) == sum(s.vars(item.active)))
+
+    @native_constraint
+    def native_item_selection(self, s:NativeSolver):
+        for item in self.single_bin_packing.items:
+            selected = s.var(item.selected)
+            s.model.Add(s.var(item.count) != 0).OnlyEnforceIf(selected)
+            s.model.Add(s.var(item.count) == 0).OnlyEnforceIf(selected.Not())
+
+    @native_constraint
+    def native_bin_height(self, s:NativeSolver):
+        length = s.var(self.single_bin_packing.bin.length)
+        s.model.Add(self.single_bin_packing.bin.config.min_length <= length)
+        s.model.Add(length <= self.single_bin_packing.bin.config.max_length)
+
+    '''
+    Hint a constructive packing, only for models with a heuristic counterpart
+    '''
+    def hint_heuristic(self, methods: list[str] = None):
+        pass
+
+    '''
+    Key of the built model: the model class and the problem as seen by the packing (machine, bin and item packings).
+    Added constraints and fixed values are not part of the problem, such models are not cached.
+    '''
+    def model_cache_key(self, config:Configuration) -> str:
+        if len(self.constraints) > 0 or self.single_bin_packing.fixed:
+            return None
+
+        bin = self.single_bin_packing.bin
+        return model_key({
+            "model": type(self).__module__ + "." + type(self).__qualname__,
+            "native": config.native,
+            "machine_config": asdict(self.machine_config),
+            "bin_config": [bin.width, bin.min_length, bin.max_length],
+            "items": [[asdict(item.item), item.max_count, item.rotation] for item in self.single_bin_packing.items],
+        })
+
+    def solver_variables(self) -> list:
+        return get_variables([self.get_variables(), self.single_bin_packing.get_variables(), self.o])
+
     def solve(self, config:Configuration, max_time_in_seconds=1, constraint_creation_timeout=60*3, constraint_transfer_timeout=60*2):
         res = super().solve(config=config, max_time_in_seconds=max_time_in_seconds, constraint_creation_timeout=constraint_creation_timeout, constraint_transfer_timeout=constraint_transfer_timeout)
         # Fix the solution to bound variables
         if res:
             self.sat = True
-            self.single_bin_packing.fix()
+            with span("fix"):
+                self.single_bin_packing.fix()
 
         return res
 
@@ -219,6 +390,28 @@ class AbstractProductionModel(AbstractModel):
     def __init__(self):
         pass
 
+# Model size
+
+@dataclass
+class ModelSize():
+    nr_variables : int = 0
+    nr_constraints : int = 0                # top-level CPMpy constraints
+    nr_flat_constraints : int = 0           # after flattening, None if not estimated
+
+    def __add__(self, other: ModelSize) -> ModelSize:
+        return ModelSize(
+            nr_variables = self.nr_variables + other.nr_variables,
+            nr_constraints = self.nr_constraints + other.nr_constraints,
+            nr_flat_constraints = None if None in (self.nr_flat_constraints, other.nr_flat_constraints) else self.nr_flat_constraints + other.nr_flat_constraints,
+        )
+
+    def __mul__(self, n: int) -> ModelSize:
+        return ModelSize(
+            nr_variables = n*self.nr_variables,
+            nr_constraints = n*self.nr_constraints,
+            nr_flat_constraints = None if self.nr_flat_constraints is None else n*self.nr_flat_constraints,
+        )
+
 # Stats datastructures
 
 @dataclass_json
@@ -226,13 +419,21 @@ class AbstractProductionModel(AbstractModel):
 class AbstractStats():
     objective : int = None
     nr_variables : int = None
+    nr_constraints : int = None
+    nr_solver_variables : int = None      # after flattening, in the CP-SAT model
+    nr_solver_constraints : int = None
     total_density : int = None
     constraints : List[Dict] = None
 
     constraint_time : int = None
     transfer_time : int = None
     solve_time : int = None
+    first_solution_time : int = None
     total_time : int = None
+    status : str = None         # solver exit status (OPTIMAL, FEASIBLE, ...), MEMORY_LIMIT if construction exceeded the memory budget
+
+    memory : Dict = None        # per phase (constraints, transfer, solve): allocated and peak allocated bytes (tracemalloc), peak RSS
+    peak_rss : int = None       # peak RSS of the process after the solve, in bytes
     
 @dataclass_json
 @dataclass
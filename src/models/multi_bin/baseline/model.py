@@ -92,7 +92,7 @@ class BaselineMBM():
                         max_count = math.floor((self.machine_config.width*self.machine_config.max_length)/i.area),
                         bin_config = bin_config,
                         rotation = True
-                    ) for i in items]
+                    ) for i in items if i.width != i.height]
             
             # Free single bin
             free_single_bin = \
@@ -116,8 +116,9 @@ class BaselineMBM():
 
         # Solve
         sat = self.production_model.solve(config,timeout)
-        print("Packing SAT:", sat)
-        self.production_model.print_stats()
+        config.log("Packing SAT:", sat)
+        if not config.quiet:
+            self.production_model.print_stats()
         
         return sat
 
@@ -130,5 +131,9 @@ class BaselineMBM():
     def get_stats(self):
         return self.production_model.get_stats().to_dict()
     
+    # Production model of the final planning
+    def get_production_model(self):
+        return self.production_model
+
     def visualise(self):
         self.production_model.visualise()
\ No newline at end of file
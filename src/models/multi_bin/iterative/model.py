@@ -13,6 +13,8 @@ from src.models.abstract_model import AbstractProductionModel
 from src.data_structures.problem.multi_bin_problem import MultiBinProblem
 from src.models.abstract_model import AbstractSingleBinModel
 from src.utils.configuration import Configuration
+from src.utils.tracer import span
+from src.models.multi_bin.pattern_pool import PatternPool
 
 
 class IterativeMBM():
@@ -62,30 +64,38 @@ class IterativeMBM():
         nr_iterations = args.get("nr_iterations", 1)
         packing_timeout = args.get("packing_timeout", 60)
         production_timeout = args.get("production_timeout", 5)
+        pattern_pool = args.get("pattern_pool", None)       # directory of the pattern pool shared over runs
 
         start_time = time.perf_counter()
         
         if bin_solutions is None: bin_solutions = [] # Collection of found patterns
+
+        # Preload the compatible patterns of previous runs
+        if pattern_pool is not None:
+            pattern_pool = PatternPool(pattern_pool, self.machine_config, max_size=args.get("pattern_pool_size", 100))
+            bin_solutions = bin_solutions + pattern_pool.load(config, self.single_bin_model, self.pattern_items())
+        nr_known_bins = len(bin_solutions)
         self.models = []        # To collect the models of every iteration
         sat = False             # Whether the total model is SAT
 
         # Perform the number of requested iterations
         for i_iteration in range(nr_iterations):
 
-            print("--- CREATING NEW BIN ---")
+            config.log("--- CREATING NEW BIN ---")
 
             # Solve model to create one new bin in the context of the previously achieved production
-            sat_, model = self.solve_one_bin(
-                config=config,
-                bin_solutions=bin_solutions.copy(), 
-                max_time_in_seconds=packing_timeout
-                )
+            with span("iteration", iteration=i_iteration):
+                sat_, model = self.solve_one_bin(
+                    config=config,
+                    bin_solutions=bin_solutions.copy(), 
+                    max_time_in_seconds=packing_timeout
+                    )
         
             # Check the outcome
             if not sat_:
-                print("NOT SAT")
+                config.log("NOT SAT")
                 break
-            print("SAT")
+            config.log("SAT")
 
             # Get the bin packings
             bin_solutions.append(model.single_bin_packings[0])
@@ -94,24 +104,30 @@ class IterativeMBM():
             self.models.append(model)
             sat = True
 
+        # Keep the new patterns for later runs
+        if pattern_pool is not None:
+            pattern_pool.add(bin_solutions[nr_known_bins:], self.single_bin_model)
+
         # Re-solve model with current packings (no new bin) to get final planning
-        print("--- LAST MODEL ---")
+        config.log("--- LAST MODEL ---")
 
         # Solve production problem without new bin
-        sat_, model = self.solve_packing(
-            config=config,
-            bin_solutions=bin_solutions.copy(), 
-            overproduction=True,
-            max_time_in_seconds=production_timeout
-            )
+        with span("last_model"):
+            sat_, model = self.solve_packing(
+                config=config,
+                bin_solutions=bin_solutions.copy(), 
+                overproduction=True,
+                max_time_in_seconds=production_timeout
+                )
         self.models.append(model)
 
         # Get statistics
         end_time = time.perf_counter()
-        print("Computation time:", end_time - start_time, "seconds")
+        config.log("Computation time:", end_time - start_time, "seconds")
 
-        for model in self.models[0:2:-1]:
-            model.single_bin_models[0].visualise()
+        if config.visualise:
+            for model in self.models[0:2:-1]:
+                model.single_bin_models[0].visualise()
         
         return sat, self.models
     
@@ -145,8 +161,9 @@ class IterativeMBM():
 
         # Solve to get partial solution
         sat = self.temp_model.solve(config, max_time_in_seconds, self.get_preference(), overproduction_objective=True)
-        print("Packing SAT:", sat)
-        self.temp_model.print_stats()
+        config.log("Packing SAT:", sat)
+        if not config.quiet:
+            self.temp_model.print_stats()
 
         return sat, self.temp_model
     
@@ -183,7 +200,7 @@ class IterativeMBM():
                         max_count = math.floor((self.machine_config.width*self.machine_config.max_length)/i.area),
                         bin_config = temp_bin_config,
                         rotation = True
-                    ) for i in temp_items]
+                    ) for i in temp_items if i.width != i.height]
 
         # Free single bin
         free_single_bins = [
@@ -204,11 +221,11 @@ class IterativeMBM():
         )
 
         # New unique solution
-        self.temp_model.constraints.extend([free_single_bins[0] != bs for bs in bin_solutions])
+        self.temp_model.constraints.extend([~(free_single_bins[0] == bs) for bs in bin_solutions])
 
         # Solve to get partial solution
         sat = self.temp_model.solve(config, max_time_in_seconds, self.get_preference())
-        print("Packing SAT:", sat)
+        config.log("Packing SAT:", sat)
 
         # Get the new bin 
         free_single_bin_packing = self.temp_model.free_single_bins[0]
@@ -216,17 +233,28 @@ class IterativeMBM():
             free_single_bin_packing.fix()
 
             # Show the new bin
-            self.temp_model.free_single_bin_models[0].visualise()
+            if config.visualise:
+                self.temp_model.free_single_bin_models[0].visualise()
 
-            print("STATS:", self.temp_model.get_stats())
-            self.temp_model.print_stats()
+            if not config.quiet:
+                print("STATS:", self.temp_model.get_stats())
+                self.temp_model.print_stats()
 
         # Get statistics
         end_time = time.perf_counter()
-        print("Computation time:", end_time - start_time, "seconds")
+        config.log("Computation time:", end_time - start_time, "seconds")
        
         return sat, self.temp_model
 
+    # Items of the new bins, patterns of the pool are loaded over them
+    def pattern_items(self) -> list[Item]:
+        bin_config = BinConfig(
+            width = self.machine_config.width,
+            min_length = self.machine_config.min_length,
+            max_length = self.machine_config.max_length,
+        )
+        return self.filter_items(self.production_schedule.items, bin_config)
+
     def filter_items(self, items: list[Item], bin_config: BinConfig) -> list[Item]:
         items = [i for i in items if i.width <= bin_config.width]
         items = [i for i in items if i.height <= bin_config.max_length]
@@ -239,5 +267,9 @@ class IterativeMBM():
             stats[i] = model.get_stats()
         return stats
     
+    # Production model of the final planning
+    def get_production_model(self):
+        return self.models[-1]
+
     def visualise(self):
         return self.temp_model.visualise()
\ No newline at end of file
@@ -3,7 +3,6 @@ from dataclasses import field
 
 import math
 import time
-import matplotlib.pyplot as plt
 
 from cpmpy.expressions.python_builtins import any as cpm_any
 
@@ -14,9 +13,14 @@ from src.data_structures.bin import Bin
 from src.data_structures.item import Item
 from src.models.abstract_model import AbstractProductionModel
 from src.data_structures.problem.multi_bin_problem import MultiBinProblem
-from src.models.abstract_model import AbstractSingleBinModel, constraint
+from src.models.abstract_model import AbstractSingleBinModel, constraint, ModelSize
 from src.extensions.due_dates.models.production_model import ProductionModel
 from src.utils.configuration import Configuration
+from src.utils.tracer import span
+from src.models.multi_bin.pattern_pool import PatternPool
+from src.utils.native_solver import NativeSolver
+
+from .session import LnsSession
 
 
 class LnsMBM():
@@ -68,61 +72,85 @@ class LnsMBM():
         nr_iterations = args.get("nr_iterations", 1)
         packing_timeout = args.get("packing_timeout", 60)
         production_timeout = args.get("production_timeout", 5)
+        pattern_pool = args.get("pattern_pool", None)       # directory of the pattern pool shared over runs
+        demand_cap = args.get("demand_cap", False)          # at most as many instances of an item in the new bin as its total demand (see max_counts)
 
         start_time = time.perf_counter()
         
         if bin_solutions is None: bin_solutions = [] # Collection of found patterns
+
+        # Preload the compatible patterns of previous runs
+        if pattern_pool is not None:
+            pattern_pool = PatternPool(pattern_pool, self.machine_config, max_size=args.get("pattern_pool_size", 100))
+            bin_solutions = bin_solutions + pattern_pool.load(config, self.single_bin_model, self.pattern_items())
+        nr_known_bins = len(bin_solutions)
         self.models = []        # To collect the models of every iteration
+        self.models_stats = []  # To collect the statistics of every iteration
         sat = False             # Whether the total model is SAT
 
+        # Session which keeps the new bin alive over the iterations
+        session = self.new_session(bin_solutions.copy(), demand_cap)
+
         max_new_bin_repeat = -1             # Limit on how many times the newly created bin of an iteration may be repeated (-1 fro no limit)
         previous_bin_production = None      # The (fulfilled) bin production of the previous iteration
 
         # Perform the number of requested iterations
         for i_iteration in range(nr_iterations):
 
-            print("--- CREATING NEW BIN ---")
+            config.log("--- CREATING NEW BIN ---")
 
             # Solve model to create one new bin in the context of the previously achieved production
-            sat_, model = self.solve_one_bin(
-                config=config,
-                bin_solutions=bin_solutions.copy(), 
-                max_new_bin_repeat=max_new_bin_repeat, 
-                previous_bin_production=previous_bin_production,
-                max_time_in_seconds=packing_timeout
-                )
+            with span("iteration", iteration=i_iteration):
+                sat_, model = self.solve_one_bin(
+                    config=config,
+                    bin_solutions=bin_solutions.copy(), 
+                    max_new_bin_repeat=max_new_bin_repeat, 
+                    previous_bin_production=previous_bin_production,
+                    max_time_in_seconds=packing_timeout,
+                    session=session
+                    )
         
             # Check the outcome
             if not sat_:
-                print("NOT SAT")
+                config.log("NOT SAT")
                 break
-            print("SAT")
+            config.log("SAT")
+
+            # Statistics before the bin production is extended
+            with span("stats"):
+                self.models_stats.append(model.get_stats().to_dict())
 
-            # Get the bin packings
-            bin_solutions = model.single_bin_packings
+            # Keep the new bin and get all bin packings, the model keeps the solution of this iteration
+            bin_solutions = session.commit(model)
 
             # Update datastructures
             self.models.append(model)
             sat = True
 
+        # Keep the new patterns for later runs
+        if pattern_pool is not None:
+            pattern_pool.add(bin_solutions[nr_known_bins:], self.single_bin_model)
+
         # Re-solve model with current packings (no new bin) to get final planning
-        print("--- LAST MODEL ---")
+        config.log("--- LAST MODEL ---")
 
         # Solve production problem without new bin
-        sat_, model = self.solve_packing(
-            config=config,
-            bin_solutions=bin_solutions.copy(), 
-            overproduction=True,
-            max_time_in_seconds=production_timeout
-            )
+        with span("last_model"):
+            sat_, model = self.solve_packing(
+                config=config,
+                bin_solutions=bin_solutions.copy(), 
+                overproduction=True,
+                max_time_in_seconds=production_timeout
+                )
         self.models.append(model)
 
         # Get statistics
         end_time = time.perf_counter()
-        print("Computation time:", end_time - start_time, "seconds")
+        config.log("Computation time:", end_time - start_time, "seconds")
 
-        for model in self.models[0:2:-1]:
-            model.single_bin_models[0].visualise()
+        if config.visualise:
+            for model in self.models[0:2:-1]:
+                model.single_bin_models[0].visualise()
         
         return sat, self.models
     
@@ -155,8 +183,9 @@ class LnsMBM():
 
         # Solve to get partial solution
         sat = self.temp_model.solve(config, max_time_in_seconds, self.get_preference(), overproduction_objective=True)
-        print("Packing SAT:", sat)
-        self.temp_model.print_stats()
+        config.log("Packing SAT:", sat)
+        if not config.quiet:
+            self.temp_model.print_stats()
 
         return sat, self.temp_model
     
@@ -166,11 +195,45 @@ class LnsMBM():
                         bin_solutions=field(default_factory=lambda: []),    # The previous bin packings
                         previous_bin_production=None,                       # The previously achieved production 
                         max_new_bin_repeat=None,                            # Limit on how many times the newly created bin may be repeated
-                        max_time_in_seconds = 60*2                          # Limit solver time
+                        max_time_in_seconds = 60*2,                         # Limit solver time
+                        session: LnsSession = None,                         # Session kept over the previous iterations
+                        demand_cap = False                                  # Cap the instances of an item in a new session by its demand
                         ):
 
         start_time = time.perf_counter()
 
+        # Session with the new bin
+        if session is None: session = self.new_session(bin_solutions, demand_cap)
+
+        # Create model
+        self.temp_model = session.get_production_model(self.production_model)
+
+        # Solve to get partial solution
+        sat = self.temp_model.solve(config, max_time_in_seconds, self.get_preference())
+        config.log("Packing SAT:", sat)
+
+        if sat:
+            self.temp_model.free_single_bin_models[0].fix()
+
+            # Show the new bin
+            if config.visualise:
+                import matplotlib.pyplot as plt
+                self.temp_model.free_single_bin_models[0].visualise()
+                plt.show()
+
+            if not config.quiet:
+                print("STATS:", self.temp_model.get_stats())
+                self.temp_model.print_stats()
+
+        # Get statistics
+        end_time = time.perf_counter()
+        config.log("Computation time:", end_time - start_time, "seconds")
+       
+        return sat, self.temp_model
+
+    # Create a session with a new bin to pack
+    def new_session(self, bin_solutions, demand_cap=False) -> LnsSession:
+
         # Items to pack and schedule
         temp_items = self.production_schedule.items
 
@@ -181,59 +244,60 @@ class LnsMBM():
             max_length = self.machine_config.max_length,
         )
         temp_items = self.filter_items(temp_items, temp_bin_config)
+        max_counts = self.max_counts(temp_items, demand_cap)
 
         # Item packings
         temp_item_packings = [
                 self.single_bin_model.ItemPacking(
                         item = i, 
-                        max_count = math.floor((self.machine_config.width*self.machine_config.max_length)/i.area),
+                        max_count = max_counts[i.ID],
                         bin_config = temp_bin_config
                     ) for i in temp_items] 
         temp_item_packings_rotated = [
                 self.single_bin_model.ItemPacking(
                         item = i, 
-                        max_count = math.floor((self.machine_config.width*self.machine_config.max_length)/i.area),
+                        max_count = max_counts[i.ID],
                         bin_config = temp_bin_config,
                         rotation = True
-                    ) for i in temp_items]
+                    ) for i in temp_items if i.width != i.height]
 
         # Free single bin
-        free_single_bins = [
-            self.single_bin_model.single_bin_packing(
+        free_single_bin = self.single_bin_model.single_bin_packing(
                 _items = temp_item_packings, 
                 _items_rotated = temp_item_packings_rotated,
                 bin = Bin(config=temp_bin_config),
-            )]
+            )
 
-        # Create model
-        self.temp_model = self.production_model(
-            machine_config = self.machine_config, 
-            production_schedule = self.production_schedule, 
-            fixed_single_bins = bin_solutions,
-            free_single_bins = free_single_bins, 
-            items = temp_items,
+        return LnsSession(
+            machine_config = self.machine_config,
+            production_schedule = self.production_schedule,
             single_bin_model = self.single_bin_model,
+            items = temp_items,
+            free_single_bin = free_single_bin,
+            fixed_single_bins = bin_solutions,
         )
 
-        # Solve to get partial solution
-        sat = self.temp_model.solve(config, max_time_in_seconds, self.get_preference())
-        print("Packing SAT:", sat)
-
-        if sat:
-            self.temp_model.free_single_bin_models[0].fix()
-
-            # Show the new bin
-            self.temp_model.free_single_bin_models[0].visualise()
-            plt.show()
-
-            print("STATS:", self.temp_model.get_stats())
-            self.temp_model.print_stats()
-
-        # Get statistics
-        end_time = time.perf_counter()
-        print("Computation time:", end_time - start_time, "seconds")
-       
-        return sat, self.temp_model
+    # Maximal number of instances of every item in a new bin: as many as fit by area, or with a demand cap, at most its total demand.
+    # The new bin is kept over the iterations, so the demand is not reduced by the fixed bins.
+    # The demand cap is a heuristic: a new bin is solved without the overproduction objective, so more instances can lower the waste
+    # and the cap can cut off the optimum (see benchmarks/demand_cap.py).
+    def max_counts(self, items: list[Item], demand_cap=False) -> dict[int, int]:
+        demands = self.production_schedule.get_total_requirements()
+        max_counts = {}
+        for i in items:
+            max_counts[i.ID] = math.floor((self.machine_config.width*self.machine_config.max_length)/i.area)
+            if demand_cap:
+                max_counts[i.ID] = min(max_counts[i.ID], demands[i.ID])
+        return max_counts
+
+    # Items of the new bins, patterns of the pool are loaded over them
+    def pattern_items(self) -> list[Item]:
+        bin_config = BinConfig(
+            width = self.machine_config.width,
+            min_length = self.machine_config.min_length,
+            max_length = self.machine_config.max_length,
+        )
+        return self.filter_items(self.production_schedule.items, bin_config)
 
     def filter_items(self, items: list[Item], bin_config: BinConfig) -> list[Item]:
         items = [i for i in items if i.width <= bin_config.width]
@@ -243,10 +307,16 @@ class LnsMBM():
     
     def get_stats(self):
         stats = {}
-        for i, model in enumerate(self.models):
-            stats[i] = model.get_stats().to_dict()
+        for i, model_stats in enumerate(self.models_stats):
+            stats[i] = model_stats
+        # The last model is not part of the session
+        stats[len(self.models_stats)] = self.models[-1].get_stats().to_dict()
         return stats
     
+    # Production model of the final planning
+    def get_production_model(self):
+        return self.models[-1]
+
     def visualise(self):
         return self.temp_model.visualise()
     
@@ -256,6 +326,19 @@ class ProductionModelLNS(ProductionModel):
     Slightly adapter production model for CP-DLNS
     '''
 
+    @classmethod
+    def estimate_constraints(cls, nr_items, nr_deadlines, nr_fixed_packings, nr_free_packings, nr_square_items=0) -> dict[str, ModelSize]:
+        groups = super().estimate_constraints(nr_items, nr_deadlines, nr_fixed_packings, nr_free_packings, nr_square_items)
+
+        # Every free bin differs from the (fixed) item counts of the fixed bins,
+        # the constraints are posted by both the production model and get_constraints
+        nr_pairs = nr_free_packings*nr_fixed_packings
+        groups["unique_new_bin"] = (groups["unique_new_bin"] + ModelSize(nr_constraints=nr_pairs, nr_flat_constraints=(nr_items+1)*nr_pairs))*2
+
+        groups["usefull_bin"] = ModelSize(nr_constraints=1, nr_flat_constraints=1) if nr_free_packings != 0 else ModelSize()
+        groups["any_bin_active"] = ModelSize(nr_constraints=1, nr_flat_constraints=1)
+        return groups
+
     @constraint
     def unique_new_bin(self):
         c = []
@@ -284,4 +367,9 @@ class ProductionModelLNS(ProductionModel):
         c.extend(self.unique_new_bin())
         c.append(cpm_any(self.bin_production.bin_active.flatten().tolist()))
         self.constraints = c
-        return c
\ No newline at end of file
+        return c
+
+    def native_constraints(self, s:NativeSolver):
+        super().native_constraints(s)
+        s.add(self.usefull_bin())
+        s.add(cpm_any(self.bin_production.bin_active.flatten().tolist()))
@@ -0,0 +1,107 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.data_structures.machine_config import MachineConfig
+from src.data_structures.production_schedule import ProductionSchedule
+from src.data_structures.item import Item
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.models.abstract_model import AbstractSingleBinModel, AbstractProductionModel
+from src.extensions.due_dates.data_structures.bin_production import BinProduction, valued_copy
+from src.utils.native_solver import NativeSolver
+from src.utils.solution_hint import SolutionHint
+
+
+@dataclass(kw_only=True)
+class LnsSession:
+
+    '''
+    Solver session of CP-DLNS, which keeps the new bin (its packing variables and constraints) alive over the iterations.
+    After every iteration, only the newly fixed bin is appended to the bin production.
+    '''
+
+    machine_config: MachineConfig
+    production_schedule: ProductionSchedule
+    single_bin_model: AbstractSingleBinModel        # single bin model type
+    items: list[Item]                               # items to pack in the new bin
+    free_single_bin: AbstractSingleBinPacking       # the new bin
+    fixed_single_bins: list[AbstractSingleBinPacking]
+
+    def __post_init__(self):
+
+        # Packing model of the new bin
+        self.free_single_bin_model = self.single_bin_model(
+            machine_config=self.machine_config,
+            single_bin_packing=self.free_single_bin,
+        )
+
+        # Solver which keeps the constraints of the new bin
+        self.free_single_bin_solver = NativeSolver()
+
+        # Bin production over all iterations
+        self.bin_production = BinProduction(
+            production_schedule=self.production_schedule,
+            fixed_bin_packings=self.fixed_single_bins,
+            fixable_bin_packings=[self.free_single_bin]
+        )
+
+        # Warm start for the next iteration
+        self.solution_hint = SolutionHint()
+
+    '''
+    Production model of the current iteration, warm started from the previous iteration
+    '''
+    def get_production_model(self, production_model: AbstractProductionModel):
+        model = production_model(
+            machine_config = self.machine_config,
+            production_schedule = self.production_schedule,
+            fixed_single_bins = self.bin_production.fixed_bin_packings,
+            free_single_bins = [self.free_single_bin],
+            items = self.items,
+            single_bin_model = self.single_bin_model,
+            bin_production = self.bin_production,
+            free_single_bin_models = [self.free_single_bin_model],
+            free_single_bins_solver = self.free_single_bin_solver,
+        )
+        model.solution_hint.extend(self.solution_hint)
+        return model
+
+    '''
+    Keep the solution of the new bin as a fixed bin and free the new bin for the next iteration.
+    The next iteration is hinted with the production of the last solution, and a constructive packing of the new bin.
+    The last packing itself is not hinted, as the new bin has to differ from it.
+    The production model of the iteration (if given) keeps its solution, see detach.
+    '''
+    def commit(self, model=None) -> list[AbstractSingleBinPacking]:
+        values = [np.array(array.value()) for array in self.bin_production.get_variable_arrays()]
+        fixed_single_bin = self.free_single_bin.fixed_copy()
+
+        if model is not None: self.detach(model, fixed_single_bin)
+
+        # Free the new bin first, so its item counts in the bin production are variables again
+        self.free_single_bin.free()
+        self.bin_production.add_fixed_packing(fixed_single_bin)
+
+        self.solution_hint = SolutionHint()
+        self.bin_production.hint_added_packing(self.solution_hint, values)
+
+        self.free_single_bin_model.solution_hint = SolutionHint()
+        self.free_single_bin_model.hint_heuristic()
+        self.solution_hint.extend(self.free_single_bin_model.solution_hint)
+
+        return self.bin_production.fixed_bin_packings
+
+    '''
+    Detach the production model of the last solve from the session, as the next iterations solve the same decision variables again.
+    The new bin is replaced by its fixed copy and the bin production and objective by copies holding their values.
+    '''
+    def detach(self, model, fixed_single_bin: AbstractSingleBinPacking):
+        model.fixed_single_bins = self.bin_production.fixed_bin_packings
+        model.free_single_bins = [fixed_single_bin]
+        model.single_bin_packings = model.fixed_single_bins + model.free_single_bins
+        model.free_single_bin_models = [self.single_bin_model(machine_config=self.machine_config, single_bin_packing=fixed_single_bin)]
+        model.free_single_bins_solver = None
+
+        model.bin_production = self.bin_production.fixed_copy(model.single_bin_packings)
+        model.objective = valued_copy(model.objective)
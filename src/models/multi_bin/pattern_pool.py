@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.bin_config import BinConfig
+from src.data_structures.item import Item
+from src.data_structures.machine_config import MachineConfig
+from src.models.abstract_model import AbstractSingleBinModel
+from src.utils.configuration import Configuration
+from src.utils.atomic_write import write_json
+from src.utils.solution_export import packing_arrays, save_arrays, load_arrays, fixed_packing_from_arrays
+
+
+'''
+Dimensions and colour of an item packing as key, items with the same dimensions and colour are interchangeable over problems
+'''
+def _key(width, height, color="", rotation=False) -> str:
+    return str(int(width)) + "x" + str(int(height)) + ("_" + color if color != "" else "") + ("r" if rotation else "")
+
+# Colour of an item by its yarn colours (colour IDs differ over problems), empty for items without colour
+def _color(item: Item) -> str:
+    if not hasattr(item, "color"):
+        return ""
+    return "+".join(basic_color.hex for basic_color in item.color.basic_colors)
+
+# Type of the item packings, patterns can only be reused by models with the same item packings
+def _item_packing_type(single_bin_model: AbstractSingleBinModel) -> str:
+    return single_bin_model.ItemPacking.__module__ + "." + single_bin_model.ItemPacking.__qualname__
+
+
+class PatternPool:
+
+    '''
+    On-disk pool of fixed bin packings (patterns), shared over planning runs.
+    The patterns of a machine config are kept in directory/<width>_<min_length>_<max_length> (followed by the creel settings
+    of a creel machine), as .npz (see solution_export) with an index of their produced items by dimensions and colour.
+    A pattern is compatible with the items of a run if every item it produces has an item with the same dimensions and colour.
+    The pool is bounded: dominated patterns (at most the same length, at least the same counts) are not kept,
+    and the least recently used patterns are evicted.
+    Concurrent runs do not lock the pool, the index is replaced atomically (so a concurrent update can be lost).
+    '''
+
+    def __init__(self, directory, machine_config: MachineConfig, max_size: int = 100):
+        self.machine_config = machine_config
+        self.max_size = max_size
+
+        settings = [machine_config.width, machine_config.min_length, machine_config.max_length]
+        # A pattern of a creel machine is only valid for the same creel
+        if machine_config.max_creel_number != -1:
+            settings += ["creel", machine_config.max_creel_number, machine_config.max_creel_colors, machine_config.creel_switch_penalty]
+        self.directory = os.path.join(directory, "_".join(str(x) for x in settings))
+        self.index_file = os.path.join(self.directory, "index.json")
+
+        self.index = {"clock": 0, "next_id": 0, "patterns": []}
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+
+    def __len__(self):
+        return len(self.index["patterns"])
+
+    def _tick(self) -> int:
+        self.index["clock"] += 1
+        return self.index["clock"]
+
+    def _write_index(self):
+        write_json(self.index_file, self.index, indent=4)
+
+    def _file_name(self, pattern: dict):
+        return os.path.join(self.directory, str(pattern["id"]) + ".npz")
+
+    def _remove(self, pattern: dict):
+        self.index["patterns"].remove(pattern)
+        if os.path.exists(self._file_name(pattern)):
+            os.remove(self._file_name(pattern))
+
+    # Whether pattern a makes pattern b redundant
+    def _dominates(self, a: dict, b: dict) -> bool:
+        return a["type"] == b["type"] and a["bin_length"] <= b["bin_length"] and all(a["counts"].get(key, 0) >= count for (key, count) in b["counts"].items())
+
+    '''
+    Add fixed packings to the pool, unless they are dominated by a pattern in the pool.
+    Patterns dominated by an added packing are removed, then the least recently used patterns are evicted.
+    '''
+    def add(self, single_bin_packings: list[AbstractSingleBinPacking], single_bin_model: AbstractSingleBinModel):
+        for single_bin_packing in single_bin_packings:
+            arrays = packing_arrays(single_bin_packing)
+            arrays["item_colors"] = np.array([_color(item.item) for item in single_bin_packing.items], dtype=np.str_)
+
+            # Produced items by dimensions and colour (over both rotations)
+            counts = {}
+            for (item, count) in zip(single_bin_packing.items, arrays["item_count"]):
+                if count > 0:
+                    key = _key(item.item.width, item.item.height, _color(item.item))
+                    counts[key] = counts.get(key, 0) + int(count)
+
+            pattern = {
+                "id": self.index["next_id"],
+                "type": _item_packing_type(single_bin_model),
+                "bin_length": int(arrays["bin_length"]),
+                "density": float(single_bin_packing.density),
+                "counts": counts,
+                "last_used": self._tick(),
+            }
+
+            dominating = next((other for other in self.index["patterns"] if self._dominates(other, pattern)), None)
+            if dominating is not None:
+                dominating["last_used"] = pattern["last_used"]
+                continue
+
+            for other in [other for other in self.index["patterns"] if self._dominates(pattern, other)]:
+                self._remove(other)
+
+            self.index["next_id"] += 1
+            self.index["patterns"].append(pattern)
+            save_arrays(self._file_name(pattern), arrays)
+
+        # Least recently used eviction
+        while len(self.index["patterns"]) > self.max_size:
+            self._remove(min(self.index["patterns"], key=lambda pattern: pattern["last_used"]))
+
+        self._write_index()
+
+    '''
+    Fixed packings of the compatible patterns over the given items (in the order of the item packings of a new bin),
+    the densest first, at most limit. The loaded patterns count as used.
+    '''
+    def load(self, config: Configuration, single_bin_model: AbstractSingleBinModel, items: list[Item], limit: int = None) -> list[AbstractSingleBinPacking]:
+        keys = set(_key(item.width, item.height, _color(item)) for item in items)
+
+        patterns = [
+            pattern for pattern in self.index["patterns"]
+            if pattern["type"] == _item_packing_type(single_bin_model) and all(key in keys for key in pattern["counts"])
+        ]
+        patterns = sorted(patterns, key=lambda pattern: pattern["density"], reverse=True)[:limit]
+
+        single_bin_packings = []
+        for pattern in patterns:
+            arrays = self._remap(load_arrays(self._file_name(pattern)), single_bin_model, items)
+            if arrays is None:
+                continue
+            single_bin_packings.append(fixed_packing_from_arrays(arrays, single_bin_model, items))
+            pattern["last_used"] = self._tick()
+
+        if len(patterns) > 0:
+            self._write_index()
+
+        config.log("PATTERN POOL", len(single_bin_packings), "of", len(self), "patterns loaded")
+        return single_bin_packings
+
+    '''
+    Pattern values over the given items: the item packings of the pattern are matched by dimensions and colour,
+    the items which the pattern does not have are not produced. None if the pattern produces an item which can not be matched.
+    '''
+    def _remap(self, arrays: dict[str, npt.NDArray], single_bin_model: AbstractSingleBinModel, items: list[Item]) -> dict[str, npt.NDArray]:
+        (width, min_length, max_length) = (int(x) for x in arrays["bin_config"])
+        bin_config = BinConfig(width=width, min_length=min_length, max_length=max_length)
+
+        # Item packings of the pattern by dimensions and colour
+        pattern_items = {}
+        colors = arrays.get("item_colors", np.full(len(arrays["item_ids"]), ""))    # patterns added without colours
+        for (i_item, ((item_width, item_height), color, rotation)) in enumerate(zip(arrays["item_dimensions"], colors, arrays["item_rotation"])):
+            pattern_items.setdefault(_key(item_width, item_height, str(color), rotation), []).append(i_item)
+        offsets = arrays["item_offsets"]
+
+        columns = {name: [] for name in ["item_ids", "item_rotation", "item_max_count", "item_count", "item_selected", "pos_xs", "pos_ys", "active", "rotations"]}
+        sizes = []
+
+        for rotation in sorted(set(bool(rotation) for rotation in arrays["item_rotation"])):
+            for item in items:
+                matches = pattern_items.get(_key(item.width, item.height, _color(item), rotation), [])
+
+                if len(matches) > 0:
+                    i_item = matches.pop(0)
+                    instances = slice(offsets[i_item], offsets[i_item+1])
+                    values = {name: arrays[name][i_item] for name in ["item_max_count", "item_count", "item_selected"]}
+                    values.update({name: arrays[name][instances] for name in ["pos_xs", "pos_ys", "active", "rotations"]})
+                elif rotation and item.width == item.height:
+                    continue    # a square item has no rotated item packing
+                else:
+                    item_packing = single_bin_model.ItemPacking(
+                        item=item,
+                        max_count=math.floor((self.machine_config.width*self.machine_config.max_length)/item.area),
+                        bin_config=bin_config,
+                        rotation=rotation,
+                    )
+                    size = np.size(item_packing.fixable_pos_xs_arr.free_value)
+                    values = {
+                        "item_max_count": item_packing.max_count, "item_count": 0, "item_selected": False,
+                        "pos_xs": np.full(size, -1), "pos_ys": np.full(size, -1), "active": np.zeros(size, dtype=np.bool_), "rotations": np.full(size, rotation),
+                    }
+
+                values.update({"item_ids": item.ID, "item_rotation": rotation})
+                for (name, value) in values.items():
+                    columns[name].append(value)
+                sizes.append(np.size(values["pos_xs"]))
+
+        # Produced items without a match
+        if any(arrays["item_count"][i_item] > 0 for matches in pattern_items.values() for i_item in matches):
+            return None
+
+        remapped = {name: np.array(columns[name]) for name in ["item_ids", "item_rotation", "item_max_count", "item_count", "item_selected"]}
+        remapped.update({name: np.concatenate(columns[name]) for name in ["pos_xs", "pos_ys", "active", "rotations"]})
+        remapped.update({
+            "bin_config": arrays["bin_config"],
+            "bin_length": arrays["bin_length"],
+            "item_offsets": np.cumsum([0] + sizes),
+        })
+        return remapped
+
@@ -32,25 +32,25 @@ class GuillotineSBMCreel(GuillotineSBM, AbstractSBMCreel):
 
         for p in range(self.P): # go over patterns
             strip_width = 0
-            for a in range(self.A): # go over strips
+            for a in self.index.strips(p): # go over strips
 
-                for i in range(self.I): # go over items
+                for i in self.index.strip_items(p,a): # go over items
                     item = self.single_bin_packing.items[i]
                     for color in item.item.color.basic_colors:
                         if a == 0:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2_fixed(strip_width, strip_width+item.width)
                                 )
                             )
                         else:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2(strip_width, strip_width+item.width)
                                 )
                             )
 
-                strip_width += cpm_sum(self.gamma[p,a,:]*self.widths)
+                strip_width += self.strip_width(p,a)
             
         return cpm_all(cc)
 
@@ -73,11 +73,11 @@ class GuillotineSBMCreel(GuillotineSBM, AbstractSBMCreel):
         pattern_height = 0
         for p in range(self.P): # go over patterns
             strip_width = 0
-            for a in range(self.A): # go over strips
+            for a in self.index.strips(p): # go over strips
                 cut_height = 0
                 
-                for b in range(self.B): # go over vertical cuts
-                    for i in range(self.I): # go over items
+                for b in self.index.cuts(p,a): # go over vertical cuts
+                    for i in self.index.cut_items(p,a,b): # go over items
 
                         if self.sigma[p,a,b,i].value():
 
@@ -97,7 +97,7 @@ class GuillotineSBMCreel(GuillotineSBM, AbstractSBMCreel):
                             cut_height += self.items[i].height
                             break
 
-                strip_width += sum(self.gamma[p,a,:].value()*self.widths) 
+                strip_width += self.strip_width(p,a).value()
 
             pattern_height += self.pattern_length[p].value()
 
@@ -31,25 +31,25 @@ class GuillotineAbsolutePosSBMCreel(GuillotineAbsolutePosSBM, AbstractSBMCreel):
         pattern_height = 0
         for p in range(self.P): # go over patterns
             strip_width = 0
-            for a in range(self.A): # go over strips
+            for a in self.index.strips(p): # go over strips
 
                 
-                for i in range(self.I): # go over items
+                for i in self.index.strip_items(p,a): # go over items
                     for color in self.items[i].item.color.basic_colors:
                         if a == 0:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2_fixed(strip_width, strip_width+self.items[i].item.width)
                                 )
                             )
                         else:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2(strip_width, strip_width+self.items[i].item.width)
                                 )
                             )
 
-                strip_width += cpm_sum(self.gamma[p,a,:]*self.widths)
+                strip_width += self.strip_width(p,a)
             
             pattern_height += self.pattern_length[p]
 
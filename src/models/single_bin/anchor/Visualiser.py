@@ -23,11 +23,11 @@ def show_bin_packing(bin_pack: SingleBinPacking):
     ax.set_xlim((0, 1))
     ax.set_ylim((0, 1))
 
-    cmap = get_cmap(len(bin_pack.items)//2)
+    cmap = get_cmap(len(bin_pack.items_unique))
 
-    for i,item in enumerate(bin_pack.items):
+    for (i,item) in zip(bin_pack.unique_indices, bin_pack.items):
         if item.selected:
-            show_item(ax, item, bin_width, bin_height, cmap(i%(len(bin_pack.items)//2)))
+            show_item(ax, item, bin_width, bin_height, cmap(i))
 
     show_bin_length(ax, bin_pack.bin)
 
@@ -53,16 +53,16 @@ def show_bin_packing_per_item(bin_pack: SingleBinPacking):
     fig_size = (10*bin_height/bin_width,10)
     (_, axs) = plt.subplots(len(bin_pack.items), figsize=fig_size)
 
-    cmap = get_cmap(len(bin_pack.items)/2)
+    cmap = get_cmap(len(bin_pack.items_unique))
 
-    for i,item in enumerate(bin_pack.items):
+    for (i,item) in enumerate(bin_pack.items):
         axs[i].get_yaxis().set_visible(False)
         axs[i].get_xaxis().set_visible(False)
         
         axs[i].set_xlim((0, 1))
         axs[i].set_ylim((0, 1))
         if item.selected:
-            show_item(axs[i], item, bin_width, bin_height, cmap(i%(len(bin_pack.items)/2)))
+            show_item(axs[i], item, bin_width, bin_height, cmap(bin_pack.unique_indices[i]))
 
     return plt.show()
 
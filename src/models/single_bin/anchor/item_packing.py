@@ -55,6 +55,7 @@ class ItemPacking(AbstractItemPacking):
         return self.nr_width_repeats()*self.nr_length_repeats()
     
     # Grid structure dimensions
+    # The grid covers the whole bin, an instance can be anywhere, only the number of active instances is capped (see _count_var)
 
     def nr_width_repeats(self):
         return math.floor(self.bin_config.width / self.width)
@@ -118,7 +119,7 @@ class ItemPacking(AbstractItemPacking):
 
 
     def _count_var(self):
-        return intvar(0, self.nr_width_repeats()*self.nr_length_repeats())
+        return intvar(0, min(self.nr_width_repeats()*self.nr_length_repeats(), self.max_count))
 
     def _active_var(self):
         return boolvar((self.length_repeats_upper()-self.length_repeats_lower()+1, self.nr_width_repeats()))
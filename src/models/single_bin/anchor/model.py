@@ -3,21 +3,24 @@ import itertools
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
 
-import math
 from timeit import default_timer as timer
 from typing import List
+import numpy as np
 
 from cpmpy.expressions.python_builtins import all, any
 from cpmpy.expressions.python_builtins import sum as cpm_sum
 
 from src.data_structures.bin import Bin
 from src.data_structures.machine_config import MachineConfig
-from src.models.abstract_model import AbstractSingleBinModel, constraint, SingleBinStats
+from src.models.abstract_model import AbstractSingleBinModel, constraint, native_constraint, SingleBinStats, ModelSize
 from src.models import objectives
+from src.utils.native_solver import NativeSolver
+from src.utils.deadline import checked
 
 from .single_bin_packing import SingleBinPacking
-from .Visualiser import show_bin_packing
 from .item_packing import ItemPacking
+from .overlap import overlap_candidates
+from ..heuristic.model import place, hint_packing
 
 
 class AnchorSBM(AbstractSingleBinModel):
@@ -59,6 +62,53 @@ class AnchorSBM(AbstractSingleBinModel):
     def get_name():
         return "Anchor"
 
+    '''
+    Size of the model from the grid dimensions of the items, only the item packings are created.
+    The flattened sizes follow the decomposition of each constraint type by CPMpy.
+    '''
+    @classmethod
+    def estimate_size(cls, problem) -> ModelSize:
+        items = problem.get_item_packing(ItemPacking) + problem.get_item_packing_rotated(ItemPacking)
+        bin_config = problem.get_bin_config()
+
+        # item_count, item_selection, bin_height and bin_capacity (a linear sum, flattened in two)
+        size = ModelSize(nr_variables=1, nr_constraints=2*len(items) + 3, nr_flat_constraints=2*len(items) + 4)
+
+        for item in items:
+            x_size = item.nr_width_repeats()
+            y_size = item.length_repeats_upper() - item.length_repeats_lower() + 1
+            x_pairs, y_pairs = max(x_size-1, 0), max(y_size-1, 0)
+
+            # pos_xs, pos_ys, count, selected and active
+            size.nr_variables += 2*item.nr_length_repeats()*x_size + 2 + y_size*x_size
+
+            # unselected_items
+            size += ModelSize(nr_constraints=y_size*x_size, nr_flat_constraints=y_size*x_size)
+
+            # within_bin
+            if bin_config.min_length != bin_config.max_length:
+                l = max(((bin_config.min_length // item.height - 1), 0))
+                n = max(item.nr_length_repeats() - l, 0)*x_size
+                size += ModelSize(nr_constraints=n, nr_flat_constraints=n)
+
+            # no_overlap of the same type, a conjunction implying one (two) disjunct(s) is flattened in two (four)
+            size += ModelSize(
+                nr_constraints = y_size*x_pairs + y_pairs*x_size + 2*y_pairs*x_pairs,
+                nr_flat_constraints = 2*y_size*x_pairs + 2*y_pairs*x_size + 8*y_pairs*x_pairs,
+            )
+
+        # no_overlap of different types, a surely overlapping pair is a single clause,
+        # the others imply a disjunction of (at least two) relative positions, flattened in two more
+        for (item_1, item_2) in itertools.combinations(items, 2):
+            candidates = overlap_candidates(item_1, item_2)
+            nr_positions = candidates.below.astype(int) + candidates.above + candidates.left + candidates.right
+            size += ModelSize(
+                nr_constraints = len(candidates),
+                nr_flat_constraints = int(np.sum(np.where(candidates.surely_overlapping, 1, nr_positions + 2))),
+            )
+
+        return size
+
     # ---------------------------------------------------------------------------- #
     #                                  Constraits                                  #
     # ---------------------------------------------------------------------------- #
@@ -110,83 +160,63 @@ class AnchorSBM(AbstractSingleBinModel):
 
         # Don't allow item instances to overlap
 
-        # Two items of different type should not overlap
-        for (item_1, item_2) in itertools.combinations(self.single_bin_packing.items, 2):
+        # Two items of different type should not overlap (checking the deadline per pair and within large pairs)
+        for (item_1, item_2) in checked(itertools.combinations(self.single_bin_packing.items, 2)):
    
             # Get item packing index ranges
-            min_y_1, max_y_1 = item_1.length_repeats_lower(), item_1.length_repeats_upper()
-            min_y_2, max_y_2 = item_2.length_repeats_lower(), item_2.length_repeats_upper()
-            max_x_1, max_x_2 = item_1.nr_width_repeats(), item_2.nr_width_repeats()
+            min_y_1, min_y_2 = item_1.length_repeats_lower(), item_2.length_repeats_lower()
 
-            # Get position variables
-            pos_xs_1, pos_xs_2 = item_1.pos_xs_arr, item_2.pos_xs_arr
-            pos_ys_1, pos_ys_2 = item_1.pos_ys_arr, item_2.pos_ys_arr
+            # Get position variables (as nested lists, for fast indexing)
+            pos_xs_1, pos_xs_2 = item_1.pos_xs_arr.tolist(), item_2.pos_xs_arr.tolist()
+            pos_ys_1, pos_ys_2 = item_1.pos_ys_arr.tolist(), item_2.pos_ys_arr.tolist()
+            active_1, active_2 = item_1.active_arr.tolist(), item_2.active_arr.tolist()
 
             # Get item shapes
             w_1, w_2 = item_1.width, item_2.width
             h_1, h_2 = item_1.height, item_2.height
 
-            y_1_lower = 0
+            # Get all instance pairs that could overlap
+            candidates = overlap_candidates(item_1, item_2)
 
-            for y_1 in range(y_1_lower, max_y_1+1):
-                
-                for x_1 in range(0, max_x_1):
-
-                    # y2*h2 + 2*h2-1 > y1*h1
-                    y_2_lower = max((math.ceil((y_1*h_1 - 2*h_2 + 1)/h_2), 0))
-
-                    # y1*h1 + 2*h1-1 > y2*h2 
-                    y_2_upper = min((math.floor(((y_1+2)*h_1 - 1)/h_2), max_y_2))
-
-                    x_2_lower = max((math.ceil((x_1*w_1 - 2*w_2 + 1)/w_2), 0))
-                    x_2_upper = min((math.floor(((x_1+2)*w_1 - 1)/w_2), max_x_2-1))
-
-                    for y_2 in range(y_2_lower, y_2_upper+1):
-                        for x_2 in range(x_2_lower, x_2_upper+1):
-
-                            pos_x_1 = pos_xs_1[y_1,x_1]
-                            pos_x_2 = pos_xs_2[y_2,x_2]
-                            pos_y_1 = pos_ys_1[y_1,x_1]
-                            pos_y_2 = pos_ys_2[y_2,x_2]
-                                                        
-                            a_1 = item_2.max_move_x[y_2,x_2]
-                            c_1 = ((x_2+1)*w_2) - (x_2*w_2 - item_2.min_move_x[y_2,x_2])
-                            b_1 = item_2.max_move_y[y_2,x_2]
-                            d_1 = ((y_2+1)*h_2) - (y_2*h_2 - item_2.min_move_y[y_2,x_2])
-
-                            a_2 = item_1.max_move_x[y_1,x_1]
-                            c_2 = ((x_1+1)*w_1) - (x_1*w_1 - item_1.min_move_x[y_1,x_1])
-                            b_2 = item_1.max_move_y[y_1,x_1]
-                            d_2 = ((y_1+1)*h_1) - (y_1*h_1 - item_1.min_move_y[y_1,x_1])
-
-                            # items die zeker overlappen, haalde niet veel uit, zelfde aantal constraints, klein beetje sneller (0.5s), ook iets sneller transfer time
-                            # -> komt neer op dat één item in een ander ligt
-                            if (min(d_1,d_2) > max(b_1,b_2)) and (min(c_1,c_2) > max(a_1,a_2)):
-
-                                if y_2 < min_y_2 and item_2.active_arr[y_2,x_2]:
-                                    c.append(~item_1.active_arr[y_1,x_1])
-                                elif y_1 < min_y_1 and item_1.active_arr[y_1,x_1]:
-                                    c.append(~item_2.active_arr[y_2,x_2])
-                                else:
-                                    c.append(~all([item_1.active_arr[y_1,x_1],item_2.active_arr[y_2,x_2]]))
-                                continue
-
-                            consequence = []
-                            
-                            if y_1*h_1 <= y_2*h_2:
-                                consequence.append( (pos_y_1 + h_1 <= pos_y_2) )
-                            if y_2*h_2 <= y_1*h_1:
-                                consequence.append( (pos_y_2 + h_2 <= pos_y_1) )
-                            if x_1*w_1 <= x_2*w_2:
-                                consequence.append( (pos_x_1 + w_1 <= pos_x_2) )
-                            if x_2*w_2 <= x_1*w_1:
-                                consequence.append( (pos_x_2 + w_2 <= pos_x_1) )
+            for (y_1, x_1, y_2, x_2, surely_overlapping, below, above, left, right) in checked(zip(
+                    candidates.y_1.tolist(), candidates.x_1.tolist(), candidates.y_2.tolist(), candidates.x_2.tolist(),
+                    candidates.surely_overlapping.tolist(),
+                    candidates.below.tolist(), candidates.above.tolist(), candidates.left.tolist(), candidates.right.tolist()
+                ), every=1000):
 
-                            c.append(
-                                (item_1.active_arr[y_1,x_1] & item_2.active_arr[y_2,x_2]).implies(
-                                    any(consequence)
-                                )
-                            )
+                # items die zeker overlappen, haalde niet veel uit, zelfde aantal constraints, klein beetje sneller (0.5s), ook iets sneller transfer time
+                # -> komt neer op dat één item in een ander ligt
+                if surely_overlapping:
+
+                    if y_2 < min_y_2 and active_2[y_2][x_2]:
+                        c.append(~active_1[y_1][x_1])
+                    elif y_1 < min_y_1 and active_1[y_1][x_1]:
+                        c.append(~active_2[y_2][x_2])
+                    else:
+                        c.append(~all([active_1[y_1][x_1],active_2[y_2][x_2]]))
+                    continue
+
+                pos_x_1 = pos_xs_1[y_1][x_1]
+                pos_x_2 = pos_xs_2[y_2][x_2]
+                pos_y_1 = pos_ys_1[y_1][x_1]
+                pos_y_2 = pos_ys_2[y_2][x_2]
+
+                consequence = []
+                
+                if below:
+                    consequence.append( (pos_y_1 + h_1 <= pos_y_2) )
+                if above:
+                    consequence.append( (pos_y_2 + h_2 <= pos_y_1) )
+                if left:
+                    consequence.append( (pos_x_1 + w_1 <= pos_x_2) )
+                if right:
+                    consequence.append( (pos_x_2 + w_2 <= pos_x_1) )
+
+                c.append(
+                    (active_1[y_1][x_1] & active_2[y_2][x_2]).implies(
+                        any(consequence)
+                    )
+                )
 
     
         # Two items of the same type should not overlap
@@ -205,7 +235,7 @@ class AnchorSBM(AbstractSingleBinModel):
             min_y = item.length_repeats_lower()
             max_y = item.length_repeats_upper()
 
-            for y in range(min_y,max_y+1):
+            for y in checked(range(min_y,max_y+1)):
                 for x in range(x_size):
 
                     # No X overlap
@@ -248,6 +278,92 @@ class AnchorSBM(AbstractSingleBinModel):
 
         return c
 
+    # ---------------------------------------------------------------------------- #
+    #                              Native constraints                              #
+    # ---------------------------------------------------------------------------- #
+
+    @native_constraint
+    def native_unselected_items(self, s:NativeSolver):
+
+        for item in self.single_bin_packing.items:
+            pos_xs = s.vars(item.pos_xs_arr)
+            active = s.vars(item.active_arr)
+
+            y_lower = item.length_repeats_lower()
+            y_upper = item.length_repeats_upper()
+            for y in range(y_lower, y_upper+1):
+                for x in range(item.nr_width_repeats()):
+
+                    # Fix the x-position of an inactive instance to the x-position of the next instance (or the first)
+                    y_next = y+1 if y != y_upper else y_lower
+                    s.model.Add(pos_xs[y][x] == pos_xs[y_next][x]).OnlyEnforceIf(active[y][x].Not())
+
+    @native_constraint
+    def native_within_bin(self, s:NativeSolver):
+        length = s.var(self.single_bin_packing.bin.length)
+
+        for item in self.single_bin_packing.items:
+            pos_ys = s.vars(item.pos_ys_arr)
+            active = s.vars(item.active_arr)
+
+            l = max(((self.single_bin_packing.bin.min_length // item.height - 1), 0))
+            for y in range(l,item.nr_length_repeats()):
+                for x in range(item.nr_width_repeats()):
+                    s.model.Add(pos_ys[y][x] + item.height <= length).OnlyEnforceIf(active[y][x])
+
+    @native_constraint
+    def native_no_overlap(self, s:NativeSolver):
+        x_intervals = []
+        y_intervals = []
+
+        # Every item instance is a rectangle which is only present when active
+        for item in checked(self.single_bin_packing.items):
+            pos_xs = s.vars(item.pos_xs_arr)
+            pos_ys = s.vars(item.pos_ys_arr)
+            active = s.vars(item.active_arr)
+
+            for y in range(item.length_repeats_lower(), item.length_repeats_upper()+1):
+                for x in range(item.nr_width_repeats()):
+                    x_intervals.append(s.optional_interval(pos_xs[y][x], item.width, active[y][x]))
+                    y_intervals.append(s.optional_interval(pos_ys[y][x], item.height, active[y][x]))
+
+        s.model.AddNoOverlap2D(x_intervals, y_intervals)
+
+    @native_constraint
+    def native_bin_capacity(self, s:NativeSolver):
+        # The total sum of the packed items' areas should not exceed the total bin area
+        s.model.Add(
+            sum([item.item.area*a for item in self.single_bin_packing.items for a in s.vars(item.active)])
+                <= self.single_bin_packing.bin.width*s.var(self.single_bin_packing.bin.length)
+        )
+
+    def native_constraints(self, s:NativeSolver):
+
+        start = timer()
+
+        c_functions = [
+            self.native_item_count,
+            self.native_item_selection,
+            self.native_no_overlap,
+            self.native_bin_height,
+            self.native_bin_capacity,
+            self.native_unselected_items
+        ]
+
+        if self.machine_config.min_length != self.machine_config.max_length:
+            c_functions.append(
+                self.native_within_bin
+            )
+
+        for c_f in c_functions:
+            c_f(s)
+
+        # Constraints without native counterpart (e.g. from extensions)
+        s.add(self.constraints)
+
+        end = timer()
+        self.stats.constraint_time = end-start
+
 
     def get_constraints(self):
         c = []
@@ -297,6 +413,13 @@ class AnchorSBM(AbstractSingleBinModel):
 
     def get_variables(self):
         return self.single_bin_packing.get_variables()
+
+    '''
+    Hint a constructive packing (see HeuristicSBM)
+    '''
+    def hint_heuristic(self, methods: list[str] = None):
+        (placement, length) = place(self.single_bin_packing, methods)
+        hint_packing(self.solution_hint, self.single_bin_packing, placement, length)
     
     def fix(self):
         self.single_bin_packing.fix()
@@ -312,6 +435,7 @@ class AnchorSBM(AbstractSingleBinModel):
         return self.stats
 
     def visualise(self):
+        from .Visualiser import show_bin_packing
         return show_bin_packing(self.single_bin_packing)
 
 # Extension to stats datatype
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from .item_packing import ItemPacking
+
+
+@dataclass
+class OverlapCandidates:
+
+    '''
+    Pairs of grid cells (of two different item packings) whose item instances could overlap.
+    '''
+
+    y_1: npt.NDArray[np.int_]               # length index of the instance of the first item
+    x_1: npt.NDArray[np.int_]               # width index of the instance of the first item
+    y_2: npt.NDArray[np.int_]               # length index of the instance of the second item
+    x_2: npt.NDArray[np.int_]               # width index of the instance of the second item
+
+    surely_overlapping: npt.NDArray[np.bool_]   # if both instances overlap wherever they are placed
+
+    below: npt.NDArray[np.bool_]    # if the first instance can lie below the second
+    above: npt.NDArray[np.bool_]    # if the first instance can lie above the second
+    left: npt.NDArray[np.bool_]     # if the first instance can lie left of the second
+    right: npt.NDArray[np.bool_]    # if the first instance can lie right of the second
+
+    def __len__(self):
+        return len(self.y_1)
+
+
+def ceil_div(a, b):
+    return -((-a) // b)
+
+def index_bounds(i_1, s_1, s_2, max_i_2):
+
+    # i2*s2 + 2*s2-1 > i1*s1
+    lower = np.maximum(ceil_div(i_1*s_1 - 2*s_2 + 1, s_2), 0)
+
+    # i1*s1 + 2*s1-1 > i2*s2
+    upper = np.minimum(((i_1+2)*s_1 - 1) // s_2, max_i_2)
+
+    return lower, upper
+
+'''
+Compute all pairs of grid cells of two item packings which need a non-overlap constraint,
+together with the classification of each pair based on the movement range of both cells.
+'''
+def overlap_candidates(item_1: ItemPacking, item_2: ItemPacking) -> OverlapCandidates:
+
+    # Get item packing index ranges
+    max_y_1, max_y_2 = item_1.length_repeats_upper(), item_2.length_repeats_upper()
+    max_x_1, max_x_2 = item_1.nr_width_repeats(), item_2.nr_width_repeats()
+
+    # Get item shapes
+    w_1, w_2 = item_1.width, item_2.width
+    h_1, h_2 = item_1.height, item_2.height
+
+    # Range of instances of the second item that are close enough to an instance of the first item
+    ys_1, ys_2 = np.arange(max_y_1+1), np.arange(max_y_2+1)
+    xs_1, xs_2 = np.arange(max_x_1), np.arange(max_x_2)
+
+    y_2_lower, y_2_upper = index_bounds(ys_1, h_1, h_2, max_y_2)
+    x_2_lower, x_2_upper = index_bounds(xs_1, w_1, w_2, max_x_2-1)
+
+    close_y = (ys_2 >= y_2_lower[:,None]) & (ys_2 <= y_2_upper[:,None])
+    close_x = (xs_2 >= x_2_lower[:,None]) & (xs_2 <= x_2_upper[:,None])
+
+    # All combinations, ordered by (y_1, x_1, y_2, x_2)
+    y_1, x_1, y_2, x_2 = np.nonzero(close_y[:,None,:,None] & close_x[None,:,None,:])
+
+    # Movement range of both instances
+    a_1 = item_2.max_move_x[y_2,x_2]
+    c_1 = w_2 + item_2.min_move_x[y_2,x_2]
+    b_1 = item_2.max_move_y[y_2,x_2]
+    d_1 = h_2 + item_2.min_move_y[y_2,x_2]
+
+    a_2 = item_1.max_move_x[y_1,x_1]
+    c_2 = w_1 + item_1.min_move_x[y_1,x_1]
+    b_2 = item_1.max_move_y[y_1,x_1]
+    d_2 = h_1 + item_1.min_move_y[y_1,x_1]
+
+    # Items that surely overlap, i.e. one item always lies in the other
+    surely_overlapping = \
+        (np.minimum(d_1,d_2) > np.maximum(b_1,b_2)) & \
+        (np.minimum(c_1,c_2) > np.maximum(a_1,a_2))
+
+    return OverlapCandidates(
+        y_1 = y_1,
+        x_1 = x_1,
+        y_2 = y_2,
+        x_2 = x_2,
+        surely_overlapping = surely_overlapping,
+        below = y_1*h_1 <= y_2*h_2,
+        above = y_2*h_2 <= y_1*h_1,
+        left = x_1*w_1 <= x_2*w_2,
+        right = x_2*w_2 <= x_1*w_1,
+    )
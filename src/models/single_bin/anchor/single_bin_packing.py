@@ -30,6 +30,13 @@ class SingleBinPacking(AbstractSingleBinPacking):
     def items_unique(self) -> list[AbstractItemPacking]:
         return self._items
 
+    # Index in items_unique of every item packing (a square item has no rotated item packing)
+    @property
+    def unique_indices(self) -> list[int]:
+        index = {x.item.ID: i for (i, x) in enumerate(self._items)}
+        return [index[x.item.ID] for x in self.items]
+
     @property
     def counts(self):
-        return cpm_array([x.count + x_r.count for (x,x_r) in zip(self.items_rotated(False), self.items_rotated(True))])
\ No newline at end of file
+        rotated = {x_r.item.ID: x_r for x_r in self._items_rotated}
+        return cpm_array([x.count + rotated[x.item.ID].count if x.item.ID in rotated else x.count for x in self._items])
\ No newline at end of file
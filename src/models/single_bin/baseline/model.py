@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import itertools
+import math
 import numpy as np
 
 from src.data_structures.machine_config import MachineConfig
 from src.data_structures.problem.colored_single_bin_problem import ColoredSingleBinProblem
 from src.data_structures.bin import Bin
 from src.models.single_bin.baseline.item_packing import ItemPacking
-from src.models.abstract_model import AbstractSingleBinModel, constraint
+from src.models.abstract_model import AbstractSingleBinModel, constraint, native_constraint, ModelSize
 from src.models.constraints import non_overlap
+from src.utils.native_solver import NativeSolver
+from src.utils.deadline import checked
 
-from .Visualiser import show_bin_packing
 from .single_bin_packing import SingleBinPacking
 
 from cpmpy.expressions.python_builtins import sum as cpm_sum
@@ -53,6 +55,24 @@ class BaselineSBM(AbstractSingleBinModel):
     def get_name():
         return "Baseline"
 
+    '''
+    Size of the model from the maximal number of instances of each item, without creating any variable.
+    Every pair of instances has a non-overlap constraint on the rotation dependent shapes, flattened in 14.
+    '''
+    @classmethod
+    def estimate_size(cls, problem) -> ModelSize:
+        max_counts = [math.floor((problem.machine_width*problem.machine_max_length)/(w*h)) for (w,h) in zip(problem.widths, problem.heights)]
+        nr_items, nr_instances = len(max_counts), sum(max_counts)
+        nr_pairs = nr_instances*(nr_instances-1)//2
+        nr_ordered = sum(max(max_count-1, 0) for max_count in max_counts)
+
+        return ModelSize(
+            # pos_xs, pos_ys, active and rotations per instance, count and selected per item and the bin length
+            nr_variables = 4*nr_instances + 2*nr_items + 1,
+            # item_active, item_count, item_selection, within_bin, no_overlap, anti_symmetry and bin_height
+            nr_constraints = nr_instances + 2*nr_items + 2*nr_instances + nr_pairs + nr_ordered + 2,
+            nr_flat_constraints = nr_instances + 2*nr_items + 8*nr_instances + 14*nr_pairs + 6*nr_ordered + 2,
+        )
 
     # ---------------------------------------------------------------------------- #
     #                                  Constraits                                  #
@@ -73,13 +93,14 @@ class BaselineSBM(AbstractSingleBinModel):
         c = []
 
         for item in self.single_bin_packing.items:
+            (widths, heights) = (item.widths, item.heights)
             for i_instance in range(item.max_count):
                 pxs = item.pos_xs[i_instance]
                 pys = item.pos_ys[i_instance]
                 # stay within the width
-                c.append(pxs <= self.single_bin_packing.bin.width - item.widths[i_instance])
+                c.append(pxs <= self.single_bin_packing.bin.width - widths[i_instance])
                 # stay within the height
-                c.append(pys + item.heights[i_instance] <= self.single_bin_packing.bin.length)
+                c.append(pys + heights[i_instance] <= self.single_bin_packing.bin.length)
   
         return c
     
@@ -87,30 +108,34 @@ class BaselineSBM(AbstractSingleBinModel):
     def no_overlap(self):
         c = []
 
+        # Shapes of the instances, computed once per item
+        items = self.single_bin_packing.items
+        (widths, heights) = ([item.widths for item in items], [item.heights for item in items])
+
         # Two items of different type should not overlap
-        for (item_1, item_2) in itertools.combinations(self.single_bin_packing.items, 2):
-            for (i_instance_1, i_instance_2) in itertools.product(range(item_1.max_count), range(item_2.max_count)):
+        for ((i_1, item_1), (i_2, item_2)) in checked(itertools.combinations(enumerate(items), 2)):
+            for (i_instance_1, i_instance_2) in checked(itertools.product(range(item_1.max_count), range(item_2.max_count)), every=1000):
                 
                 c.append(
                     (
                         (item_1.active[i_instance_1]) & (item_2.active[i_instance_2])
                     ).implies(
-                        non_overlap(item_1.pos_xs[i_instance_1], item_1.pos_ys[i_instance_1], item_1.widths[i_instance_1], item_1.heights[i_instance_1],
-                                    item_2.pos_xs[i_instance_2], item_2.pos_ys[i_instance_2], item_2.widths[i_instance_2], item_2.heights[i_instance_2])
+                        non_overlap(item_1.pos_xs[i_instance_1], item_1.pos_ys[i_instance_1], widths[i_1][i_instance_1], heights[i_1][i_instance_1],
+                                    item_2.pos_xs[i_instance_2], item_2.pos_ys[i_instance_2], widths[i_2][i_instance_2], heights[i_2][i_instance_2])
                     )
 
                 )
         
         # Two items of the same type should not overlap
-        for item in self.single_bin_packing.items:
-            for (i_instance_1, i_instance_2) in itertools.combinations(range(item.max_count), 2): 
+        for (i, item) in enumerate(items):
+            for (i_instance_1, i_instance_2) in checked(itertools.combinations(range(item.max_count), 2), every=1000): 
 
                 c.append(
                     (
                         (item.active[i_instance_1]) & (item.active[i_instance_2])
                     ).implies(
-                        non_overlap(item.pos_xs[i_instance_1], item.pos_ys[i_instance_1], item.widths[i_instance_1], item.heights[i_instance_1],
-                                    item.pos_xs[i_instance_2], item.pos_ys[i_instance_2], item.widths[i_instance_2], item.heights[i_instance_2])
+                        non_overlap(item.pos_xs[i_instance_1], item.pos_ys[i_instance_1], widths[i][i_instance_1], heights[i][i_instance_1],
+                                    item.pos_xs[i_instance_2], item.pos_ys[i_instance_2], widths[i][i_instance_2], heights[i][i_instance_2])
                     )
                 )
 
@@ -139,6 +164,85 @@ class BaselineSBM(AbstractSingleBinModel):
         
         return c
 
+    # ---------------------------------------------------------------------------- #
+    #                              Native constraints                              #
+    # ---------------------------------------------------------------------------- #
+
+    # Widths and heights of the instances as linear expressions of their rotation
+    def native_shapes(self, s:NativeSolver, item: ItemPacking):
+        rotations = s.vars(item.rotations) if item.max_count != 1 else [s.vars(item.rotations)]
+        widths = [item.item.height + (item.item.width - item.item.height)*rotation for rotation in rotations]
+        heights = [item.item.width + (item.item.height - item.item.width)*rotation for rotation in rotations]
+        return widths, heights
+
+    @native_constraint
+    def native_item_active(self, s:NativeSolver):
+        for item in self.single_bin_packing.items:
+            count = s.var(item.count)
+            for (i_instance, active) in enumerate(s.vars(item.active)):
+                s.model.Add(count > i_instance).OnlyEnforceIf(active)
+                s.model.Add(count <= i_instance).OnlyEnforceIf(active.Not())
+
+    @native_constraint
+    def native_within_bin(self, s:NativeSolver):
+        length = s.var(self.single_bin_packing.bin.length)
+
+        for item in self.single_bin_packing.items:
+            pos_xs, pos_ys = s.vars(item.pos_xs), s.vars(item.pos_ys)
+            widths, heights = self.native_shapes(s, item)
+            for i_instance in range(item.max_count):
+                # stay within the width
+                s.model.Add(pos_xs[i_instance] <= self.single_bin_packing.bin.width - widths[i_instance])
+                # stay within the height
+                s.model.Add(pos_ys[i_instance] + heights[i_instance] <= length)
+
+    @native_constraint
+    def native_no_overlap(self, s:NativeSolver):
+        x_intervals = []
+        y_intervals = []
+
+        # Every item instance is a rectangle which is only present when active
+        for item in checked(self.single_bin_packing.items):
+            pos_xs, pos_ys, active = s.vars(item.pos_xs), s.vars(item.pos_ys), s.vars(item.active)
+            widths, heights = self.native_shapes(s, item)
+            for i_instance in range(item.max_count):
+                x_intervals.append(s.optional_interval(pos_xs[i_instance], widths[i_instance], active[i_instance], self.single_bin_packing.bin.width))
+                y_intervals.append(s.optional_interval(pos_ys[i_instance], heights[i_instance], active[i_instance], self.single_bin_packing.bin.max_length))
+
+        s.model.AddNoOverlap2D(x_intervals, y_intervals)
+
+    @native_constraint
+    def native_anti_symmetry(self, s:NativeSolver):
+
+        # Items of the same type have a predetermined spacial order
+        for item in self.single_bin_packing.items:
+            pos_xs, pos_ys, active = s.vars(item.pos_xs), s.vars(item.pos_ys), s.vars(item.active)
+            for (i_instance_1, i_instance_2) in itertools.pairwise(range(item.max_count)):
+
+                both_active = [active[i_instance_1], active[i_instance_2]]
+                left = s.model.NewBoolVar("")
+                s.model.Add(pos_xs[i_instance_1] < pos_xs[i_instance_2]).OnlyEnforceIf(both_active + [left])
+                s.model.Add(pos_xs[i_instance_1] == pos_xs[i_instance_2]).OnlyEnforceIf(both_active + [left.Not()])
+                s.model.Add(pos_ys[i_instance_1] < pos_ys[i_instance_2]).OnlyEnforceIf(both_active + [left.Not()])
+
+    def native_constraints(self, s:NativeSolver):
+
+        c_functions = [
+            self.native_item_active,
+            self.native_item_count,
+            self.native_item_selection,
+            self.native_within_bin,
+            self.native_no_overlap,
+            self.native_anti_symmetry,
+            self.native_bin_height,
+        ]
+
+        for c_f in c_functions:
+            c_f(s)
+
+        # Constraints without native counterpart (e.g. from extensions)
+        s.add(self.constraints)
+
 
     def get_constraints(self):
         c = []
@@ -196,5 +300,6 @@ class BaselineSBM(AbstractSingleBinModel):
         return self.stats
     
     def visualise(self):
+        from .Visualiser import show_bin_packing
         return show_bin_packing(self.single_bin_packing)
             
\ No newline at end of file
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True)
+class GuillotineIndex:
+
+    '''
+    Index of the feasible (pattern, strip, cut, item) combinations of CP-Guillotine.
+    A strip of width w can only be placed after a strips of at least that width (S2),
+    and the pth pattern is at most max_length/(p+1) long (S1), which bounds the number of cuts per width class.
+    '''
+
+    P: int                      # upper limit on number of cutting patterns
+    A: int                      # upper bound on number of strips
+    B: int                      # upper bound on number of vertical cuts
+    bin_width: int
+    max_length: int
+    widths: list[int]           # unique widths (sorted)
+    item_widths: list[int]
+    item_heights: list[int]
+
+    def __post_init__(self):
+        self._strip_widths = {}     # (p,a) -> [w]
+        self._cut_items = {}        # (p,a,b) -> [i]
+        self._strip_items = {}      # (p,a) -> [i]
+        self._item_cuts = {}        # (p,a,i) -> [b]
+        self._item_keys = {}        # i -> [(p,a,b,i)]
+
+        # Items of each width class
+        class_items = [[i for (i,width) in enumerate(self.item_widths) if width == w_width] for w_width in self.widths]
+
+        for p in range(self.P):
+            pattern_length = self.max_length // (p+1)
+            for a in range(self.A):
+                for (w, w_width) in enumerate(self.widths):
+                    if (a+1)*w_width > self.bin_width: continue
+
+                    items = [i for i in class_items[w] if self.item_heights[i] <= pattern_length]
+                    if len(items) == 0: continue
+                    min_height = min(self.item_heights[i] for i in items)
+
+                    self._strip_widths.setdefault((p,a), []).append(w)
+                    for i in items:
+                        for b in range(min(self.B, (pattern_length - self.item_heights[i]) // min_height + 1)):
+                            self._cut_items.setdefault((p,a,b), []).append(i)
+                            self._item_cuts.setdefault((p,a,i), []).append(b)
+                            self._item_keys.setdefault(i, []).append((p,a,b,i))
+
+                # Items are kept in index order
+                for b in range(self.B):
+                    if (p,a,b) in self._cut_items: self._cut_items[p,a,b].sort()
+                self._strip_items[p,a] = sorted(set(i for w in self._strip_widths.get((p,a), []) for i in class_items[w] if (p,a,i) in self._item_cuts))
+
+    '''
+    Index of a bin for the given item shapes, with the bounds of CP-Guillotine on the number of patterns, strips and cuts
+    '''
+    @classmethod
+    def init_from_items(cls, bin_width, max_length, item_widths, item_heights) -> GuillotineIndex:
+        widths = sorted(set(item_widths))
+        P = max_length // min(item_heights) # upper limit on number of cutting patterns
+        return cls(
+            P=P, A=bin_width // min(widths), B=P,
+            bin_width=bin_width,
+            max_length=max_length,
+            widths=widths,
+            item_widths=item_widths,
+            item_heights=item_heights,
+        )
+
+    @property
+    def gamma_keys(self) -> list[tuple[int,int,int]]:
+        return [(p,a,w) for (p,a),ws in self._strip_widths.items() for w in ws]
+
+    @property
+    def sigma_keys(self) -> list[tuple[int,int,int,int]]:
+        return [(p,a,b,i) for (p,a,b),items in self._cut_items.items() for i in items]
+
+    # Strips of the pth pattern that can produce a piece
+    def strips(self, p) -> range:
+        return range(len([a for a in range(self.A) if (p,a) in self._strip_widths]))
+
+    # Cuts of the ath strip of the pth pattern that can produce a piece
+    def cuts(self, p, a) -> range:
+        return range(len([b for b in range(self.B) if (p,a,b) in self._cut_items]))
+
+    def strip_widths(self, p, a) -> list[int]:
+        return self._strip_widths.get((p,a), [])
+
+    def strip_items(self, p, a) -> list[int]:
+        return self._strip_items.get((p,a), [])
+
+    def cut_items(self, p, a, b) -> list[int]:
+        return self._cut_items.get((p,a,b), [])
+
+    def item_cuts(self, p, a, i) -> list[int]:
+        return self._item_cuts.get((p,a,i), [])
+
+    def item_keys(self, i) -> list[tuple[int,int,int,int]]:
+        return self._item_keys.get(i, [])
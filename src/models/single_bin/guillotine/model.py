@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import itertools
 import numpy as np
-import matplotlib.pyplot as plt
 
-from src.models.abstract_model import AbstractSingleBinModel, constraint
+from src.models.abstract_model import AbstractSingleBinModel, constraint, ModelSize
+from src.utils.deadline import checked
 from src.data_structures.bin import Bin
 from src.data_structures.machine_config import MachineConfig
 
@@ -14,6 +14,7 @@ from cpmpy.expressions.variables import intvar, boolvar
 
 from ..anchor.item_packing import ItemPacking
 from ..anchor.single_bin_packing import SingleBinPacking
+from .index import GuillotineIndex
 
 
 class GuillotineSBM(AbstractSingleBinModel):
@@ -24,6 +25,7 @@ class GuillotineSBM(AbstractSingleBinModel):
 
     ItemPacking = ItemPacking               # item packing datatype
     single_bin_packing = SingleBinPacking   # bin packing datatype
+    restricted_packings = True              # only guillotine packings
 
     def __init__(self, 
                     machine_config: MachineConfig, 
@@ -51,6 +53,60 @@ class GuillotineSBM(AbstractSingleBinModel):
     def get_name():
         return "Guillotine"
 
+    # Index of the items of a problem (in both orientations, squares once), as created by init_variables
+    @classmethod
+    def problem_index(cls, problem) -> GuillotineIndex:
+        widths, heights = [int(w) for w in problem.widths], [int(h) for h in problem.heights]
+        rotated = [(h, w) for (w, h) in zip(widths, heights) if w != h]
+        return GuillotineIndex.init_from_items(problem.machine_width, problem.machine_max_length, widths + [w for (w, _) in rotated], heights + [h for (_, h) in rotated])
+
+    '''
+    Size of the model from the feasible (pattern, strip, cut, item) combinations, without creating any variable.
+    A linear constraint is flattened as is, unless both sides are expressions (an auxiliary variable for one side),
+    the implication between a strip and its first cut is flattened in two.
+    '''
+    @classmethod
+    def estimate_size(cls, problem) -> ModelSize:
+        return cls.estimate_index_size(cls.problem_index(problem), problem.nr_items)
+
+    @classmethod
+    def estimate_index_size(cls, index: GuillotineIndex, nr_items: int) -> ModelSize:
+        P = index.P
+        n = max(P-1, 0) + 2*P + 1 # 1.3 - 1.6
+        nr_auxiliary = 2*P # 1.4 - 1.5
+
+        for p in range(P):
+            strips = index.strips(p)
+            # 1.7 - 1.10, or no pattern without strips
+            n += 2*len(strips) + 1 if len(strips) > 0 else 1
+            nr_auxiliary += max(len(strips)-1, 0) # 1.7
+
+            for a in strips:
+                cuts = index.cuts(p,a)
+                n += len(cuts)-1 + 1 + len(cuts) + 1 # 1.11, first cut, 1.12 and 1.14
+                nr_auxiliary += len(cuts)-1 + 1 # 1.11 and first cut
+
+                # 1.13
+                for b in cuts:
+                    cut_widths = set(index.item_widths[i] for i in index.cut_items(p,a,b))
+                    n += len([w for w in index.strip_widths(p,a) if index.widths[w] in cut_widths])
+
+                # S2 - S3
+                if p < P-1:
+                    if a < len(strips)-1:
+                        n += len(index.strip_widths(p,a+1))
+                    n += sum(len(index.cut_items(p,a,b)) for b in range(len(cuts)-1))
+
+        n += max(P-1, 0) # S1
+        n += nr_items # item counts
+        nr_auxiliary += len(index.item_widths) - nr_items # both orientations, square items have one
+
+        return ModelSize(
+            nr_variables = 2*P + len(index.gamma_keys) + len(index.sigma_keys),
+            nr_constraints = n,
+            nr_flat_constraints = n + nr_auxiliary,
+        )
+
     def init_variables(self):
         self.bin_length = self.single_bin_packing.bin.length # the bin length
         self.bin_width = self.machine_config.width # the bin width
@@ -58,20 +114,44 @@ class GuillotineSBM(AbstractSingleBinModel):
         self.widths = sorted(set([item.width for item in self.items]))
         self.heights = [item.height for item in self.items]
 
-        self.P = self.machine_config.max_length // min(self.heights) # upper limit on number of cutting patterns
         self.Pmin = min(self.widths) # minimum length of cutting pattern
         self.Pmax = self.machine_config.max_length # maximum length of cutting pattern
 
-        self.A = self.bin_width // min(self.widths) # upper bound on number of strips
-        self.B = self.P #self.Pmax // min(self.heights) # upper bound on number of vertical cuts
+        # feasible (pattern, strip, cut, item) combinations
+        self.index = GuillotineIndex.init_from_items(self.bin_width, self.Pmax, [item.width for item in self.items], self.heights)
+
+        self.P = self.index.P # upper limit on number of cutting patterns
+        self.A = self.index.A # upper bound on number of strips
+        self.B = self.index.B # upper bound on number of vertical cuts
 
         self.W = len(self.widths) # number of unique widths
         self.I = len(self.items) # number of items to pack
+        self.unique_indices = self.single_bin_packing.unique_indices # unique item of every item to pack (both orientations)
 
         self.beta = boolvar(self.P) # if the pth cutting pattern exists (is used)
         self.pattern_length = intvar(0,self.Pmax,self.P) # the length of the pth pattern 
-        self.gamma = boolvar((self.P,self.A,self.W)) # if the ath strip of the pth cutting pattern producs a piece of the wth width
-        self.sigma = boolvar((self.P,self.A,self.B,self.I)) # if the bth cut of the ath strip of the pth pattern produces the ith item type
+        self.gamma = {key: boolvar() for key in self.index.gamma_keys} # [p,a,w] if the ath strip of the pth cutting pattern producs a piece of the wth width
+        self.sigma = {key: boolvar() for key in self.index.sigma_keys} # [p,a,b,i] if the bth cut of the ath strip of the pth pattern produces the ith item type
+
+    # Width variables of the ath strip of the pth pattern
+    def strip_gamma(self, p, a):
+        return [self.gamma[p,a,w] for w in self.index.strip_widths(p,a)]
+
+    # Width of the ath strip of the pth pattern
+    def strip_width(self, p, a):
+        return cpm_sum([self.gamma[p,a,w]*self.widths[w] for w in self.index.strip_widths(p,a)])
+
+    # Item variables of the bth cut of the ath strip of the pth pattern
+    def cut_sigma(self, p, a, b):
+        return [self.sigma[p,a,b,i] for i in self.index.cut_items(p,a,b)]
+
+    # Cuts of the ath strip of the pth pattern which produce the ith item
+    def strip_item_sigma(self, p, a, i):
+        return [self.sigma[p,a,b,i] for b in self.index.item_cuts(p,a,i)]
+
+    # All cuts which produce the ith item
+    def item_sigma(self, i):
+        return [self.sigma[key] for key in self.index.item_keys(i)]
 
     def get_constraints_per_type(self):
         return {
@@ -109,49 +189,52 @@ class GuillotineSBM(AbstractSingleBinModel):
 
         # 1.7 - 1.8
         for p in range(self.P):
-            for a in range(self.A-1):
+            for a in range(len(self.index.strips(p))-1):
                 # 1.7
-                c.append(cpm_sum(self.gamma[p,a+1,:]) <= cpm_sum(self.gamma[p,a,:]))
+                c.append(cpm_sum(self.strip_gamma(p,a+1)) <= cpm_sum(self.strip_gamma(p,a)))
 
-            for a in range(self.A):
+            for a in self.index.strips(p):
                 # 1.8
-                c.append(cpm_sum(self.gamma[p,a,:]) <= 1)
+                c.append(cpm_sum(self.strip_gamma(p,a)) <= 1)
+
+            # -> a pattern without strips can not exist
+            if len(self.index.strips(p)) == 0:
+                c.append(~self.beta[p])
+                continue
 
             # 1.9    
             # -> a pattern can only exist if its first strip has a width    
-            c.append(cpm_sum(self.gamma[p,0,:]) >= self.beta[p])
+            c.append(cpm_sum(self.strip_gamma(p,0)) >= self.beta[p])
 
             # 1.10
-            c.append(cpm_sum([cpm_sum(self.gamma[p,:,w])*self.widths[w] for w in range(self.W)]) <= self.bin_width)
+            c.append(cpm_sum([self.strip_width(p,a) for a in self.index.strips(p)]) <= self.bin_width)
 
 
         # 1.11
-        for p in range(self.P):
-            for a in range(self.A):
-                for b in range(self.B-1):
+        for p in checked(range(self.P)):
+            for a in self.index.strips(p):
+                for b in range(len(self.index.cuts(p,a))-1):
                     # 1.11
-                    c.append(cpm_sum(self.sigma[p,a,b+1,:]) <= cpm_sum(self.sigma[p,a,b,:]))
+                    c.append(cpm_sum(self.cut_sigma(p,a,b+1)) <= cpm_sum(self.cut_sigma(p,a,b)))
 
         for p in range(self.P):
-            for a in range(self.A):
+            for a in checked(self.index.strips(p)):
 
-                c.append((cpm_sum(self.gamma[p,a,:]) != 0).implies(cpm_sum(self.sigma[p,a,0,:]) != 0)) 
+                c.append((cpm_sum(self.strip_gamma(p,a)) != 0).implies(cpm_sum(self.cut_sigma(p,a,0)) != 0)) 
 
-                for b in range(self.B):   
+                for b in self.index.cuts(p,a):
                     # 1.12
-                    c.append(cpm_sum(self.sigma[p,a,b,:]) <= 1) 
+                    c.append(cpm_sum(self.cut_sigma(p,a,b)) <= 1) 
 
                     # 1.13
-                    for w in range(self.W):
-                        c.append(
-                            cpm_sum(
-                                [self.sigma[p,a,b,i] for i in range(self.I) if self.items[i].width == self.widths[w]]
-                            ) <= self.gamma[p,a,w]
-                            )
+                    for w in self.index.strip_widths(p,a):
+                        sigma_w = [self.sigma[p,a,b,i] for i in self.index.cut_items(p,a,b) if self.items[i].width == self.widths[w]]
+                        if len(sigma_w) > 0:
+                            c.append(cpm_sum(sigma_w) <= self.gamma[p,a,w])
 
                 # 1.14
                 # -> thus sum of the heights of all items in strip must be at most the length of the pattern
-                c.append(cpm_sum([cpm_sum(self.sigma[p,a,:,i])*self.heights[i] for i in range(self.I)]) <= self.pattern_length[p])
+                c.append(cpm_sum([cpm_sum(self.strip_item_sigma(p,a,i))*self.heights[i] for i in self.index.strip_items(p,a)]) <= self.pattern_length[p])
 
         # 1.15
         # -> min production
@@ -163,22 +246,23 @@ class GuillotineSBM(AbstractSingleBinModel):
         # -> variable domains
 
         # S1
-        for p in range(self.P-1):
+        for p in checked(range(self.P-1)):
             c.append(self.pattern_length[p] >= self.pattern_length[p+1])
 
         # S2
-            for a in range(self.A-1):
-                for w in range(self.W):
-                    c.append(cpm_sum([self.gamma[p,a,w_] for w_ in range(w,self.W)]) >= self.gamma[p,a+1,w])
+            for a in range(len(self.index.strips(p))-1):
+                for w in self.index.strip_widths(p,a+1):
+                    c.append(cpm_sum([self.gamma[p,a,w_] for w_ in self.index.strip_widths(p,a) if w_ >= w]) >= self.gamma[p,a+1,w])
 
         # S3
-            for a in range(self.A):
-                for b in range(self.B-1):
-                    for i in range(self.I):
-                        c.append(cpm_sum([self.sigma[p,a,b,i_] for i_ in range(i,self.I)]) >= self.sigma[p,a,b,i])
+            for a in self.index.strips(p):
+                for b in range(len(self.index.cuts(p,a))-1):
+                    for i in self.index.cut_items(p,a,b):
+                        c.append(cpm_sum([self.sigma[p,a,b,i_] for i_ in self.index.cut_items(p,a,b) if i_ >= i]) >= self.sigma[p,a,b,i])
 
-        for i,count in enumerate(self.single_bin_packing.counts):
-            c.append(count == cpm_sum(self.sigma[:,:,:,i]) + cpm_sum(self.sigma[:,:,:,i+self.I//2]))
+        for (i,count) in enumerate(self.single_bin_packing.counts):
+            sigmas = [cpm_sum(self.item_sigma(i_)) for i_ in range(self.I) if self.unique_indices[i_] == i]
+            c.append(count == (sigmas[0] + sigmas[1] if len(sigmas) == 2 else sigmas[0]))
 
         return c
     
@@ -193,14 +277,14 @@ class GuillotineSBM(AbstractSingleBinModel):
     def get_objective(self):
 
         # Waste
-        o1 = self.bin_width*self.bin_length - cpm_sum([cpm_sum(self.sigma[:,:,:,i])*self.items[i].item.area for i in range(self.I)])
+        o1 = self.bin_width*self.bin_length - cpm_sum([sigma*self.items[i].item.area for ((_,_,_,i),sigma) in self.sigma.items()])
 
         o = o1
 
         return o
     
     def get_variables(self):
-        return self.beta.tolist() + self.pattern_length.tolist() + self.gamma.flatten().tolist() + self.sigma.flatten().tolist()
+        return self.beta.tolist() + self.pattern_length.tolist() + list(self.gamma.values()) + list(self.sigma.values())
     
     
     def fix(self):
@@ -208,9 +292,11 @@ class GuillotineSBM(AbstractSingleBinModel):
 
     def get_stats(self):
 
-        self.stats.total_density = float(np.sum([np.sum(self.sigma[:,:,:,i]).value()*self.items[i].item.area for i in range(self.I)]) / (self.bin_length.value()*self.bin_width))
+        produced = np.array([sum(sigma.value() for sigma in self.item_sigma(i)) for i in range(self.I)])
+
+        self.stats.total_density = float(np.sum([produced[i]*self.items[i].item.area for i in range(self.I)]) / (self.bin_length.value()*self.bin_width))
         self.stats.bin_length = int(self.bin_length.value())
-        self.stats.fulfilled = np.array([np.sum(self.sigma.value()[:,:,:,i]) + np.sum(self.sigma.value()[:,:,:,i+self.I//2]) for i in range(self.I//2)]).astype(int).tolist()
+        self.stats.fulfilled = np.bincount(self.unique_indices, weights=produced, minlength=len(self.single_bin_packing.items_unique)).astype(int).tolist()
         self.stats.counts = np.array(self.single_bin_packing.counts).astype(int).tolist()
 
         self.stats.objective = int(self.o.value())
@@ -221,6 +307,7 @@ class GuillotineSBM(AbstractSingleBinModel):
 
 
     def visualise(self):
+        import matplotlib.pyplot as plt
         np.random.seed(seed=42)
 
         bin_width = self.bin_width
@@ -235,16 +322,16 @@ class GuillotineSBM(AbstractSingleBinModel):
         ax.set_xlim((0, 1))
         ax.set_ylim((0, 1))
 
-        cmap = get_cmap(self.I//2)
+        cmap = get_cmap(len(self.single_bin_packing.items_unique))
 
         pattern_height = 0
         for p in range(self.P):
             strip_width = 0
-            for a in range(self.A):
+            for a in self.index.strips(p):
                 cut_height = 0
                 max_width = 0
-                for b in range(self.B):
-                    for i in range(self.I):
+                for b in self.index.cuts(p,a):
+                    for i in self.index.cut_items(p,a,b):
                         if (self.sigma[p,a,b,i].value()):
 
                             ax.add_patch(
@@ -256,7 +343,7 @@ class GuillotineSBM(AbstractSingleBinModel):
                                     self.items[i].height/bin_height,
                                     self.items[i].width/bin_width,
                                     edgecolor='black',
-                                    facecolor=cmap(i%(self.I//2)),
+                                    facecolor=cmap(self.unique_indices[i]),
                                 )
                             )
                             
@@ -265,7 +352,7 @@ class GuillotineSBM(AbstractSingleBinModel):
                             cut_height += self.items[i].height
                             break
 
-                strip_width += sum(self.gamma[p,a,:].value()*self.widths)
+                strip_width += self.strip_width(p,a).value()
 
             pattern_height += self.pattern_length[p].value()
   
@@ -273,4 +360,5 @@ class GuillotineSBM(AbstractSingleBinModel):
 def get_cmap(n, name='tab20'):
     '''Returns a function that maps each index in 0, 1, ..., n-1 to a distinct 
     RGB color; the keyword argument name must be a standard mpl colormap name.'''
+    import matplotlib.pyplot as plt
     return plt.cm.get_cmap(name, n)
@@ -8,7 +8,7 @@ from ..anchor.single_bin_packing import SingleBinPacking
 from ..anchor.item_packing import ItemPacking
 
 from src.data_structures.bin import Bin
-from src.models.abstract_model import constraint
+from src.models.abstract_model import constraint, ModelSize
 from src.data_structures.machine_config import MachineConfig
 
 
@@ -24,9 +24,9 @@ class GuillotineAbsolutePosSBM(GuillotineSBM):
                 ):
         super().__init__(machine_config, single_bin_packing)
 
-        # Additional absolute positional variables
-        self.pos_xs = intvar(0, self.bin_width, (self.P ,self.A, self.B, self.I))
-        self.pos_ys = intvar(0, self.single_bin_packing.bin.max_length , (self.P ,self.A, self.B, self.I))
+        # Additional absolute positional variables [p,a,b,i]
+        self.pos_xs = {key: intvar(0, self.bin_width) for key in self.index.sigma_keys}
+        self.pos_ys = {key: intvar(0, self.single_bin_packing.bin.max_length) for key in self.index.sigma_keys}
 
     @classmethod
     def init_from_problem(cls, problem) -> GuillotineAbsolutePosSBM:
@@ -44,6 +44,12 @@ class GuillotineAbsolutePosSBM(GuillotineSBM):
     
     def get_name():
         return "GuillotineAbsolute"
+
+    # Size of CP-Guillotine with the absolute positions of each (pattern, strip, cut, item) combination
+    @classmethod
+    def estimate_index_size(cls, index, nr_items) -> ModelSize:
+        n = 2*len(index.sigma_keys)
+        return super().estimate_index_size(index, nr_items) + ModelSize(nr_variables=n, nr_constraints=n+1, nr_flat_constraints=n+1)
     
     @constraint
     def bin_length_link(self):
@@ -56,18 +62,18 @@ class GuillotineAbsolutePosSBM(GuillotineSBM):
         pattern_height = 0
         for p in range(self.P): # go over patterns
             strip_width = 0
-            for a in range(self.A): # go over strips
+            for a in self.index.strips(p): # go over strips
                 cut_height = 0
       
-                for b in range(self.B): # go over vertical cuts
-                    for i in range(self.I): # go over items
+                for b in self.index.cuts(p,a): # go over vertical cuts
+                    for i in self.index.cut_items(p,a,b): # go over items
 
                         c.append(self.pos_xs[p,a,b,i] == strip_width)
                         c.append(self.pos_ys[p,a,b,i] == pattern_height+cut_height)
                     
                         cut_height += self.items[i].height*self.sigma[p,a,b,i]
 
-                strip_width += sum(self.gamma[p,a,:]*self.widths) #max_width
+                strip_width += self.strip_width(p,a) #max_width
 
             pattern_height += self.pattern_length[p]
 
@@ -83,7 +89,7 @@ class GuillotineAbsolutePosSBM(GuillotineSBM):
         return c
 
     def get_variables(self):
-        return super().get_variables() + self.pos_xs.flatten().tolist() + self.pos_ys.flatten().tolist()
+        return super().get_variables() + list(self.pos_xs.values()) + list(self.pos_ys.values())
     
     def get_objective(self):
 
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from timeit import default_timer as timer
+
+import numpy as np
+import numpy.typing as npt
+
+from src.data_structures.bin import Bin
+from src.data_structures.machine_config import MachineConfig
+from src.models.abstract_model import AbstractSingleBinModel
+from src.models import objectives
+from src.utils.configuration import Configuration
+from src.utils.solution_hint import SolutionHint
+
+from ..anchor.single_bin_packing import SingleBinPacking
+from ..anchor.item_packing import ItemPacking
+from .packers import Placement, packers, best_cut
+
+
+class HeuristicSBM(AbstractSingleBinModel):
+
+    '''
+    Constructive (shelf, skyline or maximal rectangles) packing heuristic,
+    which results in a fixed CP-Anchor bin packing
+    '''
+
+    ItemPacking = ItemPacking               # item packing datatype
+    single_bin_packing = SingleBinPacking   # bin packing datatype
+
+    # Constructor
+    def __init__(self,
+                    machine_config: MachineConfig,
+                    single_bin_packing: SingleBinPacking,
+                    methods: list[str] = None,
+                ):
+        super().__init__(machine_config, single_bin_packing)
+
+        # Packers to try, the one with the least waste is kept
+        self.methods = list(packers.keys()) if methods is None else methods
+
+    # Alternative constructor from problem formulation
+    @classmethod
+    def init_from_problem(cls, problem) -> HeuristicSBM:
+
+        # Create packing variables
+        sbp = SingleBinPacking(
+                _items=problem.get_item_packing(ItemPacking),
+                _items_rotated=problem.get_item_packing_rotated(ItemPacking),
+                bin=Bin(config=problem.get_bin_config()),
+            )
+
+        # Construct the model
+        return cls(
+            problem.get_machine_config(),
+            sbp,
+        )
+
+    # Name of the model
+    def get_name():
+        return "Heuristic"
+
+    def get_constraints(self):
+        return []
+
+    def get_objective(self):
+        return objectives.waste(self.single_bin_packing)
+
+    def get_variables(self):
+        return []
+
+    def solve(self, config:Configuration=None, max_time_in_seconds=1, constraint_creation_timeout=None, constraint_transfer_timeout=None):
+
+        start_s = timer()
+        (placement, length) = place(self.single_bin_packing, self.methods)
+        fix_packing(self.single_bin_packing, placement, length)
+        end_s = timer()
+        self.stats.solve_time = end_s - start_s
+        self.stats.status = "FEASIBLE"
+
+        self.sat = True
+        return True
+
+    def fix(self):
+        self.single_bin_packing.fix()
+
+    def get_repeats(self):
+        return sum([item.nr_width_repeats()*item.nr_length_repeats() for item in self.single_bin_packing.items])
+
+    def get_stats(self):
+        self.stats.objective = int(self.get_objective())
+        self.stats.nr_variables = 0
+        self.stats.constraints = self.constraints_stats
+        self.stats.total_density = float(self.single_bin_packing.density)
+        self.stats.bin_length = int(self.single_bin_packing.bin.length)
+        self.stats.fulfilled = np.array(self.single_bin_packing.counts).astype(int).tolist()
+        self.stats.counts = np.array(self.single_bin_packing.counts).astype(int).tolist()
+
+        return self.stats
+
+    def visualise(self):
+        from ..anchor.Visualiser import show_bin_packing
+        return show_bin_packing(self.single_bin_packing)
+
+
+'''
+Best placement (and bin length) of the items of a bin packing over the given packers
+'''
+def place(single_bin_packing: SingleBinPacking, methods: list[str] = None) -> tuple[Placement, int]:
+    items = single_bin_packing.items
+    widths = np.array([item.width for item in items], dtype=np.int64)
+    heights = np.array([item.height for item in items], dtype=np.int64)
+    bin = single_bin_packing.bin
+
+    best = None
+    for method in (packers.keys() if methods is None else methods):
+        placement = packers[method](widths, heights, bin.width, bin.max_length)
+        (placement, length, waste) = best_cut(placement, widths, heights, bin.width, bin.min_length, bin.max_length)
+        if best is None or waste < best[2]:
+            best = (placement, length, waste)
+
+    return best[:2]
+
+'''
+Positions of the placed instances of an item on its anchor grid [length repeats x width repeats].
+Inactive instances take the x-position of the next active instance in their column (see AnchorSBM.unselected_items).
+'''
+def anchor_grid(item: ItemPacking, xs: npt.NDArray[np.int_], ys: npt.NDArray[np.int_]):
+    shape = (item.nr_length_repeats(), item.nr_width_repeats())
+
+    pos_xs = np.tile(np.arange(shape[1])*item.width, (shape[0],1))
+    pos_ys = np.tile((np.arange(shape[0])*item.height)[:,None], (1,shape[1]))
+    active = np.zeros(shape, dtype=bool)
+
+    # Non-overlapping instances always have a different anchor, only the first max_count instances are kept (see the count of the item)
+    (xs, ys) = (xs[:item.max_count], ys[:item.max_count])
+    (y_grid, x_grid) = (ys // item.height, xs // item.width)
+
+    pos_xs[y_grid, x_grid] = xs
+    pos_ys[y_grid, x_grid] = ys
+    active[y_grid, x_grid] = True
+
+    for x in np.unique(x_grid):
+        rows = np.flatnonzero(active[:,x])
+        pos_xs[:,x] = pos_xs[rows[np.searchsorted(rows, np.arange(shape[0])) % len(rows)], x]
+
+    return pos_xs, pos_ys, active
+
+'''
+Fix an anchor bin packing to a placement
+'''
+def fix_packing(single_bin_packing: SingleBinPacking, placement: Placement, length: int):
+    for (t, item) in enumerate(single_bin_packing.items):
+        placed = placement.types == t
+        (pos_xs, pos_ys, active) = anchor_grid(item, placement.xs[placed], placement.ys[placed])
+
+        item.fixable_pos_xs_arr.fix_to(pos_xs)
+        item.fixable_pos_ys_arr.fix_to(pos_ys)
+        item.fixable_active.fix_to(active)
+        item.fixable_count.fix_to(np.sum(active))
+        item.fixable_selected.fix_to(np.any(active))
+
+    single_bin_packing.bin.fixable_length.fix_to(length)
+    single_bin_packing.fix()
+
+'''
+Hint the variables of a free anchor bin packing with a placement
+'''
+def hint_packing(solution_hint: SolutionHint, single_bin_packing: SingleBinPacking, placement: Placement, length: int):
+    for (t, item) in enumerate(single_bin_packing.items):
+        placed = placement.types == t
+        (pos_xs, pos_ys, active) = anchor_grid(item, placement.xs[placed], placement.ys[placed])
+
+        solution_hint.add(item.pos_xs_arr, pos_xs)
+        solution_hint.add(item.pos_ys_arr, pos_ys)
+        solution_hint.add(item.active_arr, active)
+        solution_hint.add([item.count, item.selected], [np.sum(active), np.any(active)])
+
+    solution_hint.add([single_bin_packing.bin.length], [length])
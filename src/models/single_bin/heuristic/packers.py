@@ -0,0 +1,226 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@dataclass(kw_only=True)
+class Placement:
+
+    '''
+    Rectangles placed by a constructive packer, the (x,y) position is the lower left corner.
+    Every item type can be placed any number of times.
+    '''
+
+    types: npt.NDArray[np.int_]     # index of the placed item type
+    xs: npt.NDArray[np.int_]        # x-position (along the width)
+    ys: npt.NDArray[np.int_]        # y-position (along the length)
+
+    @classmethod
+    def from_lists(cls, types, xs, ys) -> Placement:
+        return cls(
+            types = np.array(types, dtype=np.int64),
+            xs = np.array(xs, dtype=np.int64),
+            ys = np.array(ys, dtype=np.int64),
+        )
+
+    def tops(self, heights: npt.NDArray[np.int_]) -> npt.NDArray[np.int_]:
+        return self.ys + heights[self.types]
+
+    def areas(self, widths: npt.NDArray[np.int_], heights: npt.NDArray[np.int_]) -> npt.NDArray[np.int_]:
+        return widths[self.types]*heights[self.types]
+
+    def select(self, mask: npt.NDArray[np.bool_]) -> Placement:
+        return Placement(types=self.types[mask], xs=self.xs[mask], ys=self.ys[mask])
+
+
+# ---------------------------------------------------------------------------- #
+#                                    Packers                                   #
+# ---------------------------------------------------------------------------- #
+
+'''
+Shelf packing: the tallest fitting item type opens a shelf over the full width,
+which is filled from left to right with columns of the tallest fitting item types.
+'''
+def shelf_pack(widths: npt.NDArray[np.int_], heights: npt.NDArray[np.int_], bin_width: int, bin_length: int) -> Placement:
+    types, xs, ys = [], [], []
+
+    # Tallest first, then widest
+    order = np.lexsort((-widths, -heights))
+
+    shelf_y = 0
+    while True:
+        fits = (widths[order] <= bin_width) & (heights[order] <= bin_length - shelf_y)
+        if not fits.any(): break
+        shelf_height = heights[order[np.argmax(fits)]]
+
+        x = 0
+        while True:
+            fits = (widths[order] <= bin_width - x) & (heights[order] <= shelf_height)
+            if not fits.any(): break
+            t = order[np.argmax(fits)]
+
+            # Stack copies of the item type in a column of the shelf
+            nr_stacked = shelf_height // heights[t]
+            types.extend([t]*nr_stacked)
+            xs.extend([x]*nr_stacked)
+            ys.extend(shelf_y + heights[t]*np.arange(nr_stacked))
+
+            x += widths[t]
+
+        shelf_y += shelf_height
+
+    return Placement.from_lists(types, xs, ys)
+
+'''
+Skyline packing: each item is placed at the lowest position of the skyline,
+with the least area wasted below it, preferring large items.
+'''
+def skyline_pack(widths: npt.NDArray[np.int_], heights: npt.NDArray[np.int_], bin_width: int, bin_length: int) -> Placement:
+    types, xs, ys = [], [], []
+
+    # Height of the skyline at each unit of the width
+    skyline = np.zeros(bin_width, dtype=np.int64)
+
+    candidates = np.flatnonzero((widths <= bin_width) & (heights <= bin_length))
+    unique_widths = np.unique(widths[candidates])
+    width_types = [candidates[widths[candidates] == w] for w in unique_widths]
+
+    while True:
+        best = None
+        for (w, ts) in zip(unique_widths, width_types):
+            # Lowest position and wasted area below the item, for each x-position
+            windows = sliding_window_view(skyline, w)
+            y = windows.max(axis=1)
+            waste = w*y - windows.sum(axis=1)
+
+            # All (item type, x-position) pairs of this width
+            t = np.repeat(ts, len(y))
+            x = np.tile(np.arange(len(y)), len(ts))
+            y = np.tile(y, len(ts))
+            waste = np.tile(waste, len(ts))
+
+            fits = y + heights[t] <= bin_length
+            if not fits.any(): continue
+
+            keys = np.stack([y[fits], waste[fits], -widths[t[fits]]*heights[t[fits]], x[fits]])
+            i = np.lexsort(keys[::-1])[0]
+            candidate = (keys[:,i].tolist(), t[fits][i])
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+
+        if best is None: break
+        ((y, _, _, x), t) = best
+
+        types.append(t)
+        xs.append(x)
+        ys.append(y)
+        skyline[x:x+widths[t]] = y + heights[t]
+
+    return Placement.from_lists(types, xs, ys)
+
+'''
+Maximal rectangles packing: the free space is kept as a set of maximal free rectangles,
+each item is placed in the free rectangle it fits best (best short side fit).
+'''
+def maxrects_pack(widths: npt.NDArray[np.int_], heights: npt.NDArray[np.int_], bin_width: int, bin_length: int) -> Placement:
+    types, xs, ys = [], [], []
+
+    # Free rectangles [x, y, width, height]
+    free = np.array([[0, 0, bin_width, bin_length]], dtype=np.int64)
+
+    while len(free) > 0:
+        # Leftover sides for each (free rectangle, item type) pair
+        leftover_w = free[:,2,None] - widths[None,:]
+        leftover_h = free[:,3,None] - heights[None,:]
+        fits = (leftover_w >= 0) & (leftover_h >= 0)
+        if not fits.any(): break
+
+        (r, t) = np.nonzero(fits)
+        keys = np.stack([
+            np.minimum(leftover_w, leftover_h)[r,t],    # short side fit
+            np.maximum(leftover_w, leftover_h)[r,t],    # long side fit
+            free[r,1],                                  # lowest
+            free[r,0],                                  # leftmost
+        ])
+        i = np.lexsort(keys[::-1])[0]
+        (r, t) = (r[i], t[i])
+
+        (x, y, w, h) = (free[r,0], free[r,1], widths[t], heights[t])
+        types.append(t)
+        xs.append(x)
+        ys.append(y)
+
+        free = _split_free_rectangles(free, x, y, w, h)
+        free = _prune_free_rectangles(free, widths, heights)
+
+    return Placement.from_lists(types, xs, ys)
+
+'''
+Split the free rectangles intersecting the placed rectangle in (at most) four maximal rectangles
+'''
+def _split_free_rectangles(free, x, y, w, h):
+    (fx, fy, fw, fh) = free.T
+    intersects = (x < fx+fw) & (fx < x+w) & (y < fy+fh) & (fy < y+h)
+    (fx, fy, fw, fh) = free[intersects].T
+    (x, y) = (np.full_like(fx, x), np.full_like(fy, y))
+
+    splits = np.concatenate([
+        np.stack([fx, fy, x-fx, fh], axis=1),                   # left
+        np.stack([x+w, fy, fx+fw-(x+w), fh], axis=1),           # right
+        np.stack([fx, fy, fw, y-fy], axis=1),                   # below
+        np.stack([fx, y+h, fw, fy+fh-(y+h)], axis=1),           # above
+    ])
+    splits = splits[(splits[:,2] > 0) & (splits[:,3] > 0)]
+
+    return np.concatenate([free[~intersects], splits])
+
+'''
+Remove free rectangles which are contained in another free rectangle, or in which no item fits
+'''
+def _prune_free_rectangles(free, widths, heights):
+    fits = ((free[:,2,None] >= widths[None,:]) & (free[:,3,None] >= heights[None,:])).any(axis=1)
+    free = np.unique(free[fits], axis=0)
+
+    (fx, fy, fw, fh) = free.T
+    contained = (
+        (fx[:,None] >= fx[None,:]) & (fy[:,None] >= fy[None,:]) &
+        (fx[:,None]+fw[:,None] <= fx[None,:]+fw[None,:]) & (fy[:,None]+fh[:,None] <= fy[None,:]+fh[None,:])
+    )
+    np.fill_diagonal(contained, False)
+
+    return free[~contained.any(axis=1)]
+
+
+packers = {
+    "shelf": shelf_pack,
+    "skyline": skyline_pack,
+    "maxrects": maxrects_pack,
+}
+
+
+# ---------------------------------------------------------------------------- #
+#                                  Bin length                                  #
+# ---------------------------------------------------------------------------- #
+
+'''
+Cut the placement at the bin length (between min and max length) with the least waste,
+only the rectangles which lie completely below the cut are kept.
+'''
+def best_cut(placement: Placement, widths: npt.NDArray[np.int_], heights: npt.NDArray[np.int_], bin_width: int, min_length: int, max_length: int) -> tuple[Placement, int, int]:
+    tops = placement.tops(heights)
+    areas = placement.areas(widths, heights)
+
+    # Candidate bin lengths
+    lengths = np.unique(np.clip(np.append(tops, min_length), min_length, max_length))
+
+    # Packed area below each candidate length
+    order = np.argsort(tops)
+    packed = np.concatenate([[0], np.cumsum(areas[order])])[np.searchsorted(tops[order], lengths, side="right")]
+
+    waste = bin_width*lengths - packed
+    i = np.argmin(waste)
+
+    return placement.select(tops <= lengths[i]), int(lengths[i]), int(waste[i])
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+
+import multiprocessing as mp
+import queue
+from timeit import default_timer as timer
+
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.problem.single_bin_problem import SingleBinProblem
+from src.data_structures.problem.item_merging import original_stats
+from src.models.abstract_model import AbstractSingleBinModel
+from src.models import objectives
+from src.utils.configuration import Configuration
+from src.utils.deadline import Deadline
+
+
+@dataclass(kw_only=True)
+class PortfolioResult:
+
+    '''
+    Result of one model of the portfolio
+    '''
+
+    model: str                                          # name of the model
+    sat: bool
+    status: str = None                                  # solver exit status (OPTIMAL, FEASIBLE, ...)
+    objective: int = None                               # objective of the model (not comparable over models)
+    waste: int = None                                   # waste of the packing (compared over models)
+    stats: dict = None
+    single_bin_packing: AbstractSingleBinPacking = None # fixed packing
+
+    @property
+    def optimal(self):
+        return self.status == "OPTIMAL"
+
+
+'''
+Solve a single bin problem with a model (in a separate process), the result is put on the queue.
+Model building and solving share the budget of max_time_in_seconds.
+'''
+def _solve_model(model: AbstractSingleBinModel, problem: SingleBinProblem, config: Configuration, max_time_in_seconds, results: mp.Queue):
+    with Deadline(max_time_in_seconds):
+        initialised_model = model.init_from_problem(problem)
+        sat = initialised_model.solve(config=config, max_time_in_seconds=max_time_in_seconds)
+
+    if not sat:
+        results.put(PortfolioResult(model=model.get_name(), sat=False, status=initialised_model.stats.status))
+        return
+
+    initialised_model.get_stats()
+    results.put(PortfolioResult(
+        model=model.get_name(),
+        sat=True,
+        status=initialised_model.stats.status,
+        objective=initialised_model.stats.objective,
+        waste=int(objectives.waste(initialised_model.single_bin_packing)),
+        stats=original_stats(problem, initialised_model.stats),
+        single_bin_packing=initialised_model.single_bin_packing,
+    ))
+
+'''
+Solve a single bin problem with a portfolio of models, each in its own process.
+The models share the wall-clock budget: model building and CP-SAT together stop after max_time_in_seconds,
+and models which did not report within the grace period (sending the result) are cancelled.
+A model over all packings (e.g. Anchor) which proves optimality cancels the others. A model over restricted packings
+(e.g. guillotine packings) does not: it is only optimal over its own packings, so another model can still find less waste.
+Returns the best result (least waste) and the results of all models that reported, or crashed.
+'''
+def solve_portfolio(
+            models: list[AbstractSingleBinModel],
+            problem: SingleBinProblem,
+            config: Configuration = None,
+            max_time_in_seconds=20,
+            grace_in_seconds=5,
+        ) -> tuple[PortfolioResult, list[PortfolioResult]]:
+
+    if config is None:
+        config = Configuration()
+
+    # Share the cores over the models, unless the number of workers is set
+    if config.workers is None:
+        config = replace(config, workers=max(1, mp.cpu_count() // len(models)))
+
+    # Fork keeps the problem (and CPMpy) in the child, without pickling or re-importing
+    context = mp.get_context("fork" if config.linux else "spawn")
+    results = context.Queue()
+
+    processes = [
+        context.Process(target=_solve_model, args=(model, problem, config, max_time_in_seconds, results), daemon=True)
+        for model in models
+    ]
+    for process in processes:
+        process.start()
+
+    restricted = {model.get_name(): model.restricted_packings for model in models}
+    deadline = timer() + max_time_in_seconds + grace_in_seconds
+    reported = []
+    crashed = set()
+    while len(reported) < len(processes) and timer() < deadline:
+        try:
+            result = results.get(timeout=min(1, max(deadline - timer(), 0)))
+        except queue.Empty:
+            # A model which ended without a result (e.g. out of memory) does not report
+            for (model, process) in zip(models, processes):
+                if process.exitcode not in [None, 0] and process not in crashed:
+                    crashed.add(process)
+                    reported.append(PortfolioResult(model=model.get_name(), sat=False, status="CRASH"))
+                    config.log("PORTFOLIO", model.get_name(), "CRASH", process.exitcode)
+            continue
+        reported.append(result)
+        config.log("PORTFOLIO", result.model, result.status, result.waste)
+
+        # No other model can find less waste
+        if result.optimal and not restricted[result.model]:
+            break
+
+    # Cancel the models which did not report in time, or after an optimal model
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    feasible = [result for result in reported if result.sat]
+    best = min(feasible, key=lambda result: result.waste) if len(feasible) > 0 else None
+
+    return best, reported
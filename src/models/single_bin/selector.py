@@ -0,0 +1,208 @@
+from __future__ import annotations
+from dataclasses import dataclass, astuple
+
+import glob
+import json
+import math
+import os
+
+import numpy as np
+
+from src.data_structures.problem.single_bin_problem import SingleBinProblem
+from src.models.abstract_model import AbstractSingleBinModel
+from src.utils.configuration import Configuration
+
+
+@dataclass(kw_only=True)
+class InstanceFeatures:
+
+    '''
+    Cheap features of a single bin problem, computed without creating a model
+    '''
+
+    nr_items: int
+    grid_repeats: float     # log of the number of item placements on a grid (size of CP-Anchor)
+    width_classes: int      # number of distinct item widths, both rotations (size of the guillotine index)
+    area_ratio: float       # mean item area relative to the bin area
+    length_ratio: float     # bin length relative to the bin width
+
+    @classmethod
+    def init_from_problem(cls, problem: SingleBinProblem) -> InstanceFeatures:
+        width, length = problem.machine_width, problem.machine_max_length
+        grid_repeats = sum(
+            max((width // w)*(length // h), (width // h)*(length // w))
+            for (w, h) in zip(problem.widths, problem.heights)
+        )
+
+        return cls(
+            nr_items = problem.nr_items,
+            grid_repeats = math.log(1 + grid_repeats),
+            width_classes = len(set(problem.widths.tolist() + problem.heights.tolist())),
+            area_ratio = float(np.mean(problem.widths*problem.heights)) / (width*length),
+            length_ratio = length / width,
+        )
+
+    def vector(self) -> np.ndarray:
+        return np.array(astuple(self), dtype=float)
+
+
+@dataclass(kw_only=True)
+class Observation:
+
+    '''
+    The best model on a solved problem, from the benchmark results
+    '''
+
+    problem: str
+    features: InstanceFeatures
+    model: str                  # name of the best model
+    density: float              # density of its packing
+    solve_time: float = None    # time to prove optimality, None if not proven
+
+
+@dataclass(kw_only=True)
+class Selection:
+
+    '''
+    Selected model and its time budget
+    '''
+
+    model: type[AbstractSingleBinModel]
+    max_time_in_seconds: int
+    neighbours: list[Observation] = None    # observations the selection is based on
+
+
+'''
+Result JSONs from result_directory/<model>/<problem>_<repeat>.json, written by the benchmark runner (see benchmarks/parallel.py)
+or by the sequential runners (see benchmarks/utils.py). The sequential runners only write the statistics of SAT runs,
+their results get the model from the directory and the file name (problem, possibly with the repeat) as "file".
+'''
+def load_results(result_directory) -> list[dict]:
+    results = []
+    for file_name in sorted(glob.glob(os.path.join(result_directory, "*", "*.json"))):
+        with open(file_name) as f:
+            result = json.load(f)
+        if "problem" not in result:
+            result = {
+                "file": os.path.splitext(os.path.basename(file_name))[0],
+                "model": os.path.basename(os.path.dirname(file_name)),
+                "sat": True,
+                "total_time": result.get("total_time"),
+                "stats": result,
+            }
+        results.append(result)
+    return results
+
+'''
+Problem of a result, for the results of the sequential runners the known problem named by the file (with or without the repeat)
+'''
+def result_problem(result: dict, problem_names) -> str:
+    if "problem" in result:
+        return result["problem"]
+    name = result["file"]
+    return name if name in problem_names else name.rsplit("_", 1)[0]
+
+
+class ModelSelector:
+
+    '''
+    Selects the single bin model for a problem from the models which performed best on the k most similar solved problems (k-nearest neighbours).
+    The best model of a problem has the highest density, up to a tolerance, with the shortest total time.
+    Without observations the first model is selected with the default budget.
+    '''
+
+    def __init__(self,
+                    models: list[type[AbstractSingleBinModel]],
+                    nr_neighbours: int = 5,
+                    default_time: int = 60,    # budget when the neighbours did not prove optimality
+                    time_margin: float = 2.0,  # budget relative to the slowest proof of the neighbours
+                    density_tolerance: float = 0.01,
+                ):
+        self.models = {model.get_name(): model for model in models}
+        self.nr_neighbours = nr_neighbours
+        self.default_time = default_time
+        self.time_margin = time_margin
+        self.density_tolerance = density_tolerance
+
+        self.observations: list[Observation] = []
+
+    '''
+    Learn from benchmark results (as written by the benchmark runner) of the given problems, results of unknown problems or models are ignored
+    '''
+    def fit(self, problems: list[SingleBinProblem], results: list[dict]) -> ModelSelector:
+        problems = {problem.name: problem for problem in problems}
+
+        # Results per problem instance
+        per_problem = {}
+        for result in results:
+            problem = result_problem(result, problems)
+            if problem in problems and result["model"] in self.models:
+                per_problem.setdefault(problem, []).append(result)
+
+        for (name, problem_results) in per_problem.items():
+            solved = [result for result in problem_results if result["sat"] and result["stats"] is not None]
+            if len(solved) == 0:
+                continue
+
+            best_density = max(result["stats"]["total_density"] for result in solved)
+            candidates = [result for result in solved if result["stats"]["total_density"] >= best_density - self.density_tolerance]
+            best = min(candidates, key=lambda result: result["total_time"])
+
+            self.observations.append(Observation(
+                problem = name,
+                features = InstanceFeatures.init_from_problem(problems[name]),
+                model = best["model"],
+                density = best["stats"]["total_density"],
+                solve_time = best["stats"]["solve_time"] if best["stats"]["status"] == "OPTIMAL" else None,
+            ))
+
+        return self
+
+    @classmethod
+    def init_from_results(cls, models: list[type[AbstractSingleBinModel]], problems: list[SingleBinProblem], result_directory, **kwargs) -> ModelSelector:
+        return cls(models, **kwargs).fit(problems, load_results(result_directory))
+
+    # The k observations closest to the features, with their distances (features are standardised over the observations)
+    def neighbours(self, features: InstanceFeatures) -> list[tuple[float, Observation]]:
+        X = np.array([observation.features.vector() for observation in self.observations])
+        mean, std = X.mean(axis=0), X.std(axis=0)
+        std[std == 0] = 1
+
+        distances = np.linalg.norm((X - mean)/std - (features.vector() - mean)/std, axis=1)
+        order = np.argsort(distances, kind="stable")[:self.nr_neighbours]
+        return [(float(distances[i]), self.observations[i]) for i in order]
+
+    def select(self, problem: SingleBinProblem) -> Selection:
+        if len(self.observations) == 0:
+            return Selection(model=next(iter(self.models.values())), max_time_in_seconds=self.default_time, neighbours=[])
+
+        neighbours = self.neighbours(InstanceFeatures.init_from_problem(problem))
+
+        # Closer neighbours have a larger vote
+        votes = {}
+        for (distance, observation) in neighbours:
+            votes[observation.model] = votes.get(observation.model, 0) + 1/(distance + 1e-6)
+        model = max(votes, key=votes.get)
+
+        # Budget from the proofs of optimality of the selected model
+        solve_times = [observation.solve_time for (_, observation) in neighbours if observation.model == model]
+        if None in solve_times:
+            max_time = self.default_time
+        else:
+            max_time = min(self.default_time, max(1, math.ceil(self.time_margin*max(solve_times))))
+
+        return Selection(model=self.models[model], max_time_in_seconds=max_time, neighbours=[observation for (_, observation) in neighbours])
+
+    '''
+    Solve a problem with the selected model, returns the selection, whether it is SAT and the model
+    '''
+    def solve(self, problem: SingleBinProblem, config: Configuration = None) -> tuple[Selection, bool, AbstractSingleBinModel]:
+        if config is None:
+            config = Configuration()
+
+        selection = self.select(problem)
+        config.log("SELECTED", selection.model.get_name(), selection.max_time_in_seconds)
+
+        initialised_model = selection.model.init_from_problem(problem)
+        sat = initialised_model.solve(config=config, max_time_in_seconds=selection.max_time_in_seconds)
+        return selection, sat, initialised_model
@@ -5,10 +5,13 @@ from cpmpy.expressions.python_builtins import max as cpm_max
 from cpmpy.expressions.python_builtins import min as cpm_min
 
 from src.data_structures.machine_config import MachineConfig
+from src.data_structures.problem.colored_single_bin_problem import ColoredSingleBinProblem
+from src.models.abstract_model import ModelSize
 from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
 from src.extensions.creel.models.single_bin.model import CreelModel
 from src.extensions.creel.data_structures.creel_section import CreelSection
 from src.models.single_bin_creel.abstract_single_bin_creel_model import AbstractSBMCreel
+from src.utils.native_solver import NativeSolver
 
 from ...single_bin.anchor.model import AnchorSBM
 
@@ -54,9 +57,18 @@ class AnchorSBMCreel(AnchorSBM, AbstractSBMCreel):
 
         return cpm_all(cc)
 
+    # Size of the bin packing and its creel model (the latter without flattening)
+    @classmethod
+    def estimate_size(cls, problem: ColoredSingleBinProblem) -> ModelSize:
+        return super().estimate_size(problem) + CreelModel.estimate_size(problem)
+
     def get_constraints(self):
         self.constraints.extend(self.creel_model.get_constraints())
         return super().get_constraints()
+
+    def native_constraints(self, s:NativeSolver):
+        self.constraints.extend(self.creel_model.get_constraints())
+        super().native_constraints(s)
     
     def get_name():
         return "AnchorSBM&Creel"
\ No newline at end of file
@@ -7,6 +7,8 @@ from cpmpy.expressions.python_builtins import sum as cpm_sum
 from ...single_bin.anchor.single_bin_packing import SingleBinPacking
 
 from src.data_structures.machine_config import MachineConfig
+from src.data_structures.problem.colored_single_bin_problem import ColoredSingleBinProblem
+from src.models.abstract_model import ModelSize
 from src.extensions.creel.models.single_bin.model import CreelModel
 from src.extensions.creel.data_structures.creel_section import CreelSection
 from src.models.single_bin_creel.abstract_single_bin_creel_model import AbstractSBMCreel
@@ -39,29 +41,34 @@ class GuillotineAbsolutePosSBMCreel(GuillotineAbsolutePosSBM, AbstractSBMCreel):
         pattern_height = 0
         for p in range(self.P): # go over patterns
             strip_width = 0
-            for a in range(self.A): # go over strips
+            for a in self.index.strips(p): # go over strips
 
-                for i in range(self.I): # go over items
+                for i in self.index.strip_items(p,a): # go over items
                     for color in self.items[i].item.color.basic_colors:
                         if a == 0:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2_fixed(strip_width, strip_width+self.items[i].item.width)# strip_width+cpm_sum(self.gamma[p,a,:]*self.widths))
                                 )
                             )
                         else:
                             cc.append(
-                                cpm_any(self.sigma[p,a,:,i]).implies(
+                                cpm_any(self.strip_item_sigma(p,a,i)).implies(
                                     section.color_sections[section.colors.index(color)].is_here_2(strip_width, strip_width+self.items[i].item.width)#strip_width+cpm_sum(self.gamma[p,a,:]*self.widths))
                                 )
                             )
 
-                strip_width += cpm_sum(self.gamma[p,a,:]*self.widths)
+                strip_width += self.strip_width(p,a)
 
             pattern_height += self.pattern_length[p]
 
         return cpm_all(cc)
 
+    # Size of the bin packing and its creel model (the latter without flattening)
+    @classmethod
+    def estimate_size(cls, problem: ColoredSingleBinProblem) -> ModelSize:
+        return super().estimate_size(problem) + CreelModel.estimate_size(problem)
+
     def get_constraints(self):
         self.constraints.extend(self.creel_model.get_constraints())
         return super().get_constraints()
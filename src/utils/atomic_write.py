@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+
+'''
+Write a file atomically: to a temporary file in the same directory, which then replaces the file,
+so a reader (e.g. a parallel worker) never sees a partial file. The temporary file is removed on failure.
+'''
+def write_atomic(file_name, data: str | bytes):
+    directory = os.path.dirname(file_name)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    (handle, temp_name) = tempfile.mkstemp(dir=directory if directory != "" else ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        os.remove(temp_name)
+        raise
+
+'''
+Write a JSON file atomically, the keyword arguments are those of json.dumps (e.g. indent, default)
+'''
+def write_json(file_name, value, **kwargs):
+    write_atomic(file_name, json.dumps(value, **kwargs))
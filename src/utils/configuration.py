@@ -2,9 +2,40 @@ from dataclasses import dataclass
 
 import sys
 
+from ortools.sat import sat_parameters_pb2
+
 @dataclass
 class Configuration:
 
+    native: bool = False    # post constraints directly in CP-SAT instead of transferring a CPMpy model
+    visualise: bool = True  # show intermediate solutions (False for headless runs)
+    max_memory: int = None  # memory budget in MB: model construction stops (as on a timeout) and CP-SAT limits its memory
+    trace_memory: bool = False  # allocated bytes per phase (tracemalloc, slows down model construction)
+    quiet: bool = False     # headless: no rendering, progress printing or stats formatting while solving (results through get_stats)
+    model_cache: str = None # directory of built CP-SAT models reused over runs (see src/utils/model_cache.py)
+
+    # CP-SAT parameters (None for the solver default)
+    workers: int = None                 # number of parallel search workers
+    seed: int = None                    # random seed
+    linearization_level: int = None     # LP relaxation: 0 (none), 1 (default), 2 (full)
+    search_branching: str = None        # e.g. AUTOMATIC_SEARCH, FIXED_SEARCH, PORTFOLIO_SEARCH
+    presolve_iterations: int = None     # presolve rounds, 0 disables presolve
+
+    def __post_init__(self):
+        if self.quiet:
+            self.visualise = False
+
+    '''
+    Progress output, silent in quiet mode
+    '''
+    def log(self, *args):
+        if not self.quiet:
+            print(*args)
+
+    @property
+    def max_memory_bytes(self):
+        return None if self.max_memory is None else self.max_memory*2**20
+
     @property
     def linux(self): return sys.platform == "linux"
 
@@ -13,3 +44,23 @@ class Configuration:
 
     @property
     def mac(self): return sys.platform == "mac"
+
+    '''
+    CP-SAT parameters which are set, as keyword arguments of the solve call
+    '''
+    def solver_parameters(self) -> dict:
+        parameters = {}
+        if self.workers is not None:
+            parameters["num_search_workers"] = self.workers
+        if self.seed is not None:
+            parameters["random_seed"] = self.seed
+        if self.linearization_level is not None:
+            parameters["linearization_level"] = self.linearization_level
+        if self.search_branching is not None:
+            parameters["search_branching"] = sat_parameters_pb2.SatParameters.SearchBranching.Value(self.search_branching)
+        if self.max_memory is not None:
+            parameters["max_memory_in_mb"] = self.max_memory
+        if self.presolve_iterations is not None:
+            parameters["cp_model_presolve"] = self.presolve_iterations > 0
+            parameters["max_presolve_iterations"] = self.presolve_iterations
+        return parameters
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from src.utils.memory import current_rss
+
+
+class TimeoutException(Exception):
+    def __init__(self, msg=''):
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
+
+# Memory budget exceeded, construction stops as on a timeout
+class MemoryLimitException(TimeoutException):
+    pass
+
+
+# Deadline of the current context (thread or asyncio task)
+_current_deadline: ContextVar[Deadline] = ContextVar("deadline", default=None)
+
+
+class Deadline():
+
+    '''
+    Cooperative timeout and cancellation token, which replaces the SIGALRM alarm.
+    Model construction checks it between constraint groups, the transfer between constraints
+    and the solver stops its search when it is cancelled.
+    A nested deadline expires no later than its parent, and is cancelled with it.
+    The current deadline is kept in a context variable, so every thread or task has its own.
+    A deadline can also have a memory budget (RSS in bytes), which is checked at the same points,
+    so model construction stops cleanly instead of the worker being killed when out of memory.
+    An exceeded memory budget is also recorded on the parents (memory_exceeded), e.g. for a caller of a model
+    that catches the exception.
+    '''
+
+    def __init__(self, timeout=None, parent: Deadline = None, max_memory=None):
+        self.parent = parent
+        self.cancelled = False
+        self.memory_exceeded = False
+        self.callbacks = []     # called on cancellation
+
+        self.expires_at = None if timeout is None else monotonic() + timeout
+        if parent is not None and parent.expires_at is not None:
+            self.expires_at = parent.expires_at if self.expires_at is None else min(self.expires_at, parent.expires_at)
+
+        self.max_memory = max_memory
+        if parent is not None and parent.max_memory is not None:
+            self.max_memory = parent.max_memory if self.max_memory is None else min(self.max_memory, parent.max_memory)
+
+    # Current deadline, None if no budget is set
+    @staticmethod
+    def current() -> Deadline:
+        return _current_deadline.get()
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        if self.cancelled or (self.parent is not None and self.parent.expired):
+            return True
+        return self.expires_at is not None and monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise TimeoutException("end of time")
+        if self.max_memory is not None and current_rss() > self.max_memory:
+            deadline = self
+            while deadline is not None:
+                deadline.memory_exceeded = True
+                deadline = deadline.parent
+            raise MemoryLimitException("memory budget exceeded")
+
+    # Can be called from any thread
+    def cancel(self):
+        self.cancelled = True
+        for callback in list(self.callbacks):
+            callback()
+
+    '''
+    Call the callback when this deadline or one of its parents is cancelled, while in the context
+    '''
+    @contextmanager
+    def on_cancel(self, callback):
+        deadlines = []
+        deadline = self
+        while deadline is not None:
+            deadline.callbacks.append(callback)
+            deadlines.append(deadline)
+            deadline = deadline.parent
+        try:
+            yield
+        finally:
+            for deadline in deadlines:
+                deadline.callbacks.remove(callback)
+
+    def __enter__(self):
+        self._token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, *args):
+        _current_deadline.reset(self._token)
+
+
+'''
+Nested budget within the current deadline (no budget for a None timeout or memory budget)
+'''
+def deadline(timeout=None, max_memory=None) -> Deadline:
+    return Deadline(timeout, parent=Deadline.current(), max_memory=max_memory)
+
+'''
+Raise a TimeoutException when the current deadline has expired
+'''
+def check_deadline():
+    current = Deadline.current()
+    if current is not None:
+        current.check()
+
+'''
+Solver time limit within the current deadline
+'''
+def time_limit(max_time_in_seconds):
+    current = Deadline.current()
+    remaining = None if current is None else current.remaining()
+    if remaining is None:
+        return max_time_in_seconds
+    return min(max_time_in_seconds, remaining)
+
+'''
+Iterate while checking the current deadline (and memory budget) every so many items,
+for the loops over pairs of the constraint generators, e.g.
+
+    for (item_1, item_2) in checked(itertools.combinations(items, 2)):
+'''
+def checked(iterable, every=1):
+    for (i, x) in enumerate(iterable):
+        if i % every == 0:
+            check_deadline()
+        yield x
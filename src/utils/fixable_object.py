@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import copy
+from dataclasses import dataclass, fields
 from abc import ABC
 
 
@@ -29,6 +30,8 @@ class FixableObject(ABC):
     '''
     def free(self):
         self.fixed = False
+        for fixable_type in self._fixable_types():
+            fixable_type.free()
         self._post_free()
 
     '''
@@ -36,3 +39,27 @@ class FixableObject(ABC):
     '''
     def _post_free(self):
         pass
+
+    '''
+    Fixed copy, which keeps the current values when the decision variables are freed (and solved) again
+    '''
+    def fixed_copy(self):
+        if not self.fixed:
+            self.fix()
+
+        res = copy.copy(self)
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, FixableObject):
+                setattr(res, f.name, value.fixed_copy())
+            elif isinstance(value, list) and any(isinstance(v, FixableObject) for v in value):
+                setattr(res, f.name, [v.fixed_copy() for v in value])
+            elif getattr(value, "fixable_parent", None) is self:
+                setattr(res, f.name, value.fixed_copy(fixable_parent=res))
+        return res
+
+    '''
+    The fixable types of which this object is the parent
+    '''
+    def _fixable_types(self):
+        return [getattr(self, f.name) for f in fields(self) if getattr(getattr(self, f.name), "fixable_parent", None) is self]
@@ -1,3 +1,4 @@
+import copy
 from dataclasses import dataclass
 from abc import ABCMeta, abstractmethod
 
@@ -6,6 +7,7 @@ import numpy as np
 import numpy.typing as npt
 
 from cpmpy.expressions.variables import NDVarArray, intvar, boolvar
+from cpmpy.expressions.utils import argval
 
 from .fixable_object import FixableObject
 
@@ -52,6 +54,22 @@ class FixableType(Generic[Fixed, Free], metaclass=ABCMeta):
         self.fixed = True
         self.fixed_value = self.fix_value(self.free_value.value())
 
+    # Fix to a given value instead of the solver value
+    def fix_to(self, value):
+        self.fixed = True
+        self.fixed_value = self.fix_value(value)
+
+    def free(self):
+        self.fixed = False
+        self.fixed_value = None
+
+    def fixed_copy(self, fixable_parent: FixableObject):
+        if not self.fixed:
+            self.fix()
+        res = copy.copy(self)
+        res.fixable_parent = fixable_parent
+        return res
+
     def value(self):
         if self.fixable_parent.fixed:
             if (not self.fixed):
@@ -96,33 +114,35 @@ class FixableIntArray(FixableType[FixedIntArray, FreeIntArray], FixableArray):
     def flatten(self):
         return FixableIntArray(fixable_parent=self.fixable_parent, free_value=self.free_value.flatten())
 
+    def fix(self):
+        self.fixed = True
+        self.fixed_value = self.fix_value(self.free_value)
+
     def fix_value(self, value):
         return FixableIntArray._fix_value(value)
     
     def _fix_value(value):
-        a = np.full_like(value, 1)
-        for x in range(value.shape[0]):
-            if (len(value.shape) == 1):
-                a[x] = FixableInt._fix_value(value[x])
-            else:
-                for y in range(value.shape[1]):
-                    a[x,y] = FixableInt._fix_value(value[x,y])
-        return a
+        return array_value(value, np.int64)
     
 
 class FixableBoolArray(FixableType[FixedBoolArray, FreeBoolArray], FixableArray):
     def flatten(self):
         return FixableBoolArray(fixable_parent=self.fixable_parent, free_value=self.free_value.flatten())
     
+    def fix(self):
+        self.fixed = True
+        self.fixed_value = self.fix_value(self.free_value)
+
     def fix_value(self, value):
         return FixableBoolArray._fix_value(value)
 
     def _fix_value(value):
-        a = np.full_like(value, 1)
-        for x in range(value.shape[0]):
-            if (len(value.shape) == 1):
-                a[x] = FixableBool._fix_value(value[x])
-            else:
-                for y in range(value.shape[1]):
-                    a[x,y] = FixableBool._fix_value(value[x,y])
-        return a
\ No newline at end of file
+        return array_value(value, np.bool_)
+
+
+'''
+Values of a (solved) CPMpy array, collected in one typed numpy array
+'''
+def array_value(value, dtype) -> npt.NDArray:
+    value = np.asarray(value)
+    return np.fromiter(map(argval, value.flat), dtype=dtype, count=value.size).reshape(value.shape)
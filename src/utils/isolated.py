@@ -0,0 +1,230 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from timeit import default_timer as timer
+
+import multiprocessing as mp
+import signal
+import traceback
+
+import numpy.typing as npt
+
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.problem.single_bin_problem import SingleBinProblem
+from src.data_structures.problem.multi_bin_problem import MultiBinProblem
+from src.data_structures.problem.item_merging import original_stats
+from src.models.abstract_model import AbstractSingleBinModel, AbstractMultiBinModel
+from src.extensions.due_dates.models.production_model import ProductionModel
+from src.utils.configuration import Configuration
+from src.utils.deadline import Deadline
+from src.utils.memory import current_rss, peak_rss
+from src.utils.solution_export import packing_arrays, production_arrays, fixed_packing_from_arrays, fixed_packings_from_arrays
+
+
+'''
+Solves in a child process, so a model which runs out of memory (e.g. in get_constraints or the transfer to CP-SAT of
+a large Anchor or Guillotine instance) or time only ends the child, not the benchmark or service running it.
+The child gets hard limits (setrlimit) on its data (heap and private mappings) and CPU time, and a wall-clock limit is kept by the parent.
+The data limit is used rather than the address space, which already exceeds a few hundred MB after the imports and grows
+with the memory reserved (not used) per CP-SAT thread. The data is close to the resident memory, so unless configured
+the memory budget of the model (RSS, see Deadline) is half the limit, by which construction usually stops cleanly before the hard limit.
+A failed allocation past the budget is still reported as out of memory. Other failures of native code (a SystemError,
+a signal or an exit code) are only reported as out of memory when the traceback shows a MemoryError
+or the resident memory of the child came near the limit (see NEAR_MEMORY_LIMIT), otherwise as an error or crash.
+The child sends back the compact solution (see solution_export) and the statistics.
+'''
+
+# Outcomes
+SAT = "SAT"
+UNSAT = "UNSAT"             # no solution found (infeasible or within the solver time)
+OUT_OF_MEMORY = "OUT_OF_MEMORY"
+TIMEOUT = "TIMEOUT"         # CPU-time or wall-clock limit
+ERROR = "ERROR"             # exception in the child
+CRASH = "CRASH"             # child ended without a result
+
+NEAR_MEMORY_LIMIT = 0.8     # fraction of the memory limit by which a failure of native code is out of memory
+
+
+@dataclass(kw_only=True)
+class IsolatedResult:
+
+    '''
+    Outcome of an isolated solve
+    '''
+
+    outcome: str
+    stats: dict = None
+    arrays: dict[str, npt.NDArray] = None   # solution values (see solution_export), None if not SAT
+    error: str = None                       # exception (with traceback) or how the child ended
+    exit_code: int = None                   # negative: ended by that signal
+    total_time: float = None
+
+    @property
+    def sat(self) -> bool:
+        return self.outcome == SAT
+
+
+# Hard limits of the child process, memory in MB
+def _set_limits(max_memory=None, cpu_time_seconds=None):
+    import resource
+    if max_memory is not None:
+        resource.setrlimit(resource.RLIMIT_DATA, (max_memory*2**20, max_memory*2**20))
+    if cpu_time_seconds is not None:
+        # SIGXCPU at the soft limit, SIGKILL one second later
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_seconds, cpu_time_seconds + 1))
+
+# Whether the memory (RSS in bytes) is near the memory limit (in MB)
+def _near_limit(memory, max_memory) -> bool:
+    return max_memory is not None and memory is not None and memory >= NEAR_MEMORY_LIMIT*max_memory*2**20
+
+# Solve a single bin problem, returns the outcome, the statistics and the solution values
+def _solve_single_bin(model: AbstractSingleBinModel, problem: SingleBinProblem, config: Configuration, max_time_in_seconds):
+    initialised_model = model.init_from_problem(problem)
+    sat = initialised_model.solve(config=config, max_time_in_seconds=max_time_in_seconds)
+
+    if not sat:
+        return (OUT_OF_MEMORY if initialised_model.stats.status == "MEMORY_LIMIT" else UNSAT), initialised_model.stats.to_dict(), None
+
+    initialised_model.fix()
+    initialised_model.get_stats()
+    return SAT, initialised_model.stats.to_dict(), packing_arrays(initialised_model.single_bin_packing)
+
+# Solve a multi bin problem, returns the outcome, the statistics and the solution values of the final planning
+def _solve_multi_bin(model: AbstractMultiBinModel, production_model: ProductionModel, single_bin_model: AbstractSingleBinModel, problem: MultiBinProblem, config: Configuration, args: dict):
+    # The production models catch an exceeded memory budget, which is recorded on this deadline
+    with Deadline() as budget:
+        initialised_model = model.init_from_problem(problem, production_model, single_bin_model)
+        sat = initialised_model.solve(config=config, args=args)
+    # LNS and iterative models also return their models
+    if isinstance(sat, tuple): (sat, _) = sat
+
+    if not sat:
+        return (OUT_OF_MEMORY if budget.memory_exceeded else UNSAT), None, None
+
+    return SAT, initialised_model.get_stats(), production_arrays(initialised_model.get_production_model())
+
+# Child process: set the limits, solve and send the result
+def _child(connection, solve, solve_args, max_memory, cpu_time_seconds):
+    # The result is sent after the exception is handled, which frees the model
+    try:
+        _set_limits(max_memory, cpu_time_seconds)
+        (outcome, stats, arrays) = solve(*solve_args)
+        result = IsolatedResult(outcome=outcome, stats=stats, arrays=arrays)
+    except MemoryError:
+        result = IsolatedResult(outcome=OUT_OF_MEMORY, error="MemoryError")
+    except SystemError:
+        # Failed allocation in a C extension (e.g. the CPMpy transformations), which does not always raise a MemoryError
+        error = traceback.format_exc()
+        out_of_memory = max_memory is not None and ("MemoryError" in error or _near_limit(peak_rss(), max_memory))
+        result = IsolatedResult(outcome=OUT_OF_MEMORY if out_of_memory else ERROR, error=error)
+    except Exception:
+        result = IsolatedResult(outcome=ERROR, error=traceback.format_exc())
+
+    try:
+        connection.send(result)
+    except (MemoryError, SystemError):
+        # No memory left to send the result, only its outcome
+        connection.send(IsolatedResult(outcome=OUT_OF_MEMORY, error="out of memory when sending the result"))
+    finally:
+        connection.close()
+
+'''
+Run a solve in a child process within the limits, returns the result or how the child ended
+'''
+def run_isolated(solve, solve_args: tuple, max_memory=None, cpu_time_seconds=None, wall_time_seconds=None) -> IsolatedResult:
+    # Spawn, a forked child would share the (thread) state of the parent
+    context = mp.get_context("spawn")
+    (receiver, sender) = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, solve, solve_args, max_memory, cpu_time_seconds), daemon=True)
+
+    start = timer()
+    process.start()
+    sender.close()
+
+    # Receive before joining, a large result does not fit in the pipe.
+    # Meanwhile the peak memory of the child is sampled, to tell a crash of native code from running out of memory.
+    result = None
+    peak_memory = None
+    while True:
+        remaining = None if wall_time_seconds is None else max(start + wall_time_seconds - timer(), 0)
+        ended = receiver.poll(0.1 if remaining is None else min(0.1, remaining))
+        memory = current_rss(process.pid)
+        if memory is not None:
+            peak_memory = memory if peak_memory is None else max(peak_memory, memory)
+        if ended or remaining == 0:
+            break
+    if ended:
+        try:
+            result = receiver.recv()
+        except EOFError:
+            pass    # child ended without a result
+    receiver.close()
+
+    if not ended:
+        process.kill()
+        result = IsolatedResult(outcome=TIMEOUT, error="wall-clock limit")
+    process.join()
+    end = timer()
+
+    if result is None:
+        exit_code = process.exitcode
+        if exit_code in [-signal.SIGXCPU, -signal.SIGKILL] and cpu_time_seconds is not None:
+            result = IsolatedResult(outcome=TIMEOUT, error="CPU-time limit")
+        elif exit_code in [-signal.SIGABRT, -signal.SIGSEGV, 1, 127] and _near_limit(peak_memory, max_memory):
+            # Failed allocation in native code (CP-SAT), 1 if not even the outcome could be sent, 127 if glibc cannot allocate a thread
+            result = IsolatedResult(outcome=OUT_OF_MEMORY, error="exit code " + str(exit_code))
+        else:
+            result = IsolatedResult(outcome=CRASH, error="exit code " + str(exit_code))
+
+    result.exit_code = process.exitcode
+    result.total_time = end-start
+    return result
+
+'''
+Solve a single bin problem in a child process with a memory limit (in MB), CPU-time and wall-clock limits (in seconds).
+Returns the result and the fixed packing (None if not SAT).
+'''
+def solve_single_bin_isolated(
+            model: AbstractSingleBinModel,
+            problem: SingleBinProblem,
+            config: Configuration = None,
+            max_time_in_seconds=20,
+            max_memory: int = None,
+            cpu_time_seconds: int = None,
+            wall_time_seconds: int = None,
+        ) -> tuple[IsolatedResult, AbstractSingleBinPacking]:
+
+    if config is None:
+        config = Configuration()
+    if max_memory is not None and config.max_memory is None:
+        config = replace(config, max_memory=max_memory // 2)
+
+    result = run_isolated(_solve_single_bin, (model, problem, config, max_time_in_seconds), max_memory, cpu_time_seconds, wall_time_seconds)
+    result.stats = original_stats(problem, result.stats)
+    single_bin_packing = fixed_packing_from_arrays(result.arrays, model, problem.get_items()) if result.sat else None
+    return result, single_bin_packing
+
+'''
+Solve a multi bin problem in a child process with a memory limit (in MB), CPU-time and wall-clock limits (in seconds).
+Returns the result and the fixed packings of the final planning (None if not SAT).
+'''
+def solve_multi_bin_isolated(
+            model: AbstractMultiBinModel,
+            production_model: ProductionModel,
+            single_bin_model: AbstractSingleBinModel,
+            problem: MultiBinProblem,
+            args: dict,
+            config: Configuration = None,
+            max_memory: int = None,
+            cpu_time_seconds: int = None,
+            wall_time_seconds: int = None,
+        ) -> tuple[IsolatedResult, list[AbstractSingleBinPacking]]:
+
+    if config is None:
+        config = Configuration()
+    if max_memory is not None and config.max_memory is None:
+        config = replace(config, max_memory=max_memory // 2)
+
+    result = run_isolated(_solve_multi_bin, (model, production_model, single_bin_model, problem, config, args), max_memory, cpu_time_seconds, wall_time_seconds)
+    result.stats = original_stats(problem, result.stats)
+    single_bin_packings = fixed_packings_from_arrays(result.arrays, single_bin_model, problem.get_items()) if result.sat else None
+    return result, single_bin_packings
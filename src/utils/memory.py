@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import os
+import sys
+import tracemalloc
+
+
+'''
+Peak resident set size of the process (in bytes), None where resource is not available (Windows)
+'''
+def peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak*1024
+
+'''
+Current resident set size of the process, or of another process by its pid (in bytes).
+Where /proc is not available: the peak of this process, None for another process.
+'''
+def current_rss(pid=None) -> int:
+    try:
+        with open("/proc/" + ("self" if pid is None else str(pid)) + "/statm") as f:
+            return int(f.read().split()[1])*os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss() if pid is None else None
+
+
+class MemoryUsage():
+
+    '''
+    Memory of a phase: the allocated bytes it kept and its peak allocation (both tracemalloc, None when not tracing),
+    and the peak RSS of the process at its end
+    '''
+
+    def __init__(self):
+        self.allocated = None
+        self.peak_allocated = None
+        self.peak_rss = None
+
+        self._start = None
+        self._peak = 0      # absolute peak of the nested phases
+
+    def to_dict(self) -> dict:
+        return {"allocated": self.allocated, "peak_allocated": self.peak_allocated, "peak_rss": self.peak_rss}
+
+
+# Open measurements, a nested measurement resets the tracemalloc peak of the outer ones
+_open: list[MemoryUsage] = []
+
+'''
+Measure the memory of a block, e.g.
+
+    with measure_memory() as memory:
+        c = self.get_constraints()
+    memory.to_dict()
+
+Allocations are only measured while tracemalloc is tracing (see trace_memory in Configuration), as it slows down Python.
+'''
+@contextmanager
+def measure_memory():
+    usage = MemoryUsage()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Keep the peak of the outer measurements before resetting it
+        peak = tracemalloc.get_traced_memory()[1]
+        for outer in _open:
+            outer._peak = max(outer._peak, peak)
+        tracemalloc.reset_peak()
+        usage._start = tracemalloc.get_traced_memory()[0]
+        _open.append(usage)
+
+    try:
+        yield usage
+    finally:
+        if tracing and tracemalloc.is_tracing():
+            _open.remove(usage)
+            (current, peak) = tracemalloc.get_traced_memory()
+            peak = max(peak, usage._peak)
+            for outer in _open:
+                outer._peak = max(outer._peak, peak)
+            usage.allocated = current - usage._start
+            usage.peak_allocated = peak - usage._start
+        elif tracing:
+            _open.remove(usage)
+        usage.peak_rss = peak_rss()
+
+'''
+Trace allocations (tracemalloc) within the block, unless already tracing
+'''
+@contextmanager
+def tracing_memory(enabled=True):
+    start = enabled and not tracemalloc.is_tracing()
+    if start:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if start:
+            tracemalloc.stop()
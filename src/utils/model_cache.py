@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+from ortools.sat import cp_model_pb2
+from cpmpy.expressions.variables import _BoolVarImpl
+
+from src.utils.native_solver import NativeSolver
+from src.utils.atomic_write import write_atomic, write_json
+
+
+'''
+Cache key of a built model from its (JSON) description, e.g. the model class and the problem
+'''
+def model_key(description: dict) -> str:
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=lambda value: value.item() if hasattr(value, "item") else str(value)).encode()).hexdigest()
+
+
+class ModelCache:
+
+    '''
+    On-disk cache of built CP-SAT models: a hit skips creating the constraints and transferring them to CP-SAT.
+    Every model is a <key>.pb (serialised CpModelProto) with a <key>.json (names of the decision variables and constraint statistics).
+    The CPMpy variables of a new model get different names (the names are numbered per process), so the variables are
+    given in a fixed order (e.g. get_variables of the model), by which their names at build time are mapped back onto the solver variables.
+    The cache is bounded to max_size models, the least recently used models are evicted.
+    '''
+
+    def __init__(self, directory, max_size: int = 100):
+        self.directory = directory
+        self.max_size = max_size
+
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.index = {"clock": 0, "models": {}}   # key -> last used
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+
+    def __len__(self):
+        return len(self.index["models"])
+
+    def __contains__(self, key):
+        return key in self.index["models"] and os.path.exists(self._file_name(key, ".pb"))
+
+    def _tick(self) -> int:
+        self.index["clock"] += 1
+        return self.index["clock"]
+
+    def _file_name(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _write_index(self):
+        write_json(self.index_file, self.index)
+
+    def _remove(self, key):
+        del self.index["models"][key]
+        for extension in [".pb", ".json"]:
+            if os.path.exists(self._file_name(key, extension)):
+                os.remove(self._file_name(key, extension))
+
+    '''
+    Store a built solver (CPM_ortools or NativeSolver, before hints are added) with the names of the given variables
+    '''
+    def put(self, key, solver, variables: list, info: dict = None):
+        write_atomic(self._file_name(key, ".pb"), solver.ort_model.Proto().SerializeToString())
+        write_json(self._file_name(key, ".json"), {
+            "variables": [str(v) for v in variables],
+            "info": info,
+        })
+        self.index["models"][key] = self._tick()
+
+        # Least recently used eviction
+        while len(self) > self.max_size:
+            self._remove(min(self.index["models"], key=self.index["models"].get))
+
+        self._write_index()
+
+    '''
+    Solver of a cached model over the given variables (in the same order as stored), with the stored info.
+    None if the variables do not match the stored model.
+    '''
+    def load(self, key, variables: list) -> tuple[NativeSolver, dict]:
+        with open(self._file_name(key, ".json")) as f:
+            stored = json.load(f)
+        if len(stored["variables"]) != len(variables):
+            return None, None
+
+        proto = cp_model_pb2.CpModelProto()
+        with open(self._file_name(key, ".pb"), "rb") as f:
+            proto.ParseFromString(f.read())
+
+        s = NativeSolver()
+        s.model.Proto().CopyFrom(proto)
+
+        # Map the variables by their name at build time onto the solver variables
+        indices = {variable.name: index for (index, variable) in enumerate(proto.variables)}
+        for (name, cpm_var) in zip(stored["variables"], variables):
+            if name not in indices:
+                continue
+            if isinstance(cpm_var, _BoolVarImpl):
+                s.solver._varmap[cpm_var] = s.model.GetBoolVarFromProtoIndex(indices[name])
+            else:
+                s.solver._varmap[cpm_var] = s.model.GetIntVarFromProtoIndex(indices[name])
+            s.solver.user_vars.add(cpm_var)
+
+        self.index["models"][key] = self._tick()
+        self._write_index()
+
+        return s, stored["info"]
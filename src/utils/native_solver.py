@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ortools.sat.python.cp_model import INT_MIN
+from cpmpy.solvers import CPM_ortools
+from cpmpy.expressions.utils import is_num
+
+
+class NativeSolver():
+
+    '''
+    OR-Tools CP-SAT model in which constraints are posted directly, skipping the CPMpy transformations.
+    The CPMpy decision variables remain the interface: each one is mapped onto a CP-SAT variable
+    and receives its value after solving, so fixing and statistics work as with a CPMpy model.
+    '''
+
+    def __init__(self):
+        # Empty CPMpy solver, only used for its variable mapping and solution transfer
+        self.solver = CPM_ortools()
+        self.model = self.solver.ort_model
+
+    @property
+    def ort_model(self):
+        return self.model
+
+    @property
+    def ort_solver(self):
+        return self.solver.ort_solver
+
+    @property
+    def nr_constraints(self):
+        return len(self.model.Proto().constraints)
+
+    '''
+    Copy of the solver, which keeps all constraints posted so far
+    '''
+    def copy(self):
+        res = NativeSolver()
+        res.solver.ort_model = self.model.Clone()
+        res.solver._varmap = dict(self.solver._varmap)
+        res.solver.user_vars = set(self.solver.user_vars)
+        res.model = res.solver.ort_model
+        return res
+
+    # Variables
+
+    '''
+    CP-SAT variable (or literal) of a CPMpy variable, fixed values are returned as constant
+    '''
+    def var(self, cpm_var):
+        if is_num(cpm_var):
+            return int(cpm_var)
+        self.solver.user_vars.add(cpm_var._bv if hasattr(cpm_var, "_bv") else cpm_var)
+        return self.solver.solver_var(cpm_var)
+
+    '''
+    CP-SAT variables of a (nested) array of CPMpy variables, as nested lists
+    '''
+    def vars(self, cpm_vars):
+        if isinstance(cpm_vars, np.ndarray):
+            cpm_vars = cpm_vars.tolist()
+        if isinstance(cpm_vars, list):
+            return [self.vars(v) for v in cpm_vars]
+        return self.var(cpm_vars)
+
+    # Constraints
+
+    '''
+    Post CPMpy constraints (for the constraints without native counterpart)
+    '''
+    def add(self, cpm_constraints):
+        self.solver += cpm_constraints
+
+    '''
+    Interval of (possibly variable) size, only present when the literal holds
+    A variable size requires an upper bound on the end of the interval
+    '''
+    def optional_interval(self, start, size, present, max_end=None):
+        if isinstance(size, (int, np.integer)):
+            return self.model.NewOptionalFixedSizeIntervalVar(start, int(size), present, "")
+        end = self.model.NewIntVar(0, max_end, "")
+        self.model.Add(end == start + size).OnlyEnforceIf(present)
+        return self.model.NewOptionalIntervalVar(start, size, end, present, "")
+
+    '''
+    Literal equal to the truth value of the linear (in)equality
+    '''
+    def reify(self, linear_constraint):
+        b = self.model.NewBoolVar("")
+        self.model.Add(linear_constraint).OnlyEnforceIf(b)
+        self.model.Add(negate(linear_constraint)).OnlyEnforceIf(b.Not())
+        return b
+
+    # Objective
+
+    def minimize(self, cpm_expr):
+        self.solver.minimize(cpm_expr)
+
+    # Solving
+
+    def solution_hint(self, cpm_vars, values):
+        self.solver.solution_hint(cpm_vars, values)
+
+    def solve(self, **kwargs):
+        return self.solver.solve(**kwargs)
+
+    def status(self):
+        return self.solver.status()
+
+
+'''
+Negation of a bounded linear expression of CP-SAT
+'''
+def negate(linear_constraint):
+    expr = linear_constraint.Expression()
+    lb, ub = linear_constraint.Bounds()
+    if lb == ub:
+        return expr != lb
+    if lb == INT_MIN:
+        return expr > ub
+    return expr < lb
@@ -0,0 +1,218 @@
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.problem.problem import Problem
+from src.data_structures.problem.item_merging import original_stats
+from src.data_structures.problem.single_bin_problem import SingleBinProblem
+from src.data_structures.problem.multi_bin_problem import MultiBinProblem
+from src.models.abstract_model import AbstractSingleBinModel, AbstractMultiBinModel
+from src.extensions.due_dates.models.production_model import ProductionModel
+from src.utils.configuration import Configuration
+from src.utils.atomic_write import write_json
+from src.utils.solution_export import packing_arrays, production_arrays, save_arrays, load_arrays, fixed_packing_from_arrays, fixed_packings_from_arrays
+
+
+# Statistics and solver arguments as JSON (numpy values and stats dataclasses)
+def _json_default(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+def _hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=_json_default).encode()).hexdigest()
+
+'''
+Canonical hash of a problem: its items, machine config and (multi bin) deadlines and demands, not its name.
+The order of the items is kept, as the solutions refer to the items by index.
+'''
+def problem_hash(problem: Problem) -> str:
+    canonical = {
+        "widths": problem.widths,
+        "heights": problem.heights,
+        "machine_config": asdict(problem.get_machine_config()),
+    }
+    for name in ["deadlines", "deadline_counts", "colors"]:
+        if hasattr(problem, name):
+            canonical[name] = np.asarray(getattr(problem, name))
+    return _hash(canonical)
+
+'''
+Cache key of a solve: the problem, the models and the solver parameters (and time limits)
+'''
+def cache_key(problem: Problem, models: list, config: Configuration, **parameters) -> str:
+    return _hash({
+        "problem": problem_hash(problem),
+        "models": [model.__module__ + "." + model.__qualname__ for model in models],
+        "native": config.native,
+        "solver_parameters": config.solver_parameters(),
+        "parameters": parameters,
+    })
+
+
+@dataclass(kw_only=True)
+class CachedResult:
+
+    '''
+    Stored result of a solve
+    '''
+
+    sat: bool
+    stats: dict = None
+    arrays: dict[str, npt.NDArray] = None   # solution values (see solution_export), None if not SAT
+
+
+class ResultCache:
+
+    '''
+    On-disk cache of solve results, keyed by cache_key: a hit returns the fixed solution and statistics without building a model.
+    Every result is a <key>.json (SAT and statistics) with a <key>.npz (solution values).
+    The cache is bounded to max_size results, the least recently used results are evicted.
+    '''
+
+    def __init__(self, directory, max_size: int = 1000):
+        self.directory = directory
+        self.max_size = max_size
+
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.index = {"clock": 0, "results": {}}   # key -> last used
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+
+    def __len__(self):
+        return len(self.index["results"])
+
+    def __contains__(self, key):
+        return key in self.index["results"]
+
+    def _tick(self) -> int:
+        self.index["clock"] += 1
+        return self.index["clock"]
+
+    def _file_name(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _remove(self, key):
+        del self.index["results"][key]
+        for extension in [".json", ".npz"]:
+            if os.path.exists(self._file_name(key, extension)):
+                os.remove(self._file_name(key, extension))
+
+    def get(self, key) -> CachedResult:
+        if key not in self or not os.path.exists(self._file_name(key, ".json")):
+            return None
+
+        with open(self._file_name(key, ".json")) as f:
+            result = json.load(f)
+        arrays = load_arrays(self._file_name(key, ".npz")) if result["sat"] else None
+
+        self.index["results"][key] = self._tick()
+        write_json(self.index_file, self.index, default=_json_default)
+
+        return CachedResult(sat=result["sat"], stats=result["stats"], arrays=arrays)
+
+    def put(self, key, result: CachedResult):
+        if result.sat:
+            save_arrays(self._file_name(key, ".npz"), result.arrays)
+        write_json(self._file_name(key, ".json"), {"sat": result.sat, "stats": result.stats}, default=_json_default)
+        self.index["results"][key] = self._tick()
+
+        # Least recently used eviction
+        while len(self) > self.max_size:
+            self._remove(min(self.index["results"], key=self.index["results"].get))
+
+        write_json(self.index_file, self.index, default=_json_default)
+
+
+'''
+Solve a single bin problem, or return the cached result of an identical solve.
+SAT and proven infeasible results are cached.
+Returns whether it is SAT, the statistics and the fixed packing.
+'''
+def solve_single_bin_cached(
+            cache: ResultCache,
+            model: AbstractSingleBinModel,
+            problem: SingleBinProblem,
+            config: Configuration = None,
+            max_time_in_seconds=20,
+        ) -> tuple[bool, dict, AbstractSingleBinPacking]:
+
+    if config is None:
+        config = Configuration()
+
+    key = cache_key(problem, [model], config, max_time_in_seconds=max_time_in_seconds)
+    cached = cache.get(key)
+    if cached is not None:
+        config.log("CACHE HIT", model.get_name(), problem.name)
+        single_bin_packing = fixed_packing_from_arrays(cached.arrays, model, problem.get_items()) if cached.sat else None
+        return cached.sat, original_stats(problem, cached.stats), single_bin_packing
+
+    initialised_model = model.init_from_problem(problem)
+    sat = initialised_model.solve(config=config, max_time_in_seconds=max_time_in_seconds)
+
+    if not sat:
+        # Only a proof of infeasibility is kept, not a run out of time or memory which a retry can solve
+        if initialised_model.stats.status == "UNSATISFIABLE":
+            cache.put(key, CachedResult(sat=False))
+        return False, None, None
+
+    initialised_model.fix()
+    initialised_model.get_stats()
+    # Statistics as stored, so a hit returns the same
+    stats = json.loads(json.dumps(initialised_model.stats.to_dict(), default=_json_default))
+    cache.put(key, CachedResult(sat=True, stats=stats, arrays=packing_arrays(initialised_model.single_bin_packing)))
+
+    return True, original_stats(problem, stats), initialised_model.single_bin_packing
+
+'''
+Solve a multi bin problem, or return the cached result of an identical solve.
+Only SAT results are cached.
+Returns whether it is SAT, the statistics and the fixed packings of the final planning.
+'''
+def solve_multi_bin_cached(
+            cache: ResultCache,
+            model: AbstractMultiBinModel,
+            production_model: ProductionModel,
+            single_bin_model: AbstractSingleBinModel,
+            problem: MultiBinProblem,
+            args: dict,
+            config: Configuration = None,
+        ) -> tuple[bool, dict, list[AbstractSingleBinPacking]]:
+
+    if config is None:
+        config = Configuration()
+
+    key = cache_key(problem, [model, production_model, single_bin_model], config, args=args)
+    cached = cache.get(key)
+    if cached is not None:
+        config.log("CACHE HIT", model.get_name(), problem.name)
+        single_bin_packings = fixed_packings_from_arrays(cached.arrays, single_bin_model, problem.get_items()) if cached.sat else None
+        return cached.sat, original_stats(problem, cached.stats), single_bin_packings
+
+    initialised_model = model.init_from_problem(problem, production_model, single_bin_model)
+    sat = initialised_model.solve(config=config, args=args)
+    # LNS and iterative models also return their models
+    if isinstance(sat, tuple): (sat, _) = sat
+
+    # No solution is not a proof of infeasibility (the iterations are limited in time), so it is not kept
+    if not sat:
+        return False, None, None
+
+    # Statistics as stored, so a hit returns the same
+    stats = json.loads(json.dumps(initialised_model.get_stats(), default=_json_default))
+    arrays = production_arrays(initialised_model.get_production_model())
+    cache.put(key, CachedResult(sat=True, stats=stats, arrays=arrays))
+
+    return True, original_stats(problem, stats), fixed_packings_from_arrays(arrays, single_bin_model, problem.get_items())
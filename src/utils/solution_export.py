@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import io
+import json
+from dataclasses import fields
+
+import numpy as np
+import numpy.typing as npt
+
+from cpmpy.expressions.utils import argval
+
+from src.data_structures.abstract_single_bin_packing import AbstractSingleBinPacking
+from src.data_structures.bin import Bin
+from src.data_structures.bin_config import BinConfig
+from src.data_structures.item import Item
+from src.models.abstract_model import AbstractSingleBinModel
+from src.utils.fixable_type import array_value
+from src.utils.atomic_write import write_atomic, write_json
+
+
+'''
+Compact solutions: the values of a packing or production as named NumPy arrays (columns),
+saved as .npz or columnar .json, instead of pickling the models with their CPMpy variables and constraints.
+The instance values of all item packings of a bin are concatenated, item_offsets gives where each item packing starts.
+'''
+
+# Bin production arrays [bin_solution x deadline]
+PRODUCTION_ARRAYS = ["bin_repeats", "bin_active", "bin_order", "bin_delays_before", "bin_delays_after", "bin_starts", "bin_ends"]
+
+
+# Flat values of a fixable type, without fixing it: unknown values (e.g. the positions of CP-Guillotine, which only decides the counts) become -1 or False
+def _values(fixable, dtype) -> npt.NDArray:
+    value = np.asarray(fixable.fixed_value if fixable.fixed else fixable.free_value)
+    unknown = False if dtype is np.bool_ else -1
+    return np.fromiter((unknown if v is None else v for v in map(argval, value.flat)), dtype=dtype, count=value.size)
+
+'''
+Values of a (solved or fixed) single bin packing
+'''
+def packing_arrays(single_bin_packing: AbstractSingleBinPacking) -> dict[str, npt.NDArray]:
+    items = single_bin_packing.items
+    bin = single_bin_packing.bin
+
+    return {
+        "bin_config": np.array([bin.width, bin.min_length, bin.max_length]),
+        "bin_length": _values(bin.fixable_length, np.int64)[0],
+        "item_ids": np.array([item.item.ID for item in items], dtype=np.int64),
+        "item_dimensions": np.array([[item.item.width, item.item.height] for item in items], dtype=np.int64).reshape(-1, 2),
+        "item_rotation": np.array([item.rotation for item in items], dtype=np.bool_),
+        "item_max_count": np.array([item.max_count for item in items], dtype=np.int64),
+        "item_count": np.array([_values(item.fixable_count, np.int64)[0] for item in items], dtype=np.int64),
+        "item_selected": np.array([_values(item.fixable_selected, np.bool_)[0] for item in items], dtype=np.bool_),
+        "item_offsets": np.cumsum([0] + [np.size(item.fixable_pos_xs_arr.free_value) for item in items]),
+        "pos_xs": np.concatenate([_values(item.fixable_pos_xs_arr, np.int64) for item in items]),
+        "pos_ys": np.concatenate([_values(item.fixable_pos_ys_arr, np.int64) for item in items]),
+        "active": np.concatenate([_values(item.fixable_active, np.bool_) for item in items]),
+        # rotation per instance (CP-Baseline) or of the item packing
+        "rotations": np.concatenate([_values(item.fixable_rotation, np.bool_) if hasattr(item, "fixable_rotation") else np.full(np.size(item.fixable_pos_xs_arr.free_value), item.rotation) for item in items]),
+    }
+
+'''
+Values of a solved production model: its bin production and all its (fixed and free) bin packings
+'''
+def production_arrays(production_model) -> dict[str, npt.NDArray]:
+    bin_production = production_model.bin_production
+
+    arrays = {
+        "deadlines": np.asarray(bin_production.deadlines, dtype=np.int64),
+        "nr_fixed_packings": np.array(bin_production.nr_fixed_packings),
+        "nr_packings": np.array(bin_production.nr_packings),
+    }
+    for name in PRODUCTION_ARRAYS:
+        arrays[name] = array_value(getattr(bin_production, name), np.int64)
+
+    for (i_packing, single_bin_packing) in enumerate(bin_production.bin_packings):
+        for (name, array) in packing_arrays(single_bin_packing).items():
+            arrays["packing_" + str(i_packing) + "." + name] = array
+
+    return arrays
+
+# The arrays of one packing of a production
+def _packing_arrays(arrays: dict[str, npt.NDArray], i_packing) -> dict[str, npt.NDArray]:
+    prefix = "packing_" + str(i_packing) + "."
+    return {name.removeprefix(prefix): array for (name, array) in arrays.items() if name.startswith(prefix)}
+
+
+'''
+Save named arrays (atomically) as .npz (compressed) or as columnar .json (lists), depending on the file extension
+'''
+def save_arrays(file_name, arrays: dict[str, npt.NDArray]):
+    if file_name.endswith(".json"):
+        write_json(file_name, {name: np.asarray(array).tolist() for (name, array) in arrays.items()})
+    else:
+        data = io.BytesIO()
+        np.savez_compressed(data, **arrays)
+        write_atomic(file_name, data.getvalue())
+
+def load_arrays(file_name) -> dict[str, npt.NDArray]:
+    if file_name.endswith(".json"):
+        with open(file_name) as f:
+            return {name: np.asarray(values) for (name, values) in json.load(f).items()}
+    with np.load(file_name) as data:
+        return {name: data[name] for name in data.files}
+
+
+'''
+Rebuild a fixed packing from its values, for reuse as fixed single bin of a production model.
+The item packings are those of the single bin model, the items are looked up by ID (e.g. problem.get_items()).
+No solver is involved, the values are set with fix_to.
+'''
+def fixed_packing_from_arrays(arrays: dict[str, npt.NDArray], single_bin_model: AbstractSingleBinModel, items: list[Item]) -> AbstractSingleBinPacking:
+    items = {item.ID: item for item in items}
+    (width, min_length, max_length) = (int(x) for x in arrays["bin_config"])
+    bin_config = BinConfig(width=width, min_length=min_length, max_length=max_length)
+
+    item_packings = [
+        single_bin_model.ItemPacking(item=items[int(ID)], max_count=int(max_count), bin_config=bin_config, rotation=bool(rotation))
+        for (ID, max_count, rotation) in zip(arrays["item_ids"], arrays["item_max_count"], arrays["item_rotation"])
+    ]
+
+    offsets = arrays["item_offsets"]
+    for (i_item, item_packing) in enumerate(item_packings):
+        instances = slice(offsets[i_item], offsets[i_item+1])
+        item_packing.fixable_pos_xs_arr.fix_to(arrays["pos_xs"][instances].reshape(np.shape(item_packing.fixable_pos_xs_arr.free_value)))
+        item_packing.fixable_pos_ys_arr.fix_to(arrays["pos_ys"][instances].reshape(np.shape(item_packing.fixable_pos_ys_arr.free_value)))
+        item_packing.fixable_active.fix_to(arrays["active"][instances].reshape(np.shape(item_packing.fixable_active.free_value)))
+        item_packing.fixable_count.fix_to(arrays["item_count"][i_item])
+        item_packing.fixable_selected.fix_to(arrays["item_selected"][i_item])
+        # Rotation per instance (CP-Baseline)
+        if hasattr(item_packing, "fixable_rotation"):
+            item_packing.fixable_rotation.fix_to(arrays["rotations"][instances].reshape(np.shape(item_packing.fixable_rotation.free_value)))
+
+    bin = Bin(config=bin_config)
+    bin.fixable_length.fix_to(arrays["bin_length"])
+
+    # Packings with rotated item packings keep them apart
+    if "_items_rotated" in [f.name for f in fields(single_bin_model.single_bin_packing)]:
+        single_bin_packing = single_bin_model.single_bin_packing(
+            _items=[item_packing for item_packing in item_packings if not item_packing.rotation],
+            _items_rotated=[item_packing for item_packing in item_packings if item_packing.rotation],
+            bin=bin,
+        )
+    else:
+        single_bin_packing = single_bin_model.single_bin_packing(_items=item_packings, bin=bin)
+
+    single_bin_packing.fix()
+    return single_bin_packing
+
+'''
+Rebuild the fixed packings of an exported production (all its packings, in order)
+'''
+def fixed_packings_from_arrays(arrays: dict[str, npt.NDArray], single_bin_model: AbstractSingleBinModel, items: list[Item]) -> list[AbstractSingleBinPacking]:
+    return [
+        fixed_packing_from_arrays(_packing_arrays(arrays, i_packing), single_bin_model, items)
+        for i_packing in range(int(arrays["nr_packings"]))
+    ]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ortools.sat.python.cp_model import CpSolverSolutionCallback
+from cpmpy.expressions.variables import NegBoolView
+from cpmpy.expressions.utils import is_num
+
+
+class SolutionHint():
+
+    '''
+    Solution hint (warm start) for CP-SAT: values of decision variables which the solver tries first.
+    A hint does not need to be feasible, e.g. the last solution of a similar model or a heuristic packing.
+    '''
+
+    def __init__(self):
+        self.values = {}    # CPMpy variable -> value
+
+    def __len__(self):
+        return len(self.values)
+
+    '''
+    Hint (nested arrays of) variables, fixed values and unknown values are skipped
+    '''
+    def add(self, cpm_vars, values):
+        cpm_vars = np.asarray(cpm_vars, dtype=object).flatten()
+        values = np.asarray(values, dtype=object).flatten()
+        for (cpm_var, value) in zip(cpm_vars, values):
+            if is_num(cpm_var) or value is None:
+                continue
+            if isinstance(cpm_var, NegBoolView):
+                (cpm_var, value) = (cpm_var._bv, not value)
+            self.values[cpm_var] = int(value)
+
+    def extend(self, solution_hint: SolutionHint):
+        self.values.update(solution_hint.values)
+
+    '''
+    Pass the hint to a solver (CPM_ortools or NativeSolver)
+    '''
+    def apply(self, solver):
+        if len(self) > 0:
+            solver.solution_hint(list(self.values.keys()), list(self.values.values()))
+
+
+class FirstSolutionTimer(CpSolverSolutionCallback):
+
+    '''
+    Solution callback which records the wall time until the first solution
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.first_solution_time = None
+
+    def on_solution_callback(self):
+        if self.first_solution_time is None:
+            self.first_solution_time = self.WallTime()
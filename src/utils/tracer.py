@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+
+import os
+import threading
+
+from src.utils.atomic_write import write_json
+
+
+# Tracer of the current context (thread or asyncio task), None when not tracing
+_current_tracer: ContextVar[Tracer] = ContextVar("tracer", default=None)
+
+
+class Tracer():
+
+    '''
+    Span tracer of the solve phases (problem loading, variable creation, constraints, objective, transfer, solve, fixing, statistics).
+    Spans nest by time, e.g. the constraints of a production model within an LNS iteration.
+    The spans are exported as Chrome trace events (chrome://tracing or ui.perfetto.dev).
+    Without a current tracer a span is a no-op, so the instrumentation can stay in place.
+    '''
+
+    def __init__(self):
+        self.events = []
+        self.start = perf_counter()
+
+    @contextmanager
+    def span(self, name, **args):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            self.events.append({
+                "name": name,
+                "ph": "X",  # complete event
+                "ts": (start - self.start)*1e6,
+                "dur": (end - start)*1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {key: value if isinstance(value, (int, float, bool, str)) else str(value) for (key, value) in args.items()},
+            })
+
+    '''
+    Total duration (in seconds) and number of spans per name
+    '''
+    def totals(self) -> dict:
+        totals = {}
+        for event in self.events:
+            (duration, count) = totals.get(event["name"], (0, 0))
+            totals[event["name"]] = (duration + event["dur"]/1e6, count + 1)
+        return totals
+
+    def export(self, file_name):
+        # Written atomically, parallel workers export into the same directory
+        write_json(file_name, {"traceEvents": sorted(self.events, key=lambda event: event["ts"]), "displayTimeUnit": "ms"})
+
+
+'''
+Trace the spans of a block, e.g.
+
+    with tracing() as tracer:
+        model.solve(config)
+    tracer.export("trace.json")
+'''
+@contextmanager
+def tracing(tracer: Tracer = None):
+    if tracer is None:
+        tracer = Tracer()
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+'''
+Span in the current tracer (no-op when not tracing)
+'''
+def span(name, **args):
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, **args)